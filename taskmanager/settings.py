@@ -3,6 +3,7 @@ Django settings for taskmanager project.
 """
 
 import os
+import sys
 from pathlib import Path
 from decouple import config
 
@@ -15,6 +16,8 @@ SECRET_KEY = config('SECRET_KEY', default='django-insecure-your-secret-key-here'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=True, cast=bool)
 
+TESTING = 'test' in sys.argv or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
 # Application definition
@@ -32,7 +35,7 @@ INSTALLED_APPS = [
     'crispy_forms',
     'crispy_bootstrap5',
     'allauth',
-    'allauth.account',
+    'tasks.apps.AccountConfig',
     'allauth.socialaccount',
     
     # Local apps
@@ -41,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.middleware.RequestMetricsMiddleware',
+    'tasks.middleware.QueryCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,14 +53,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'allauth.account.middleware.AccountMiddleware',
+    # allauth's middleware, able to run async views without a thread
+    'tasks.middleware.AccountMiddleware',
 ]
 
 ROOT_URLCONF = 'taskmanager.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, reporting render times to the metrics middleware
+        'BACKEND': 'tasks.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,6 +86,102 @@ DATABASES = {
     }
 }
 
+# Cache
+# CACHE_BACKEND is one of locmem (per process, the default), file or redis.
+# The redis backend needs the redis package installed.
+#
+# Cached pages, task ETags and the category registry are invalidated by
+# bumping versions in the 'tasks' cache, so every process must see the same
+# cache. Under locmem a version bumped by one worker is invisible to the
+# others, so the 'tasks' cache is a dummy there (nothing is cached and no
+# ETags are sent) except under DEBUG and the test runner, which run in one
+# process. Set TASKS_CACHE_ENABLED for a single-process server on locmem.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'taskmanager'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'taskmanager',
+    }
+}
+TASKS_CACHE_ENABLED = config('TASKS_CACHE_ENABLED', default=CACHE_BACKEND != 'locmem' or DEBUG or TESTING, cast=bool)
+CACHES['tasks'] = CACHES['default'] if TASKS_CACHE_ENABLED else {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Lifetime of cached pages and objects; entries are invalidated through
+# versioned keys when the underlying tasks, comments or categories change
+TASKS_CACHE_TIMEOUT = config('TASKS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds between overdue sweeps run inside web workers; 0 disables them,
+# e.g. when the sweep_overdue command runs from cron instead
+TASKS_OVERDUE_SWEEP_INTERVAL = config('TASKS_OVERDUE_SWEEP_INTERVAL', default=0 if TESTING else 60, cast=int)
+
+# Share of requests timed by the metrics middleware (0 turns it off),
+# seconds between logged summaries of the timings (0 turns them off) and
+# an optional bearer token for scraping /metrics/ without a staff login
+TASKS_METRICS_SAMPLE_RATE = config('TASKS_METRICS_SAMPLE_RATE', default=1.0 if DEBUG else 0.05, cast=float)
+TASKS_METRICS_LOG_INTERVAL = config('TASKS_METRICS_LOG_INTERVAL', default=0 if TESTING else 300, cast=int)
+TASKS_METRICS_TOKEN = config('TASKS_METRICS_TOKEN', default='')
+
+# Share of requests whose queries are checked for N+1 patterns (one query
+# shape run TASKS_NPLUSONE_THRESHOLD times from the same call site) and
+# for queries slower than TASKS_SLOW_QUERY_MS. Problems raise under the
+# test runner and are logged elsewhere.
+TASKS_QUERY_CHECK_SAMPLE_RATE = config('TASKS_QUERY_CHECK_SAMPLE_RATE', default=1.0 if DEBUG or TESTING else 0.01, cast=float)
+TASKS_QUERY_CHECK_RAISE = config('TASKS_QUERY_CHECK_RAISE', default=TESTING, cast=bool)
+TASKS_NPLUSONE_THRESHOLD = config('TASKS_NPLUSONE_THRESHOLD', default=5, cast=int)
+TASKS_SLOW_QUERY_MS = config('TASKS_SLOW_QUERY_MS', default=200, cast=int)
+
+# Resumable attachment uploads write partial files to TASKS_UPLOAD_DIR,
+# which every web worker must share; sessions idle for longer than
+# TASKS_UPLOAD_EXPIRY seconds are removed by the clean_attachments command
+TASKS_UPLOAD_DIR = config('TASKS_UPLOAD_DIR', default=str(BASE_DIR / 'uploads'))
+TASKS_UPLOAD_EXPIRY = config('TASKS_UPLOAD_EXPIRY', default=24 * 3600, cast=int)
+TASKS_MAX_ATTACHMENT_SIZE = config('TASKS_MAX_ATTACHMENT_SIZE', default=100 * 1024 * 1024, cast=int)
+
+# Thumbnails of image attachments, by size name: the longest edge in
+# pixels. Rendered thumbnails are kept until they total more than
+# TASKS_DERIVED_CACHE_MAX_BYTES, then the least recently used are evicted.
+TASKS_THUMBNAIL_SIZES = {'small': 64, 'medium': 256, 'large': 1024}
+TASKS_DERIVED_CACHE_MAX_BYTES = config('TASKS_DERIVED_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+
+# Let the front-end server send attachment downloads: 'X-Accel-Redirect'
+# (nginx, with TASKS_ATTACHMENT_SENDFILE_URL as an internal location
+# aliasing MEDIA_ROOT) or 'X-Sendfile' (Apache, lighttpd). Left empty,
+# Django serves them.
+TASKS_ATTACHMENT_SENDFILE = config('TASKS_ATTACHMENT_SENDFILE', default='')
+TASKS_ATTACHMENT_SENDFILE_URL = config('TASKS_ATTACHMENT_SENDFILE_URL', default='/protected-media/')
+
+# Background jobs such as emails are stored in the database and run by
+# the run_workers command. A failed job is retried up to
+# TASKS_JOB_MAX_ATTEMPTS times, after TASKS_JOB_RETRY_DELAY seconds doubled
+# on every attempt (at most TASKS_JOB_MAX_RETRY_DELAY). Jobs running for
+# longer than TASKS_JOB_TIMEOUT seconds are assumed lost with their worker
+# and queued again. TASKS_JOBS_EAGER runs jobs inline instead of queueing.
+TASKS_JOBS_EAGER = config('TASKS_JOBS_EAGER', default=TESTING, cast=bool)
+TASKS_JOB_MAX_ATTEMPTS = config('TASKS_JOB_MAX_ATTEMPTS', default=5, cast=int)
+TASKS_JOB_RETRY_DELAY = config('TASKS_JOB_RETRY_DELAY', default=10, cast=int)
+TASKS_JOB_MAX_RETRY_DELAY = config('TASKS_JOB_MAX_RETRY_DELAY', default=3600, cast=int)
+TASKS_JOB_TIMEOUT = config('TASKS_JOB_TIMEOUT', default=600, cast=int)
+
+# Send the tasks app's logs, such as the metrics summaries, to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tasks': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -133,6 +236,8 @@ ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_USERNAME_REQUIRED = False
 ACCOUNT_AUTHENTICATION_METHOD = 'email'
 ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
+# Sends allauth's emails through the job queue
+ACCOUNT_ADAPTER = 'tasks.adapters.AccountAdapter'
 
 # Email settings (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -148,4 +253,9 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
-} 
\ No newline at end of file
+}
+
+# Check API requests against their viewset's query budget; requests over
+# budget fail under the test runner and are logged elsewhere
+ENFORCE_QUERY_BUDGETS = config('ENFORCE_QUERY_BUDGETS', default=DEBUG or TESTING, cast=bool)
+QUERY_BUDGETS_RAISE = config('QUERY_BUDGETS_RAISE', default=TESTING, cast=bool) 
\ No newline at end of file
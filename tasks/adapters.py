@@ -0,0 +1,21 @@
+from allauth.account.adapter import DefaultAccountAdapter
+from django.utils.html import strip_tags
+from .jobs import enqueue
+from .notifications import send_email
+
+
+class AccountAdapter(DefaultAccountAdapter):
+    """Queue allauth's emails instead of sending them during the request"""
+    
+    def send_mail(self, template_prefix, email, context):
+        # Rendered here, as the context holds the request
+        message = self.render_mail(template_prefix, email, context)
+        if message.content_subtype == 'html':
+            body, html = strip_tags(message.body), message.body
+        else:
+            body = message.body
+            html = next((content for content, mimetype in message.alternatives if mimetype == 'text/html'), None)
+        enqueue(
+            send_email, message.subject, body, message.to,
+            from_email=message.from_email, html=html, headers=message.extra_headers or None,
+        )
@@ -1,6 +1,101 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Task, Category, TaskComment, TaskAttachment
+from .categories import registry as category_registry
+from .models import Task, Category, TaskComment, TaskAttachment, Job
+from .pagination import EstimatedCountPaginator
+from .search import search_tasks
+from .services import bulk_update_tasks
+
+
+class CategoryListFilter(admin.SimpleListFilter):
+    """Category filter listing the in-process category registry"""
+    title = 'category'
+    parameter_name = 'category__id__exact'
+    
+    def lookups(self, request, model_admin):
+        return category_registry.choices()
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(category_id=self.value())
+        return queryset
+
+
+class UsernameListFilter(admin.SimpleListFilter):
+    """Filter on a user foreign key by exact username.
+    
+    The stock related-field filter lists every user; this one renders a
+    text input suggesting usernames from the user autocomplete endpoint
+    and filters through the unique username index.
+    """
+    template = 'admin/tasks/username_filter.html'
+    autocomplete_url = reverse_lazy('tasks:user_autocomplete')
+    
+    def lookups(self, request, model_admin):
+        # Usernames are typed in, never listed
+        return []
+    
+    def has_output(self):
+        return True
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value().strip()})
+        return queryset
+    
+    def choices(self, changelist):
+        # The other filters, ordering and search are resubmitted with the input
+        self.hidden_params = [
+            (name, value) for name, value in changelist.params.items() if name != self.parameter_name
+        ]
+        yield {
+            'selected': not self.value(),
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'All',
+        }
+
+
+class CreatedByListFilter(UsernameListFilter):
+    title = 'created by'
+    parameter_name = 'created_by__username'
+
+
+class AssignedToListFilter(UsernameListFilter):
+    title = 'assigned to'
+    parameter_name = 'assigned_to__username'
+
+
+class AuthorListFilter(UsernameListFilter):
+    title = 'author'
+    parameter_name = 'author__username'
+
+
+class UploadedByListFilter(UsernameListFilter):
+    title = 'uploaded by'
+    parameter_name = 'uploaded_by__username'
+
+
+class ScalableAdminMixin:
+    """Changelist settings for tables too large to count or list in full"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    class Media:
+        js = ['tasks/js/username_filter.js']
+
+
+def update_action(label, **values):
+    """Admin action writing ``values`` to the selected tasks in batched UPDATEs"""
+    def action(modeladmin, request, queryset):
+        changed = bulk_update_tasks(queryset, **values)
+        modeladmin.message_user(request, f'{changed} tasks marked as {label}.', messages.SUCCESS)
+    action.__name__ = 'mark_' + '_'.join(f'{name}_{value}' for name, value in values.items())
+    action.short_description = f'Mark selected tasks as {label}'
+    return action
 
 
 @admin.register(Category)
@@ -19,13 +114,26 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'created_by', 'assigned_to', 'category', 'priority', 'status', 'due_date', 'is_overdue_display']
-    list_filter = ['status', 'priority', 'category', 'created_at', 'due_date']
+    list_select_related = ['created_by', 'assigned_to', 'category']
+    # Date filters are index range scans, unlike the DISTINCT over every
+    # created_at that date_hierarchy runs
+    list_filter = [
+        'status', 'priority', CategoryListFilter, CreatedByListFilter, AssignedToListFilter,
+        'created_at', 'due_date',
+    ]
     search_fields = ['title', 'description', 'created_by__username', 'assigned_to__username']
-    date_hierarchy = 'created_at'
-    list_editable = ['status', 'priority']
-    readonly_fields = ['created_at', 'updated_at', 'completed_at']
+    autocomplete_fields = ['created_by', 'assigned_to']
+    readonly_fields = [
+        'created_at', 'updated_at', 'completed_at', 'comment_count', 'attachment_count', 'last_activity_at',
+    ]
+    # Status and priority changes go through batched actions rather than
+    # list_editable, which saves the listed rows one by one
+    actions = [
+        *(update_action(label.lower(), status=value) for value, label in Task.STATUS_CHOICES),
+        *(update_action(f'{label.lower()} priority', priority=value) for value, label in Task.PRIORITY_CHOICES),
+    ]
     
     fieldsets = (
         ('Basic Information', {
@@ -41,6 +149,10 @@ class TaskAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at', 'completed_at'),
             'classes': ('collapse',)
         }),
+        ('Activity', {
+            'fields': ('comment_count', 'attachment_count', 'last_activity_at'),
+            'classes': ('collapse',)
+        }),
     )
     
     def is_overdue_display(self, obj):
@@ -48,23 +160,71 @@ class TaskAdmin(admin.ModelAdmin):
             return format_html('<span style="color: red;">⚠ Overdue</span>')
         return ''
     is_overdue_display.short_description = 'Overdue'
+    is_overdue_display.admin_order_field = 'overdue_since'
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the full-text index instead of LIKE scans"""
+        if not search_term:
+            return queryset, False
+        search_term = search_term.strip()
+        matches = search_tasks(queryset, search_term).values('pk')
+        # Usernames are matched exactly so the unique username index is used,
+        # in subqueries so that each OR term is an index lookup on the task
+        users = User.objects.filter(username=search_term).values('pk')
+        queryset = queryset.filter(
+            Q(pk__in=matches)
+            | Q(created_by__in=users)
+            | Q(assigned_to__in=users)
+        )
+        return queryset, False
 
 
 @admin.register(TaskComment)
-class TaskCommentAdmin(admin.ModelAdmin):
+class TaskCommentAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['task', 'author', 'created_at', 'content_preview']
-    list_filter = ['created_at', 'author']
+    list_select_related = ['task', 'author']
+    list_filter = ['created_at', AuthorListFilter]
     search_fields = ['content', 'task__title', 'author__username']
+    autocomplete_fields = ['task', 'author']
     readonly_fields = ['created_at', 'updated_at']
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     content_preview.short_description = 'Content'
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Match comments on tasks found by the full-text index, or by author"""
+        if not search_term:
+            return queryset, False
+        search_term = search_term.strip()
+        # Task search documents include their comments; as in TaskAdmin the
+        # index match is not narrowed by LIKE filters, which scan the comments
+        # and drop words matched in different fields
+        tasks = search_tasks(Task.objects.all(), search_term).values('pk')
+        queryset = queryset.filter(Q(task__in=tasks) | Q(author__username=search_term))
+        return queryset, False
 
 
 @admin.register(TaskAttachment)
-class TaskAttachmentAdmin(admin.ModelAdmin):
+class TaskAttachmentAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['filename', 'task', 'uploaded_by', 'uploaded_at']
-    list_filter = ['uploaded_at', 'uploaded_by']
+    list_select_related = ['task', 'uploaded_by']
+    list_filter = ['uploaded_at', UploadedByListFilter]
     search_fields = ['filename', 'task__title', 'uploaded_by__username']
-    readonly_fields = ['uploaded_at'] 
\ No newline at end of file
+    autocomplete_fields = ['task', 'uploaded_by']
+    readonly_fields = ['blob', 'uploaded_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['locked_at', 'created_at']
+    actions = ['retry_jobs']
+    
+    @admin.action(description='Retry selected jobs now')
+    def retry_jobs(self, request, queryset):
+        count = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), locked_at=None
+        )
+        self.message_user(request, f'{count} jobs queued.', messages.SUCCESS)
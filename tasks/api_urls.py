@@ -1,14 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'tasks', views.TaskViewSet, basename='api-task')
 router.register(r'categories', views.CategoryViewSet, basename='api-category')
 router.register(r'comments', views.TaskCommentViewSet, basename='api-comment')
+router.register(r'uploads', views.AttachmentUploadViewSet, basename='api-upload')
 
 app_name = 'tasks-api'
 
 urlpatterns = [
+    # Async read endpoints, served natively under ASGI
+    path('async/dashboard/', async_views.dashboard_stats, name='async-dashboard'),
+    path('async/tasks/', async_views.task_list, name='async-task-list'),
+    path('async/tasks/<int:pk>/', async_views.task_detail, name='async-task-detail'),
+    path('async/comments/', async_views.comment_list, name='async-comment-list'),
+    path('async/attachments/<int:pk>/', async_views.download_attachment, name='async-attachment'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,6 +1,39 @@
+from allauth.account import apps as account_apps
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'tasks' 
\ No newline at end of file
+    name = 'tasks'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from . import metrics, querycheck, signals
+        # Register the system checks, and the job functions in web and worker processes alike
+        from . import checks, notifications, thumbnails  # noqa: F401
+        post_migrate.connect(signals.install_search_index, sender=self)
+        # Database access is not allowed here, so warm up on the first request
+        request_started.connect(signals.warm_category_registry)
+        if getattr(settings, 'TASKS_OVERDUE_SWEEP_INTERVAL', 0):
+            request_started.connect(signals.start_overdue_sweeper)
+        if getattr(settings, 'TASKS_METRICS_SAMPLE_RATE', 0):
+            connection_created.connect(metrics.install_query_timer)
+            if getattr(settings, 'TASKS_METRICS_LOG_INTERVAL', 0):
+                request_started.connect(signals.start_metrics_summary)
+        if getattr(settings, 'TASKS_QUERY_CHECK_SAMPLE_RATE', 0):
+            connection_created.connect(querycheck.install_query_check)
+
+
+class AccountConfig(account_apps.AccountConfig):
+    """allauth's account app, accepting the async-capable ``tasks.middleware.AccountMiddleware``
+
+    allauth insists on its own middleware path in ``MIDDLEWARE``.
+    """
+    default = False
+
+    def ready(self):
+        if 'tasks.middleware.AccountMiddleware' not in settings.MIDDLEWARE:
+            super().ready()
@@ -0,0 +1,183 @@
+"""Async versions of the hot read endpoints.
+
+Served natively under ASGI (``taskmanager.asgi``): the views await the
+async ORM and cache APIs and stream attachments chunk by chunk, so a
+request waiting on I/O does not hold a worker thread. Responses match
+the corresponding REST API endpoints. Only session authentication is
+supported.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import Http404, JsonResponse
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+from .attachments import attachment_response
+from .caching import amake_key, cache, conditional_task_response, get_task_updated_at, get_timeout, set_validators
+from .categories import registry as category_registry
+from .models import Task, TaskAttachment, TaskComment
+from .optimization import optimize_queryset
+from .pagination import InvalidCursor, KeysetCursorPagination, KeysetPaginator
+from .search import get_search_backend, search_tasks
+from .serializers import TaskCommentSerializer, TaskListSerializer, TaskSerializer
+from .services import TASK_ORDERINGS, aget_dashboard_stats
+
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+
+def async_login_required(view):
+    """Resolve the session user off the event loop and reject anonymous requests"""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(get_user)(request)
+        if not user.is_authenticated:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def render_serializer(serializer):
+    """Return ``serializer.data`` once the category registry is loaded.
+
+    Serializers only read prefetched rows, but cached category fields may
+    reload the registry, which must not happen on the event loop.
+    """
+    await sync_to_async(category_registry.warm)()
+    return serializer.data
+
+
+async def paginated_response(request, queryset, serializer_class, ordering, context):
+    """Render a keyset page the way :class:`KeysetCursorPagination` does"""
+    pagination = KeysetCursorPagination
+    paginator = KeysetPaginator(ordering, pagination.page_size)
+    try:
+        page = await paginator.apaginate(queryset, request.GET.get(pagination.cursor_query_param))
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+
+    url = request.build_absolute_uri()
+    payload = {
+        'next': replace_query_param(url, pagination.cursor_query_param, page.next_cursor)
+        if page.has_next() else None,
+        'previous': replace_query_param(url, pagination.cursor_query_param, page.previous_cursor)
+        if page.has_previous() else None,
+        'results': await render_serializer(serializer_class(page.object_list, many=True, context=context)),
+    }
+    if request.GET.get(pagination.count_query_param) == 'exact':
+        payload['count'] = await queryset.acount()
+    return payload
+
+
+def serializer_context(request):
+    return {'request': Request(request)}
+
+
+@async_login_required
+async def dashboard_stats(request):
+    """Dashboard counters and recent tasks of the current user"""
+    stats = await aget_dashboard_stats(request.user)
+    payload = {name: value for name, value in stats.items() if name != 'recent_tasks'}
+    payload['recent_tasks'] = [
+        {
+            'id': task.pk,
+            'title': task.title,
+            'status': task.status,
+            'priority': task.priority,
+            'due_date': task.due_date,
+            'is_overdue': task.is_overdue(),
+        }
+        for task in stats['recent_tasks']
+    ]
+    return JsonResponse(payload)
+
+
+@async_login_required
+async def task_list(request):
+    """Keyset-paginated task list, like ``GET /api/tasks/``"""
+    ordering = TASK_ORDERINGS.get(request.GET.get('ordering', 'newest'))
+    if ordering is None:
+        return JsonResponse({'ordering': [f'Expected one of: {", ".join(TASK_ORDERINGS)}.']}, status=400)
+
+    key = await amake_key(
+        'async-task-list', user=request.user, categories=True, extra=request.build_absolute_uri()
+    )
+    payload = await cache.aget(key)
+    if payload is None:
+        context = serializer_context(request)
+        queryset = Task.objects.visible_to(request.user)
+        search = request.GET.get('search')
+        if search:
+            queryset = search_tasks(queryset, search)
+            ordering = get_search_backend().ordering
+        else:
+            queryset = queryset.with_visibility_keys().order_by(*ordering)
+        queryset = optimize_queryset(queryset, TaskListSerializer(context=context))
+        payload = await paginated_response(request, queryset, TaskListSerializer, ordering, context)
+        await cache.aset(key, payload, get_timeout())
+    return JsonResponse(payload)
+
+
+@async_login_required
+async def task_detail(request, pk):
+    """A task, like ``GET /api/tasks/<pk>/``"""
+    not_modified = await sync_to_async(conditional_task_response)(request, request.user, pk)
+    if not_modified is not None:
+        return not_modified
+    # The cached page is shared by every user who can see the task
+    if await sync_to_async(get_task_updated_at)(request.user, pk) is None:
+        raise Http404('No task found matching the query')
+
+    key = await amake_key('async-task', task=pk, categories=True, extra=request.get_full_path())
+    data = await cache.aget(key)
+    if data is None:
+        context = serializer_context(request)
+        queryset = optimize_queryset(Task.objects.visible_to(request.user), TaskSerializer(context=context))
+        task = await queryset.filter(pk=pk).afirst()
+        if task is None:
+            raise Http404('No task found matching the query')
+        data = await render_serializer(TaskSerializer(task, context=context))
+        await cache.aset(key, data, get_timeout())
+    return await sync_to_async(set_validators)(JsonResponse(data), request.user, pk)
+
+
+@async_login_required
+async def comment_list(request):
+    """Keyset-paginated comments, like ``GET /api/comments/``; ``?task=`` filters by task"""
+    context = serializer_context(request)
+    queryset = TaskComment.objects.visible_to(request.user)
+    task_id = request.GET.get('task')
+    if task_id:
+        if not task_id.isdigit():
+            raise Http404('Invalid task')
+        queryset = queryset.filter(task_id=task_id)
+    queryset = optimize_queryset(queryset, TaskCommentSerializer(context=context))
+    payload = await paginated_response(request, queryset, TaskCommentSerializer, ('created_at', 'id'), context)
+    return JsonResponse(payload)
+
+
+@async_login_required
+async def download_attachment(request, pk):
+    """Stream an attachment of a visible task without holding a thread, honouring Range requests"""
+    attachment = await TaskAttachment.objects.select_related('blob').filter(
+        pk=pk, task__visibility__user=request.user
+    ).afirst()
+    if attachment is None:
+        raise Http404('No attachment found matching the query')
+    # Opens and seeks the file, which must not happen on the event loop
+    return await sync_to_async(attachment_response, thread_sensitive=False)(
+        request, attachment, stream=stream_file
+    )
+
+
+async def stream_file(file, length, chunk_size=ATTACHMENT_CHUNK_SIZE):
+    """Yield ``length`` bytes of a file in chunks, reading them in a worker thread"""
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while length > 0 and (chunk := await read(min(chunk_size, length))):
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
@@ -0,0 +1,304 @@
+"""Resumable attachment uploads, deduplicated storage and range downloads.
+
+An upload session receives a file as a series of ``Content-Range``
+chunks streamed into a partial file under ``TASKS_UPLOAD_DIR``; an
+interrupted upload resumes from the session's offset. A complete file
+is hashed and stored once per SHA-256 as an :class:`AttachmentBlob`
+that every attachment with the same content points at.
+"""
+import contextlib
+import hashlib
+import mimetypes
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from .models import AttachmentBlob, TaskAttachment, UploadSession
+
+CHUNK_SIZE = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    """A chunk the upload session cannot accept, with the HTTP status to answer"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class _PartialFile(File):
+    """A finished partial file; file system storage moves it instead of copying"""
+
+    def temporary_file_path(self):
+        return self.name
+
+
+def partial_path(session):
+    return os.path.join(settings.TASKS_UPLOAD_DIR, f'{session.pk}.part')
+
+
+def blob_name(digest):
+    """Content-addressed storage name, spread over two directory levels"""
+    return f'attachment_blobs/{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE * 16):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def start_upload(task, user, filename, size, sha256=''):
+    """Open an upload session with an empty partial file"""
+    session = UploadSession.objects.create(task=task, user=user, filename=filename, size=size, sha256=sha256)
+    os.makedirs(settings.TASKS_UPLOAD_DIR, exist_ok=True)
+    open(partial_path(session), 'wb').close()
+    return session
+
+
+def write_chunk(session, content_range, stream):
+    """Stream one chunk from ``stream`` into the partial file; returns the new offset.
+
+    ``content_range`` is the request's ``Content-Range`` header. Chunks
+    must arrive in order: a chunk not starting at the session's offset is
+    refused with a 409, telling the client where to resume.
+    """
+    match = _CONTENT_RANGE.match(content_range or '')
+    if match is None:
+        raise UploadError('Content-Range must be "bytes <first>-<last>/<size>".')
+    first, last, total = map(int, match.groups())
+    if total != session.size or not first <= last < total:
+        raise UploadError(f'Content-Range does not fit an upload of {session.size} bytes.', status=416)
+    if first != session.offset:
+        raise UploadError(f'The next chunk has to start at byte {session.offset}.', status=409)
+
+    expected = last + 1 - first
+    received = 0
+    with open(partial_path(session), 'r+b') as partial:
+        partial.seek(first)
+        while stream is not None and received < expected:
+            chunk = stream.read(min(CHUNK_SIZE, expected - received))
+            if not chunk:
+                break
+            partial.write(chunk)
+            received += len(chunk)
+    if received != expected:
+        raise UploadError(f'Received {received} of the {expected} bytes in Content-Range.')
+
+    # Only one of two requests sending the same chunk moves the offset
+    moved = UploadSession.objects.filter(pk=session.pk, offset=first).update(
+        offset=last + 1, updated_at=timezone.now()
+    )
+    if not moved:
+        raise UploadError('The chunk was uploaded by another request.', status=409)
+    session.offset = last + 1
+    return session.offset
+
+
+def complete_upload(session):
+    """Store a fully received upload and attach it to the session's task"""
+    path = partial_path(session)
+    digest = file_sha256(path)
+    if session.sha256 and session.sha256 != digest:
+        UploadSession.objects.filter(pk=session.pk).update(offset=0, updated_at=timezone.now())
+        session.offset = 0
+        raise UploadError('The uploaded file does not match its SHA-256; upload it again.', status=422)
+
+    blob = store_blob(path, digest, session.size)
+    with transaction.atomic():
+        attachment = TaskAttachment.objects.create(
+            task=session.task,
+            blob=blob,
+            file=blob.file.name,
+            filename=session.filename,
+            uploaded_by=session.user,
+        )
+        session.delete()
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+    return attachment
+
+
+def store_blob(path, digest, size):
+    """The blob with the content of the local file ``path``, storing it if it is new"""
+    blob = AttachmentBlob.objects.filter(sha256=digest).first()
+    if blob is not None:
+        return blob
+    with open(path, 'rb') as content:
+        name = default_storage.save(blob_name(digest), _PartialFile(content, path))
+    blob, created = AttachmentBlob.objects.get_or_create(sha256=digest, defaults={'file': name, 'size': size})
+    if not created:
+        # Another upload stored the same content first
+        default_storage.delete(name)
+    return blob
+
+
+def cancel_upload(session):
+    path = partial_path(session)
+    session.delete()
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def clean_uploads():
+    """Delete expired upload sessions and the partial files no session owns"""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASKS_UPLOAD_EXPIRY)
+    UploadSession.objects.filter(updated_at__lt=cutoff).delete()
+    try:
+        # Listed before reading the sessions, which are created before their file
+        names = [name for name in os.listdir(settings.TASKS_UPLOAD_DIR) if name.endswith('.part')]
+    except FileNotFoundError:
+        return 0
+    live = {f'{pk}.part' for pk in UploadSession.objects.values_list('pk', flat=True)}
+    removed = 0
+    for name in names:
+        if name not in live:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(settings.TASKS_UPLOAD_DIR, name))
+                removed += 1
+    return removed
+
+
+def delete_unused_blobs():
+    """Delete blobs no attachment points at any more, with their files and thumbnails.
+
+    Blobs younger than the upload expiry are kept, as an upload that is
+    completing may be about to use them.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASKS_UPLOAD_EXPIRY)
+    deleted = 0
+    for blob in AttachmentBlob.objects.filter(attachments__isnull=True, created_at__lt=cutoff).iterator():
+        names = [blob.file.name, *blob.derived_assets.values_list('file', flat=True)]
+        try:
+            with transaction.atomic():
+                blob.delete()
+        except (IntegrityError, ProtectedError):
+            continue
+        for name in names:
+            blob.file.storage.delete(name)
+        deleted += 1
+    return deleted
+
+
+def parse_range(header, size):
+    """The ``(start, stop)`` span of a single byte range, or None to send everything.
+
+    Several ranges and malformed headers are answered with the whole
+    file, which HTTP allows.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last bytes of the file
+        if not int(last) or not size:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size
+    if last and int(last) < int(first):
+        return None
+    if int(first) >= size:
+        raise RangeNotSatisfiable
+    return int(first), min(int(last) + 1, size) if last else size
+
+
+class FileRange:
+    """Read at most ``length`` bytes of a file from its current position.
+
+    ``fileno`` and ``tell`` stay available, so WSGI servers with a
+    sendfile file wrapper still send the range with ``sendfile()``,
+    bounded by the Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def attachment_response(request, attachment, stream=None):
+    """Serve an attachment with validators and single-range support.
+
+    The file is sent by the front-end server when
+    ``TASKS_ATTACHMENT_SENDFILE`` is set. Otherwise a :class:`FileResponse`
+    streams it, unless ``stream(file, length)`` is given to build the
+    content, e.g. an async iterator for ASGI.
+    """
+    blob = attachment.blob
+    etag = quote_etag(blob.sha256) if blob is not None else None
+    last_modified = int(attachment.uploaded_at.timestamp())
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    content_type = mimetypes.guess_type(attachment.filename)[0] or 'application/octet-stream'
+    sendfile = settings.TASKS_ATTACHMENT_SENDFILE
+    if sendfile:
+        # The front-end server answers Range requests itself
+        response = HttpResponse(content_type=content_type)
+        if sendfile.lower() == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.TASKS_ATTACHMENT_SENDFILE_URL + attachment.file.name
+        else:
+            response[sendfile] = attachment.file.path
+    else:
+        size = blob.size if blob is not None else attachment.file.size
+        span = None
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range in (etag, http_date(last_modified)):
+            try:
+                span = parse_range(request.headers.get('Range'), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+        start, stop = span or (0, size)
+        file = attachment.file.storage.open(attachment.file.name, 'rb')
+        file.seek(start)
+        if stream is None:
+            response = FileResponse(FileRange(file, stop - start), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(stream(file, stop - start), content_type=content_type)
+        response['Content-Length'] = stop - start
+        if span is not None:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+
+    response['Content-Disposition'] = content_disposition_header(True, attachment.filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(last_modified)
+    if etag is not None:
+        response['ETag'] = etag
+    return response
@@ -0,0 +1,183 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.connection import ConnectionProxy
+
+# Versioned entries live in their own cache alias, a dummy cache unless all
+# processes share it (see TASKS_CACHE_ENABLED)
+CACHE_ALIAS = 'tasks'
+cache = ConnectionProxy(caches, CACHE_ALIAS)
+
+# Version scopes: a user's version changes whenever anything they can see
+# changes, a task's version whenever the task, its comments or its
+# attachments change, and the categories version whenever any category
+# changes.
+USER = 'user'
+TASK = 'task'
+CATEGORIES = 'categories'
+
+_MISSING = object()
+
+
+def get_timeout():
+    return getattr(settings, 'TASKS_CACHE_TIMEOUT', 300)
+
+
+def is_enabled():
+    return getattr(settings, 'TASKS_CACHE_ENABLED', True)
+
+
+def _version_key(scope, ident=''):
+    return f'tasks:version:{scope}:{ident}'
+
+
+def get_versions(*scopes):
+    """Return the current versions of ``(scope, ident)`` pairs in one round trip"""
+    keys = [_version_key(scope, ident) for scope, ident in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        # Versions never expire; add() keeps a concurrently created value
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+async def aget_versions(*scopes):
+    """Async variant of :func:`get_versions`"""
+    keys = [_version_key(scope, ident) for scope, ident in scopes]
+    versions = await cache.aget_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            await cache.aadd(key, version, None)
+        versions.update(await cache.aget_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def bump_versions(*scopes):
+    """Invalidate every key built from the given ``(scope, ident)`` pairs"""
+    for scope, ident in set(scopes):
+        if ident is None:
+            continue
+        key = _version_key(scope, ident)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+def _initial_version():
+    # Start from the clock so a version evicted from the cache never comes
+    # back with a value that was already used for stale entries
+    return time.time_ns() // 1000
+
+
+def make_key(name, *, user=None, task=None, categories=False, extra=''):
+    """Build a cache key embedding the versions it depends on"""
+    scopes = _key_scopes(user, task, categories)
+    return _format_key(name, scopes, get_versions(*scopes), extra)
+
+
+async def amake_key(name, *, user=None, task=None, categories=False, extra=''):
+    """Async variant of :func:`make_key`"""
+    scopes = _key_scopes(user, task, categories)
+    return _format_key(name, scopes, await aget_versions(*scopes), extra)
+
+
+def _key_scopes(user, task, categories):
+    scopes = []
+    if user is not None:
+        scopes.append((USER, getattr(user, 'pk', user)))
+    if task is not None:
+        scopes.append((TASK, task))
+    if categories:
+        scopes.append((CATEGORIES, ''))
+    return scopes
+
+
+def _format_key(name, scopes, versions, extra):
+    parts = [f'{scope}{ident}.{version}' for (scope, ident), version in zip(scopes, versions)]
+    if extra:
+        parts.append(hashlib.md5(extra.encode()).hexdigest())
+    return ':'.join(['tasks', name, *parts])
+
+
+def get_or_set(key, default, timeout=None):
+    """Like cache.get_or_set() but able to cache None"""
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = default()
+        cache.set(key, value, get_timeout() if timeout is None else timeout)
+    return value
+
+
+def invalidate_users(*user_ids):
+    bump_versions(*((USER, user_id) for user_id in user_ids if user_id))
+
+
+def invalidate_tasks(*task_ids):
+    bump_versions(*((TASK, task_id) for task_id in task_ids if task_id))
+
+
+def invalidate_categories():
+    bump_versions((CATEGORIES, ''))
+
+
+def get_task_updated_at(user, task_id):
+    """Return ``updated_at`` of a task visible to the user, or None.
+
+    Cached per user and task version, so repeated conditional requests are
+    answered without touching the database.
+    """
+    from .models import Task
+
+    key = make_key('updated-at', user=user, task=task_id)
+    return get_or_set(key, lambda: (
+        Task.objects.visible_to(user).filter(pk=task_id).values_list('updated_at', flat=True).first()
+    ))
+
+
+def task_etag(user, task_id):
+    """ETag of a task page for a user, built from ``Task.updated_at``.
+
+    The task version is part of the tag because comments change the page
+    without touching ``updated_at``, and the categories version because
+    the page shows the task's category. Without a shared cache there are
+    no reliable versions, so there is no ETag either.
+    """
+    if not is_enabled():
+        return None
+    updated_at = get_task_updated_at(user, task_id)
+    if updated_at is None:
+        return None
+    task_version, categories_version = get_versions((TASK, task_id), (CATEGORIES, ''))
+    digest = hashlib.md5(
+        f'{task_id}:{updated_at.isoformat()}:{task_version}:{categories_version}:{user.pk}'.encode()
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def conditional_task_response(request, user, task_id):
+    """Return a 304 response if the client's copy of the task is current.
+
+    Returns None when the page has to be rendered. ``set_validators``
+    adds the ETag to the rendered response. There is no Last-Modified
+    validator: editing or deleting a comment changes the page without
+    moving any timestamp of the task.
+    """
+    etag = task_etag(user, task_id)
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag)
+
+
+def set_validators(response, user, task_id):
+    etag = task_etag(user, task_id)
+    if etag is not None and response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+    return response
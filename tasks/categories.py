@@ -0,0 +1,138 @@
+import threading
+import time
+
+from django import forms
+from rest_framework import serializers
+from .caching import CATEGORIES, get_versions
+
+
+class CategoryRegistry:
+    """In-process snapshot of the categories table.
+
+    Categories are few and rarely change, so every worker keeps them in
+    memory. Changes bump the categories version in the shared cache; a
+    worker compares its snapshot against that version (at most once per
+    ``check_interval`` seconds) and reloads when it is stale. Changes made
+    in the same process clear the snapshot immediately. Without a shared
+    cache (``TASKS_CACHE_ENABLED`` off) every check sees a new version, so
+    the snapshot is reloaded once per ``check_interval``.
+    """
+    check_interval = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._loaded = None
+            self._version = None
+            self._checked_at = 0.0
+
+    def warm(self):
+        """Load the snapshot if it is missing or stale"""
+        self._snapshot()
+
+    def _snapshot(self):
+        """Return the ``(categories, serialized)`` maps of the current snapshot.
+
+        Both maps are published in one attribute, so a caller holding them
+        keeps a consistent pair even if ``clear()`` runs meanwhile.
+        """
+        now = time.monotonic()
+        loaded = self._loaded
+        if loaded is not None and now - self._checked_at < self.check_interval:
+            return loaded
+
+        version, = get_versions((CATEGORIES, ''))
+        with self._lock:
+            if self._loaded is None or self._version != version:
+                from .models import Category
+                from .serializers import CategorySerializer
+
+                categories = list(Category.objects.all())
+                self._loaded = (
+                    {category.pk: category for category in categories},
+                    {category.pk: CategorySerializer(category).data for category in categories},
+                )
+                self._version = version
+            self._checked_at = now
+            return self._loaded
+
+    def all(self):
+        """Categories in their default (name) ordering"""
+        categories, _ = self._snapshot()
+        return list(categories.values())
+
+    def get(self, pk):
+        categories, _ = self._snapshot()
+        try:
+            return categories.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def choices(self, empty_label=None):
+        choices = [(category.pk, category.name) for category in self.all()]
+        if empty_label is not None:
+            choices.insert(0, ('', empty_label))
+        return choices
+
+    def serialized(self, pk):
+        """CategorySerializer output for a category, computed once per snapshot"""
+        _, serialized = self._snapshot()
+        return serialized.get(pk)
+
+
+registry = CategoryRegistry()
+
+
+class CategoryChoiceField(forms.ChoiceField):
+    """Form field for a category, with choices served from the registry"""
+
+    def __init__(self, *, empty_label='---------', **kwargs):
+        self.empty_label = empty_label
+        super().__init__(choices=self._get_choices, **kwargs)
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+        # Bind the copied choices to the copy so per-form empty labels apply
+        result.choices = result._get_choices
+        return result
+
+    def _get_choices(self):
+        return registry.choices(self.empty_label)
+
+    def prepare_value(self, value):
+        return getattr(value, 'pk', value)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        category = registry.get(value)
+        if category is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value}
+            )
+        return category
+
+    def validate(self, value):
+        forms.Field.validate(self, value)
+
+    def has_changed(self, initial, data):
+        return str(self.prepare_value(initial) or '') != str(data or '')
+
+
+class CachedCategoryField(serializers.Field):
+    """Read-only nested category rendered from the registry.
+
+    Reads ``category_id`` only, so task querysets need no join on the
+    categories table.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'category_id')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return registry.serialized(value)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from .caching import CACHE_ALIAS
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Versions bumped in a per-process cache are invisible to the other workers"""
+    backend = settings.CACHES.get(CACHE_ALIAS, {}).get('BACKEND', '')
+    if not backend.endswith('.LocMemCache') or settings.DEBUG or getattr(settings, 'TESTING', False):
+        return []
+    return [Error(
+        f"The '{CACHE_ALIAS}' cache is local to each process, so workers serve stale pages and categories.",
+        hint='Set CACHE_BACKEND to redis or file, or turn TASKS_CACHE_ENABLED off. '
+             'Silence tasks.E001 only if the site runs in a single process.',
+        id='tasks.E001',
+    )]
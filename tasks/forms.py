@@ -1,5 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
+from .categories import CategoryChoiceField
+from .widgets import UserAutocompleteWidget
 from .models import Task, Category, TaskComment
 
 
@@ -13,6 +15,10 @@ class TaskForm(forms.ModelForm):
         ),
         input_formats=['%Y-%m-%dT%H:%M']
     )
+    category = CategoryChoiceField(
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
     
     class Meta:
         model = Task
@@ -20,18 +26,27 @@ class TaskForm(forms.ModelForm):
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
-            'assigned_to': forms.Select(attrs={'class': 'form-control'}),
-            'category': forms.Select(attrs={'class': 'form-control'}),
+            'assigned_to': UserAutocompleteWidget(attrs={'class': 'form-control'}),
             'priority': forms.Select(attrs={'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Only show active users in the assigned_to field
+        # Only active users can be assigned; the widget only renders the
+        # selected one and validation looks up a single primary key
         self.fields['assigned_to'].queryset = User.objects.filter(is_active=True)
         self.fields['assigned_to'].empty_label = "Select assignee (optional)"
         self.fields['category'].empty_label = "Select category (optional)"
+    
+    def save(self, commit=True):
+        task = super().save(commit=False)
+        if commit:
+            # Edits write the form's columns only: the counters loaded with
+            # the task are stale once a comment lands meanwhile
+            task.save(update_fields=None if task._state.adding else [*self._meta.fields, 'updated_at'])
+            self._save_m2m()
+        return task
 
 
 class CategoryForm(forms.ModelForm):
@@ -94,8 +109,7 @@ class TaskFilterForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
-    category = forms.ModelChoiceField(
-        queryset=Category.objects.all(),
+    category = CategoryChoiceField(
         required=False,
         empty_label="All Categories",
         widget=forms.Select(attrs={'class': 'form-control'})
@@ -104,7 +118,7 @@ class TaskFilterForm(forms.Form):
         queryset=User.objects.filter(is_active=True),
         required=False,
         empty_label="All Users",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=UserAutocompleteWidget(attrs={'class': 'form-control'})
     )
     due_date_from = forms.DateField(
         required=False,
@@ -119,4 +133,10 @@ class TaskFilterForm(forms.Form):
             'class': 'form-control',
             'type': 'date'
         })
+    )
+    ordering = forms.ChoiceField(
+        label='Sort by',
+        choices=[('', 'Newest'), ('activity', 'Recent activity'), ('comments', 'Most comments')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
     ) 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Database-backed background jobs.
+
+Functions registered with :func:`job` are queued with :func:`enqueue`,
+which stores a :class:`~tasks.models.Job` row as part of the current
+transaction, so a job only becomes visible once the data it refers to is
+committed. The ``run_workers`` command claims due jobs and runs them in
+a process pool, retrying failures with exponential backoff.
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job functions by registered name
+registry = {}
+
+
+def job(name=None, max_attempts=None):
+    """Register a function as a job; its arguments must be JSON serializable"""
+    def decorator(func):
+        func.job_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        registry[func.job_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, *args, delay=0, **kwargs):
+    """Queue ``func(*args, **kwargs)`` to run in a worker after ``delay`` seconds"""
+    # Round-trip the arguments so that eager jobs see what workers would
+    args, kwargs = json.loads(json.dumps([args, kwargs]))
+    if settings.TASKS_JOBS_EAGER:
+        func(*args, **kwargs)
+        return None
+    return Job.objects.create(
+        name=func.job_name,
+        args=args,
+        kwargs=kwargs,
+        max_attempts=func.max_attempts or settings.TASKS_JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: doubling, capped and jittered"""
+    delay = min(settings.TASKS_JOB_RETRY_DELAY * 2 ** (attempts - 1), settings.TASKS_JOB_MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1)
+
+
+def claim_jobs(limit):
+    """Mark up to ``limit`` due jobs as running; returns their ids.
+
+    Each job is claimed with a conditional UPDATE, so several worker
+    commands can share a queue without running a job twice.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+    claimed = []
+    for pk in due.values_list('pk', flat=True)[:limit]:
+        if Job.objects.filter(pk=pk, status='queued').update(
+            status='running', locked_at=now, attempts=F('attempts') + 1
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def run_job(pk):
+    """Run a claimed job, then delete it or schedule its retry"""
+    try:
+        job = Job.objects.filter(pk=pk, status='running').first()
+        if job is None:
+            return
+        try:
+            func = registry.get(job.name)
+            if func is None:
+                raise LookupError(f'No job registered as {job.name}')
+            func(*job.args, **job.kwargs)
+        except Exception:
+            fail_job(job, traceback.format_exc())
+        else:
+            Job.objects.filter(pk=pk).delete()
+    finally:
+        close_old_connections()
+
+
+def fail_job(job, error):
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status='failed', locked_at=None, last_error=error)
+        logger.error('Job %s %s failed after %d attempts:\n%s', job.pk, job.name, job.attempts, error)
+        return
+    delay = retry_delay(job.attempts)
+    Job.objects.filter(pk=job.pk).update(
+        status='queued',
+        locked_at=None,
+        last_error=error,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    logger.warning('Job %s %s failed, retrying in %.0fs:\n%s', job.pk, job.name, delay, error)
+
+
+def requeue_lost_jobs():
+    """Queue again the jobs whose worker died, or fail them when out of attempts"""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASKS_JOB_TIMEOUT)
+    lost = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    error = f'Still running after {settings.TASKS_JOB_TIMEOUT}s; the worker was lost'
+    lost.filter(attempts__gte=F('max_attempts')).update(status='failed', locked_at=None, last_error=error)
+    return lost.update(status='queued', locked_at=None, last_error=error, run_at=timezone.now())
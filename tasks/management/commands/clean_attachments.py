@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from tasks.attachments import clean_uploads, delete_unused_blobs
+from tasks.thumbnails import evict_derived_assets
+
+
+class Command(BaseCommand):
+    help = 'Remove expired attachment uploads, stored files no attachment uses and excess thumbnails'
+
+    def handle(self, *args, **options):
+        partials = clean_uploads()
+        blobs = delete_unused_blobs()
+        thumbnails = evict_derived_assets()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {partials} partial upload files, {blobs} unused attachment files '
+            f'and {thumbnails} least recently used thumbnails'
+        ))
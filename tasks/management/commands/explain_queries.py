@@ -0,0 +1,133 @@
+import re
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+from tasks.admin import TaskAdmin
+from tasks.categories import registry as category_registry
+from tasks.models import Task
+from tasks.services import COMMENT_ORDERINGS, COMMENT_PAGE_SIZE, comment_thread, overdue_candidates, recent_tasks
+from tasks.views import CategoryDetailView, TaskCommentViewSet, TaskListView, TaskViewSet
+
+# Plan lines reading a whole table or index rather than a range of it. SQLite
+# reports index range lookups as SEARCH; a SCAN, even ``USING INDEX``, walks
+# every entry. FTS5 tables answer MATCH constraints (idxStr ``M``) from their
+# own index and are reported as a virtual table SCAN.
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW\b)(\w+)\b(?! VIRTUAL TABLE INDEX \d+:M)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def find_full_scans(plan, vendor):
+    """Return the tables a query plan reads in full, or None if the vendor is unsupported"""
+    pattern = FULL_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        return None
+    return sorted(set(pattern.findall(plan)))
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the querysets behind the task views and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to build the querysets for (default: first active user)')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if any full scan is found')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        supported = connection.vendor in FULL_SCAN_PATTERNS
+        if not supported:
+            self.stdout.write(self.style.WARNING(
+                f'Full scans cannot be detected on {connection.vendor}, printing plans only'
+            ))
+
+        flagged = []
+        for label, queryset in self.get_querysets(user):
+            plan = queryset.explain()
+            scans = find_full_scans(plan, connection.vendor) or []
+            if scans:
+                flagged.append(label)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {label}: {", ".join(scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok         {label}'))
+            if scans or options['verbosity'] > 1 or not supported:
+                self.stdout.write(plan + '\n')
+
+        if flagged and options['fail']:
+            raise CommandError(f'{len(flagged)} queries scan whole tables')
+
+    def get_user(self, username):
+        users = User.objects.filter(is_active=True)
+        user = users.filter(username=username).first() if username else users.order_by('pk').first()
+        if user is None:
+            raise CommandError('No matching active user')
+        return user
+
+    def get_querysets(self, user):
+        """Yield (label, queryset) for the queries the views run, first page only"""
+        factory = RequestFactory()
+        page_size = TaskListView.paginate_by
+        category = next(iter(category_registry.all()), None)
+        today = timezone.localdate()
+
+        task_list_filters = [
+            {},
+            {'ordering': 'activity'},
+            {'ordering': 'comments'},
+            {'status': 'todo'},
+            {'priority': 'high'},
+            {'due_date_from': today.isoformat(), 'due_date_to': today.replace(year=today.year + 1).isoformat()},
+            {'search': 'task'},
+        ]
+        if category is not None:
+            task_list_filters.append({'category': category.pk})
+        for params in task_list_filters:
+            request = factory.get('/tasks/', params)
+            request.user = user
+            view = TaskListView()
+            view.setup(request)
+            queryset = view.get_queryset().order_by(*view.keyset_ordering)[:page_size + 1]
+            label = 'task list' + (f' ?{request.GET.urlencode()}' if params else '')
+            yield label, queryset
+
+        if category is not None:
+            request = factory.get(f'/categories/{category.pk}/')
+            request.user = user
+            view = CategoryDetailView()
+            view.setup(request, pk=category.pk)
+            view.object = category
+            yield 'category detail', view.get_context_data()['tasks']
+
+        task = Task.objects.visible_to(user).order_by('-comment_count', '-id').first()
+        if task is not None:
+            for name, ordering in COMMENT_ORDERINGS.items():
+                yield f'comment thread {name}', comment_thread(task.pk).order_by(*ordering)[:COMMENT_PAGE_SIZE + 1]
+
+        yield 'dashboard recent', recent_tasks(Task.objects.visible_to(user))
+        yield 'dashboard overdue', Task.objects.visible_to(user).overdue()
+        now = timezone.now()
+        yield 'overdue sweep', overdue_candidates(now, since=now - timedelta(minutes=1))
+
+        # The changelist builds the admin's own filtered, searched and ordered
+        # queryset. Unfiltered, it walks the ordering index only as far as the
+        # page, which reads as a full scan.
+        admin_filters = [{'status__exact': 'todo'}, {'status__exact': 'done'}, {'q': 'task'}]
+        for params in admin_filters:
+            request = factory.get('/admin/tasks/task/', params)
+            request.user = user
+            changelist = TaskAdmin(Task, admin.site).get_changelist_instance(request)
+            yield f'admin tasks ?{request.GET.urlencode()}', changelist.queryset[:changelist.list_per_page]
+
+        for viewset_class, path in ((TaskViewSet, '/api/tasks/'), (TaskCommentViewSet, '/api/comments/')):
+            request = Request(factory.get(path))
+            request.user = user
+            viewset = viewset_class(action='list', request=request, format_kwarg=None, args=(), kwargs={})
+            queryset = viewset.filter_queryset(viewset.get_queryset())
+            ordering = getattr(viewset, 'keyset_ordering', viewset.pagination_class.ordering)
+            yield f'api {path}', queryset.order_by(*ordering)[:viewset.pagination_class.page_size + 1]
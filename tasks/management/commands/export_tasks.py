@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tasks.exports import EXPORT_FORMATS, export_rows
+from tasks.forms import TaskFilterForm
+from tasks.services import filter_tasks
+
+FILTERS = ['status', 'priority', 'category', 'assigned_to', 'due_date_from', 'due_date_to', 'search']
+
+
+class Command(BaseCommand):
+    help = 'Stream tasks as CSV or JSON lines, filtered like the task list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write to (default: standard output)')
+        parser.add_argument('--user', help='Only export the tasks visible to this username')
+        for name in FILTERS:
+            parser.add_argument(f'--{name.replace("_", "-")}', dest=name, help=f'Filter on {name} as in the task list')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'Unknown user {options["user"]!r}')
+
+        form = TaskFilterForm({name: options[name] for name in FILTERS if options[name] is not None})
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        queryset = filter_tasks(user, form.cleaned_data)
+        if not form.cleaned_data.get('search'):
+            queryset = queryset.order_by('-created_at', '-id')
+        stream, _ = EXPORT_FORMATS[options['format']]
+
+        output = open(options['output'], 'w', newline='') if options['output'] else self.stdout._out
+        try:
+            for chunk in stream(export_rows(queryset)):
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
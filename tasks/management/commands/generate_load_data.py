@@ -0,0 +1,166 @@
+import contextlib
+import hashlib
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from tasks.attachments import blob_name
+from tasks.models import AttachmentBlob, Category, Task, TaskAttachment, TaskComment
+from tasks.services import reconcile_task_activity, refresh_after_bulk_write
+
+STATUS_WEIGHTS = {'todo': 40, 'in_progress': 25, 'review': 10, 'done': 25}
+PRIORITY_WEIGHTS = {'low': 30, 'medium': 40, 'high': 20, 'urgent': 10}
+WORDS = (
+    'report review deploy fix update write design test plan call email meeting budget release '
+    'invoice client server database migration feature bug docs onboarding research draft'
+).split()
+SAMPLE_ATTACHMENTS = 10
+
+
+@contextlib.contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values set on objects"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic data set for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--comments', type=float, default=2.0, help='Average comments per task')
+        parser.add_argument('--attachments', type=float, default=0.05, help='Share of tasks with an attachment')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of task ownership')
+        parser.add_argument('--prefix', default='load', help='Prefix of generated usernames and category names')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        prefix = options['prefix']
+        started = time.monotonic()
+
+        users = self.create_users(prefix, options['users'])
+        categories = self.create_categories(prefix, options['categories'])
+        attachments = self.create_attachment_files()
+        # A few users own most of the tasks, like real teams
+        user_weights = list(itertools.accumulate(1 / (rank + 1) ** options['skew'] for rank in range(len(users))))
+
+        created = 0
+        while created < options['tasks']:
+            size = min(options['batch_size'], options['tasks'] - created)
+            self.create_batch(size, users, user_weights, categories, attachments, options)
+            created += size
+            rate = created / (time.monotonic() - started)
+            self.stdout.write(f'{created} tasks ({rate:.0f}/s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users, {len(categories)} categories and {created} tasks; '
+            f'log in to the admin as {prefix}-admin with password {prefix}'
+        ))
+
+    def create_users(self, prefix, count):
+        password = make_password(prefix)
+        usernames = [f'{prefix}-user-{index:06d}' for index in range(count)]
+        User.objects.bulk_create(
+            [User(username=name, email=f'{name}@example.com', password=password) for name in usernames],
+            ignore_conflicts=True,
+        )
+        if not User.objects.filter(username=f'{prefix}-admin').exists():
+            User.objects.create_superuser(f'{prefix}-admin', f'{prefix}-admin@example.com', prefix)
+        ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+        return [ids[name] for name in usernames]
+
+    def create_categories(self, prefix, count):
+        names = [f'{prefix} category {index}' for index in range(count)]
+        Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+        return list(Category.objects.filter(name__in=names).values_list('pk', flat=True))
+
+    def create_attachment_files(self):
+        """Store a few sample blobs that generated attachments share"""
+        blobs = []
+        for index in range(SAMPLE_ATTACHMENTS):
+            content = ' '.join(WORDS).encode() * (index + 1) * 100
+            digest = hashlib.sha256(content).hexdigest()
+            blob = AttachmentBlob.objects.filter(sha256=digest).first()
+            if blob is None:
+                name = default_storage.save(blob_name(digest), ContentFile(content))
+                blob = AttachmentBlob.objects.create(sha256=digest, file=name, size=len(content))
+            blobs.append((blob.pk, blob.file.name, f'sample-{index}.txt'))
+        return blobs
+
+    def create_batch(self, size, users, user_weights, categories, attachments, options):
+        pick = self.random
+        tasks = []
+        for _ in range(size):
+            created_at = self.now - timedelta(seconds=pick.randrange(365 * 24 * 3600))
+            creator, assignee = pick.choices(users, cum_weights=user_weights, k=2)
+            status = pick.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+            due_date = created_at + timedelta(days=pick.randrange(1, 90)) if pick.random() < 0.7 else None
+            task = Task(
+                title=' '.join(pick.choices(WORDS, k=pick.randint(2, 6))).capitalize(),
+                description=' '.join(pick.choices(WORDS, k=pick.randint(0, 40))),
+                created_by_id=creator,
+                assigned_to_id=assignee if pick.random() < 0.8 else None,
+                category_id=pick.choice(categories) if categories and pick.random() < 0.9 else None,
+                priority=pick.choices(list(PRIORITY_WEIGHTS), weights=list(PRIORITY_WEIGHTS.values()))[0],
+                status=status,
+                due_date=due_date,
+                created_at=created_at,
+                updated_at=created_at,
+                last_activity_at=created_at,
+                completed_at=created_at + timedelta(days=pick.randrange(30)) if status == 'done' else None,
+            )
+            task.update_overdue(self.now)
+            tasks.append(task)
+
+        with transaction.atomic(), explicit_timestamps(Task, TaskComment):
+            Task.objects.bulk_create(tasks)
+            comments = []
+            for task in tasks:
+                authors = [task.created_by_id, task.assigned_to_id or task.created_by_id]
+                for _ in range(int(pick.expovariate(1 / options['comments'])) if options['comments'] else 0):
+                    created_at = task.created_at + timedelta(minutes=pick.randrange(60 * 24 * 30))
+                    comments.append(TaskComment(
+                        task_id=task.pk,
+                        author_id=pick.choice(authors),
+                        content=' '.join(pick.choices(WORDS, k=pick.randint(3, 30))),
+                        created_at=created_at,
+                        updated_at=created_at,
+                    ))
+            TaskComment.objects.bulk_create(comments)
+            TaskAttachment.objects.bulk_create([
+                TaskAttachment(
+                    task_id=task.pk,
+                    blob_id=blob_id,
+                    file=name,
+                    filename=filename,
+                    uploaded_by_id=task.created_by_id,
+                )
+                for task in tasks if attachments and pick.random() < options['attachments']
+                for blob_id, name, filename in [pick.choice(attachments)]
+            ])
+            # bulk_create sends no signals, so the counters are set from the rows
+            reconcile_task_activity(Task.objects.filter(pk__in=[task.pk for task in tasks]))
+            refresh_after_bulk_write([task.pk for task in tasks])
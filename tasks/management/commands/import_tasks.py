@@ -0,0 +1,176 @@
+import csv
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from tasks.categories import registry as category_registry
+from tasks.models import Task
+from tasks.serializers import TaskCreateSerializer, bulk_task_serializer
+from tasks.services import refresh_after_bulk_create
+
+FORMATS = ('csv', 'ndjson')
+FIELDS = ['title', 'description', 'status', 'priority', 'due_date']
+MAX_REPORTED_ERRORS = 100
+
+
+class Command(BaseCommand):
+    help = 'Import tasks from a CSV or JSON-lines file in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='File format (default: from the extension)')
+        parser.add_argument('--user', help='Username of the creator of rows without a created_by column')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: PATH.checkpoint)')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(f'Cannot tell the format of {path}; use --format')
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+
+        self.default_creator = None
+        if options['user']:
+            self.default_creator = User.objects.filter(username=options['user']).values_list('pk', flat=True).first()
+            if self.default_creator is None:
+                raise CommandError(f'Unknown user {options["user"]!r}')
+        # Name lookups, filled as names come up
+        self.user_ids = {}
+        self.category_ids = {category.name: category.pk for category in category_registry.all()}
+        self.imported = self.skipped = 0
+
+        done = 0 if options['restart'] else self.read_checkpoint()
+        if done:
+            self.stdout.write(f'Resuming after row {done}')
+        started = time.monotonic()
+        batch = []
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = csv.DictReader(file) if file_format == 'csv' else self.read_ndjson(file)
+            for number, row in enumerate(rows, start=1):
+                if number <= done:
+                    continue
+                batch.append((number, row))
+                if len(batch) >= options['batch_size']:
+                    self.import_batch(batch)
+                    self.report(batch[-1][0], started)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+                self.report(batch[-1][0], started)
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(f'Imported {self.imported} tasks, skipped {self.skipped} invalid rows'))
+
+    @staticmethod
+    def read_ndjson(file):
+        for line in file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+    def import_batch(self, batch):
+        """Validate a batch like the task API does and write it in one transaction"""
+        self.resolve_users(batch)
+        candidates = []
+        for number, row in batch:
+            item, creator, errors = self.prepare(row)
+            if errors:
+                self.report_error(number, errors)
+            else:
+                candidates.append((number, item, creator))
+
+        serializer = bulk_task_serializer(TaskCreateSerializer, [item for _, item, _ in candidates])
+        if not serializer.is_valid():
+            # Drop the invalid rows and validate the others again
+            valid = []
+            for candidate, errors in zip(candidates, serializer.errors):
+                if errors:
+                    self.report_error(candidate[0], errors)
+                else:
+                    valid.append(candidate)
+            candidates = valid
+            serializer = bulk_task_serializer(TaskCreateSerializer, [item for _, item, _ in candidates])
+            serializer.is_valid(raise_exception=True)
+
+        tasks = []
+        for (_, _, creator), attrs in zip(candidates, serializer.validated_data):
+            task = Task(created_by_id=creator, **attrs)
+            task.update_overdue()
+            tasks.append(task)
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            refresh_after_bulk_create(tasks)
+        self.imported += len(tasks)
+        self.write_checkpoint(batch[-1][0])
+
+    def resolve_users(self, batch):
+        names = {
+            row.get(column) for _, row in batch if isinstance(row, dict)
+            for column in ('created_by', 'assigned_to')
+        } - set(self.user_ids) - {None, ''}
+        if names:
+            self.user_ids.update(User.objects.filter(username__in=names).values_list('username', 'pk'))
+
+    def prepare(self, row):
+        """Map a file row to TaskCreateSerializer input, resolving names to ids"""
+        if not isinstance(row, dict):
+            return {}, None, {'row': ['Expected an object.']}
+        item = {name: row[name] for name in FIELDS if row.get(name) not in (None, '')}
+        errors = {}
+
+        creator = self.default_creator
+        if row.get('created_by'):
+            creator = self.user_ids.get(row['created_by'])
+            if creator is None:
+                errors['created_by'] = [f'Unknown user {row["created_by"]!r}.']
+        elif creator is None:
+            errors['created_by'] = ['This field is required without --user.']
+
+        if row.get('assigned_to'):
+            item['assigned_to'] = self.user_ids.get(row['assigned_to'])
+            if item['assigned_to'] is None:
+                errors['assigned_to'] = [f'Unknown user {row["assigned_to"]!r}.']
+        if row.get('category'):
+            item['category'] = self.category_ids.get(row['category'])
+            if item['category'] is None:
+                errors['category'] = [f'Unknown category {row["category"]!r}.']
+        return item, creator, errors
+
+    def report_error(self, number, errors):
+        self.skipped += 1
+        if self.skipped <= MAX_REPORTED_ERRORS:
+            messages = '; '.join(f'{field}: {" ".join(map(str, problems))}' for field, problems in errors.items())
+            self.stderr.write(f'Row {number}: {messages}')
+        elif self.skipped == MAX_REPORTED_ERRORS + 1:
+            self.stderr.write('Further invalid rows are counted but not listed')
+
+    def report(self, number, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Row {number}: {self.imported} imported, {self.skipped} skipped '
+            f'({self.imported / elapsed if elapsed else 0:.0f} tasks/s)'
+        )
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                return json.load(file)['rows']
+        except FileNotFoundError:
+            return 0
+        except (ValueError, KeyError, TypeError):
+            raise CommandError(f'Unreadable checkpoint {self.checkpoint_path}; use --restart')
+
+    def write_checkpoint(self, rows):
+        """Record the rows that are committed, replacing the file atomically"""
+        temporary = f'{self.checkpoint_path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'rows': rows}, file)
+        os.replace(temporary, self.checkpoint_path)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from tasks.models import Task
+from tasks.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of tasks and their comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        backend.install()
+        batch_size = options['batch_size']
+        task_ids = Task.objects.using(options['database']).order_by('pk').values_list('pk', flat=True)
+        batch = []
+        total = 0
+        for task_id in task_ids.iterator(chunk_size=batch_size):
+            batch.append(task_id)
+            if len(batch) >= batch_size:
+                backend.index_tasks(batch)
+                total += len(batch)
+                batch = []
+        backend.index_tasks(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} tasks'))
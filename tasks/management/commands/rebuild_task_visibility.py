@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from tasks.models import Task
+from tasks.services import sync_task_visibility
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized task visibility table from the tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        tasks = Task.objects.only('id', 'created_by', 'assigned_to', 'status', 'created_at').order_by('pk')
+        batch = []
+        total = 0
+        for task in tasks.iterator(chunk_size=batch_size):
+            batch.append(task)
+            if len(batch) >= batch_size:
+                sync_task_visibility(batch)
+                total += len(batch)
+                batch = []
+        sync_task_visibility(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt visibility for {total} tasks'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from tasks.models import Task
+from tasks.services import reconcile_task_activity
+
+
+class Command(BaseCommand):
+    help = 'Recount the comments and attachments of every task, repairing counters that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Task.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        repaired = 0
+        if bounds['first'] is not None:
+            # Batches are primary key ranges, so each one is an index range scan
+            for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+                repaired += reconcile_task_activity(Task.objects.filter(pk__gte=start, pk__lt=start + batch_size))
+        self.stdout.write(self.style.SUCCESS(f'Repaired the counters of {repaired} tasks'))
@@ -0,0 +1,220 @@
+import itertools
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from tasks.caching import cache
+from tasks.models import Category, Task, TaskComment
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Time the task views and API endpoints and compare them against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to benchmark as (default: the user seeing most tasks)')
+        parser.add_argument('--admin-user', help='Staff username for the admin changelist (default: first superuser)')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--max-filters', type=int, default=2,
+            help='Benchmark the task list with every combination of up to this many of its 7 filters '
+                 '(default: %(default)s; 7 runs all of them)',
+        )
+        parser.add_argument('--clear-cache', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--only', help='Only run scenarios whose name contains this text')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p50 slowdown before flagging')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error on regressions')
+
+    def handle(self, *args, **options):
+        self.options = options
+        user = self.get_user(options['user'])
+        admin = self.get_admin(options['admin_user'])
+        host = next((name for name in settings.ALLOWED_HOSTS if name not in ('*', '') and not name.startswith('.')),
+                    'localhost')
+        client = Client(raise_request_exception=False, HTTP_HOST=host)
+        client.force_login(user)
+        admin_client = None
+        if admin is not None:
+            admin_client = Client(raise_request_exception=False, HTTP_HOST=host)
+            admin_client.force_login(admin)
+
+        results = {}
+        for name, path, scenario_client in self.get_scenarios(user, client, admin_client):
+            if options['only'] and options['only'] not in name:
+                continue
+            results[name] = self.measure(scenario_client, path)
+            self.write_result(name, results[name])
+
+        baseline = self.load_baseline(options['baseline'])
+        regressions = self.compare(baseline['results'], results) if baseline else []
+
+        if options['save']:
+            path = Path(options['baseline'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps({'meta': self.get_meta(user), 'results': results}, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline to {path}'))
+        if regressions and options['fail']:
+            raise CommandError(f'{len(regressions)} scenarios regressed')
+
+    def get_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            top = Task.objects.values('visibility__user').annotate(n=Count('id')).order_by('-n').first()
+            user = User.objects.filter(pk=top['visibility__user']).first() if top else None
+        if user is None:
+            raise CommandError('No user to benchmark as; generate data with generate_load_data first')
+        return user
+
+    def get_admin(self, username):
+        admins = User.objects.filter(is_staff=True, is_active=True)
+        admin = admins.filter(username=username).first() if username else admins.filter(is_superuser=True).first()
+        if admin is None:
+            self.stdout.write(self.style.WARNING('No staff user, skipping the admin changelist'))
+        return admin
+
+    def get_scenarios(self, user, client, admin_client):
+        """Yield (name, path, client) for every page and endpoint benchmarked"""
+        visible = Task.objects.visible_to(user)
+        task = visible.order_by('-comment_count', '-id').first()
+        category = Category.objects.order_by('pk').first()
+        comment = TaskComment.objects.visible_to(user).order_by('-id').first()
+        assignee = visible.exclude(assigned_to=None).values_list('assigned_to', flat=True).first()
+        today = timezone.localdate()
+
+        yield 'dashboard', '/', client
+
+        filters = {
+            'status': 'todo',
+            'priority': 'high',
+            'category': category.pk if category else None,
+            'assigned_to': assignee,
+            'due_date_from': today.isoformat(),
+            'due_date_to': (today + timezone.timedelta(days=30)).isoformat(),
+            'search': task.title.split()[0] if task else None,
+        }
+        filters = {name: value for name, value in filters.items() if value is not None}
+        for size in range(self.options['max_filters'] + 1):
+            for names in itertools.combinations(filters, size):
+                query = '&'.join(f'{name}={filters[name]}' for name in names)
+                yield f'task list {"+".join(names) or "unfiltered"}', f'/tasks/?{query}', client
+        yield 'task list by activity', '/tasks/?ordering=activity', client
+
+        if task is not None:
+            yield 'task detail', f'/tasks/{task.pk}/', client
+            yield 'api task detail', f'/api/tasks/{task.pk}/', client
+            yield 'api async task detail', f'/api/async/tasks/{task.pk}/', client
+            yield 'task comments page', f'/tasks/{task.pk}/comments/', client
+            yield 'api task comments', f'/api/tasks/{task.pk}/comments/', client
+            yield 'api task comments newest', f'/api/tasks/{task.pk}/comments/?ordering=newest', client
+        yield 'api task list', '/api/tasks/', client
+        yield 'api task list expanded', '/api/tasks/?expand=created_by,assigned_to,category', client
+        yield 'api task list count', '/api/tasks/?count=exact', client
+        yield 'api task list by activity', '/api/tasks/?ordering=activity', client
+        yield 'api task list by comments', '/api/tasks/?ordering=comments', client
+        yield 'api async task list', '/api/async/tasks/', client
+        yield 'api async dashboard', '/api/async/dashboard/', client
+        yield 'api category list', '/api/categories/', client
+        if category is not None:
+            yield 'api category detail', f'/api/categories/{category.pk}/', client
+        yield 'api comment list', '/api/comments/', client
+        if comment is not None:
+            yield 'api comment detail', f'/api/comments/{comment.pk}/', client
+        if admin_client is not None:
+            yield 'admin task changelist', '/admin/tasks/task/', admin_client
+            yield 'admin task changelist filtered', '/admin/tasks/task/?status__exact=todo', admin_client
+
+    def measure(self, client, path):
+        timings, queries, statuses = [], [], set()
+        for iteration in range(self.options['warmup'] + self.options['iterations']):
+            if self.options['clear_cache']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(path)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            if iteration >= self.options['warmup']:
+                timings.append(elapsed * 1000)
+                queries.append(len(captured))
+                statuses.add(response.status_code)
+        return {
+            'path': path,
+            'p50': round(percentile(timings, 0.5), 2),
+            'p90': round(percentile(timings, 0.9), 2),
+            'p99': round(percentile(timings, 0.99), 2),
+            'mean': round(statistics.fmean(timings), 2),
+            'queries': max(queries),
+            'status': sorted(statuses),
+        }
+
+    def write_result(self, name, result):
+        line = (
+            f'{name:<48} p50 {result["p50"]:>8.2f}ms  p90 {result["p90"]:>8.2f}ms  '
+            f'p99 {result["p99"]:>8.2f}ms  {result["queries"]:>3} queries'
+        )
+        if any(status >= 400 for status in result['status']):
+            line += f'  status {result["status"]}'
+            self.stdout.write(self.style.WARNING(line))
+        else:
+            self.stdout.write(line)
+
+    def load_baseline(self, path):
+        try:
+            return json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            raise CommandError(f'Unreadable baseline {path}')
+
+    def compare(self, baseline, results):
+        """Report scenarios slower or running more queries than in the baseline"""
+        regressions = []
+        self.stdout.write('\nCompared with the baseline:')
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            ratio = result['p50'] / before['p50'] if before['p50'] else 1
+            problems = []
+            if ratio > 1 + self.options['tolerance']:
+                problems.append(f'p50 {before["p50"]:.2f} -> {result["p50"]:.2f}ms')
+            if result['queries'] > before['queries']:
+                problems.append(f'queries {before["queries"]} -> {result["queries"]}')
+            if problems:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'REGRESSION  {name}: {", ".join(problems)}'))
+            else:
+                self.stdout.write(f'ok          {name}: p50 x{ratio:.2f}')
+        return regressions
+
+    def get_meta(self, user):
+        return {
+            'recorded_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'user': user.username,
+            'tasks': Task.objects.count(),
+            'visible_tasks': Task.objects.visible_to(user).count(),
+            'comments': TaskComment.objects.count(),
+            'iterations': self.options['iterations'],
+            'clear_cache': self.options['clear_cache'],
+        }
@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tasks.jobs import claim_jobs, requeue_lost_jobs, run_job
+from tasks.scheduler import init_worker_process
+
+# Seconds between checks for jobs lost with their worker
+REQUEUE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an idle queue')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        processes = options['processes']
+        pool = self.create_pool(processes)
+        self.stdout.write(f'Running jobs in {processes} processes')
+        running = set()
+        requeued_at = 0
+        try:
+            while not self.stopping:
+                if time.monotonic() - requeued_at > REQUEUE_INTERVAL:
+                    requeue_lost_jobs()
+                    requeued_at = time.monotonic()
+                claimed = claim_jobs(processes - len(running)) if len(running) < processes else []
+                close_old_connections()
+                running.update(pool.submit(run_job, pk) for pk in claimed)
+                if not claimed and not running and options['burst']:
+                    break
+                if running:
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    # run_job records job failures, so these are dead worker processes. Their
+                    # jobs are queued again once TASKS_JOB_TIMEOUT has passed.
+                    errors = [future.exception() for future in done if future.exception() is not None]
+                    if errors:
+                        self.stderr.write(f'Worker process failed: {errors[0]!r}')
+                    if any(isinstance(error, BrokenProcessPool) for error in errors):
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        running = set()
+                        pool = self.create_pool(processes)
+                elif not claimed:
+                    time.sleep(options['poll_interval'])
+        finally:
+            if running:
+                self.stdout.write(f'Waiting for {len(running)} running jobs')
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def create_pool(self, processes):
+        # Spawned workers set Django up afresh instead of sharing the
+        # parent's database connections
+        return ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker_process
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
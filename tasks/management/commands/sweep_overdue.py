@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from tasks.services import sweep_overdue_tasks
+
+
+class Command(BaseCommand):
+    help = 'Flag open tasks whose due date has passed since the last sweep'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep sweeping every INTERVAL seconds instead of running once',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flagged = sweep_overdue_tasks()
+            self.stdout.write(self.style.SUCCESS(f'Flagged {flagged} overdue tasks'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,233 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in seconds and in queries
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Timings of the request being handled, when it is sampled
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Database and template time spent by one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.queries = Counter()
+        self._rendering = 0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        """Queries that repeat an earlier one with the same parameters"""
+        return sum(count - 1 for count in self.queries.values())
+
+    def server_timing(self, total):
+        return (
+            f'total;dur={total * 1000:.1f}, '
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries, {self.duplicate_count} duplicates", '
+            f'tpl;dur={self.template_time * 1000:.1f}'
+        )
+
+
+def start_request():
+    """Start timing the current request; returns a token for :func:`finish_request`"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper adding query time to the sampled request"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.queries[sql, repr(params)] += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """Wrap every connection, so queries run from sync_to_async threads count too"""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None or timings._rendering:
+            return super().render(context, request)
+        timings._rendering += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings._rendering -= 1
+            timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend reporting render time to the metrics middleware"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class Histogram:
+    """Cumulative bucket counts, plus a window reset by every log summary"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.window_counts = [0] * (len(buckets) + 1)
+        self.window_total = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        self.counts[index] += 1
+        self.total += value
+        self.window_counts[index] += 1
+        self.window_total += value
+
+    def reset_window(self):
+        self.window_counts = [0] * len(self.window_counts)
+        self.window_total = 0
+
+    def quantile(self, fraction):
+        """Estimate a quantile of the window by interpolating within its bucket"""
+        count = sum(self.window_counts)
+        if not count:
+            return None
+        rank = fraction * count
+        seen = 0
+        for index, bucket_count in enumerate(self.window_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index else 0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class EndpointMetrics:
+
+    def __init__(self):
+        self.wall = Histogram(DURATION_BUCKETS)
+        self.db = Histogram(DURATION_BUCKETS)
+        self.template = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.duplicates = 0
+        self.window_duplicates = 0
+
+
+class MetricsRegistry:
+    """Per-process request metrics keyed by resolved URL name.
+
+    Every worker process keeps its own numbers, so scrape each worker
+    separately or read the logged summaries.
+    """
+    # (metric name, EndpointMetrics attribute, help text) of the histograms
+    HISTOGRAMS = [
+        ('tasks_request_duration_seconds', 'wall', 'Wall time of sampled requests'),
+        ('tasks_request_db_seconds', 'db', 'Database time of sampled requests'),
+        ('tasks_request_template_seconds', 'template', 'Template render time of sampled requests'),
+        ('tasks_request_queries', 'queries', 'Queries run by sampled requests'),
+    ]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, wall, timings):
+        with self._lock:
+            metrics = self.endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self.endpoints[endpoint] = EndpointMetrics()
+            metrics.wall.observe(wall)
+            metrics.db.observe(timings.db_time)
+            metrics.template.observe(timings.template_time)
+            metrics.queries.observe(timings.query_count)
+            metrics.duplicates += timings.duplicate_count
+            metrics.window_duplicates += timings.duplicate_count
+
+    def render_prometheus(self, sample_rate):
+        """Return the metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP tasks_metrics_sample_rate Share of requests that are timed',
+            '# TYPE tasks_metrics_sample_rate gauge',
+            f'tasks_metrics_sample_rate {sample_rate}',
+        ]
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            for name, attribute, description in self.HISTOGRAMS:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for endpoint, metrics in endpoints:
+                    histogram = getattr(metrics, attribute)
+                    label = _escape_label(endpoint)
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{endpoint="{label}"}} {histogram.total}')
+                    lines.append(f'{name}_count{{endpoint="{label}"}} {cumulative}')
+            lines += [
+                '# HELP tasks_request_duplicate_queries_total Repeated identical queries in sampled requests',
+                '# TYPE tasks_request_duplicate_queries_total counter',
+            ]
+            lines += [
+                f'tasks_request_duplicate_queries_total{{endpoint="{_escape_label(endpoint)}"}} {metrics.duplicates}'
+                for endpoint, metrics in endpoints
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def log_summary(self):
+        """Log the endpoints requested since the last summary and start a new window"""
+        with self._lock:
+            for endpoint, metrics in sorted(self.endpoints.items()):
+                count = sum(metrics.wall.window_counts)
+                if not count:
+                    continue
+                logger.info(
+                    '%s: %d sampled, p50 %.0fms, p95 %.0fms, db %.1fms, %.1f queries (%d duplicate) per request',
+                    endpoint, count,
+                    metrics.wall.quantile(0.5) * 1000, metrics.wall.quantile(0.95) * 1000,
+                    metrics.db.window_total / count * 1000, metrics.queries.window_total / count,
+                    metrics.window_duplicates,
+                )
+                for histogram in (metrics.wall, metrics.db, metrics.template, metrics.queries):
+                    histogram.reset_window()
+                metrics.window_duplicates = 0
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
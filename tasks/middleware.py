@@ -0,0 +1,136 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from allauth.account.middleware import AccountMiddleware as BaseAccountMiddleware
+from allauth.core import context
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from . import metrics, querycheck
+
+
+class AccountMiddleware(BaseAccountMiddleware):
+    """allauth's account middleware, able to run natively under ASGI.
+
+    The stock middleware is sync only, which makes Django run every
+    request through a thread even when the view is async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        with context.request_context(request):
+            response = await self.get_response(request)
+            # Reads the session, which may hit the database
+            await sync_to_async(self._remove_dangling_login)(request, response)
+            return response
+
+
+class RequestMetricsMiddleware:
+    """Times a sample of requests per resolved URL name.
+
+    Sampled responses get a ``Server-Timing`` header with the wall,
+    database and template time, and feed the histograms served by the
+    metrics endpoint. ``TASKS_METRICS_SAMPLE_RATE`` sets the share of
+    requests timed; the others only cost a random draw. The time spent
+    streaming a response body is not included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'TASKS_METRICS_SAMPLE_RATE', 0)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timings, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        timings, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        wall = time.perf_counter() - timings.started
+        match = request.resolver_match
+        metrics.registry.record(match.view_name if match else '<unresolved>', wall, timings)
+        response['Server-Timing'] = timings.server_timing(wall)
+        return response
+
+
+class QueryCheckMiddleware:
+    """Checks a sample of requests for N+1 queries and slow queries.
+
+    Problems point at the project code and template line that ran the
+    queries. They raise ``QueryProblem`` when ``TASKS_QUERY_CHECK_RAISE``
+    is on (under the test runner by default) and are logged otherwise.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'TASKS_QUERY_CHECK_SAMPLE_RATE', 0)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        check, token = querycheck.start_check()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            querycheck.finish_check(check, token, self.label(request), raise_errors=False)
+            raise
+        querycheck.finish_check(check, token, self.label(request))
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        check, token = querycheck.start_check()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            querycheck.finish_check(check, token, self.label(request), raise_errors=False)
+            raise
+        querycheck.finish_check(check, token, self.label(request))
+        return response
+
+    @staticmethod
+    def label(request):
+        match = request.resolver_match
+        return f'{match.view_name if match else "<unresolved>"} ({request.method} {request.get_full_path()})'
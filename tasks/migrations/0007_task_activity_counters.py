@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:36
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+import django.utils.timezone
+
+
+def count_activity(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+
+    def aggregate(model_name, value, output_field):
+        rows = apps.get_model('tasks', model_name).objects.filter(task=OuterRef('pk')).order_by()
+        return Subquery(rows.values('task').annotate(value=value).values('value'), output_field=output_field)
+
+    Task.objects.using(schema_editor.connection.alias).update(
+        comment_count=Coalesce(aggregate('TaskComment', Count('id'), IntegerField()), 0),
+        attachment_count=Coalesce(aggregate('TaskAttachment', Count('id'), IntegerField()), 0),
+        last_activity_at=Greatest(
+            F('created_at'),
+            Coalesce(aggregate('TaskComment', Max('created_at'), models.DateTimeField()), F('created_at')),
+            Coalesce(aggregate('TaskAttachment', Max('uploaded_at'), models.DateTimeField()), F('created_at')),
+        ),
+    )
+    # Listings ordered by activity read the copies on the visibility rows
+    tasks = Task.objects.filter(pk=OuterRef('task_id'))
+    apps.get_model('tasks', 'TaskVisibility').objects.using(schema_editor.connection.alias).update(
+        last_activity_at=Subquery(tasks.values('last_activity_at')),
+        comment_count=Subquery(tasks.values('comment_count')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_derivedasset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='attachment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='last_activity_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='taskvisibility',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskvisibility',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(count_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='task_activity_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-comment_count', '-id'], name='task_comment_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskvisibility',
+            index=models.Index(fields=['user', '-last_activity_at', '-task'], name='task_visibility_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskvisibility',
+            index=models.Index(fields=['user', '-comment_count', '-task'], name='task_visibility_comments_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='taskvisibility',
+            name='task_visibility_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='taskvisibility',
+            name='task_visibility_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='taskvisibility',
+            index=models.Index(fields=['user', 'status', '-created_at', '-task'], name='task_visibility_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskvisibility',
+            index=models.Index(fields=['user', '-created_at', '-task'], name='task_visibility_recent_idx'),
+        ),
+    ]
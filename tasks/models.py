@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -19,7 +21,42 @@ class Category(models.Model):
         return self.name
     
     def get_absolute_url(self):
-        return reverse('category_detail', kwargs={'pk': self.pk})
+        return reverse('tasks:category_detail', kwargs={'pk': self.pk})
+
+
+class TaskQuerySet(models.QuerySet):
+    """QuerySet for tasks"""
+    
+    def visible_to(self, user, status=None):
+        """Tasks created by or assigned to the user.
+
+        Goes through the denormalized ``TaskVisibility`` table so that the
+        lookup is a single index range scan instead of an OR over two
+        foreign keys. The status filter is applied on the same join so it
+        can use the (user, status, created_at) index.
+        """
+        lookups = {'visibility__user': user}
+        if status:
+            lookups['visibility__status'] = status
+        return self.filter(**lookups)
+    
+    def with_visibility_keys(self):
+        """Annotate tasks filtered by ``visible_to`` with the sort keys of their visibility row.
+        
+        The annotations reuse the visibility join, so listings ordered on
+        them read a (user, ..., task) index in order and stop after a page
+        instead of sorting every task the user can see.
+        """
+        return self.annotate(
+            visible_created_at=models.F('visibility__created_at'),
+            visible_last_activity_at=models.F('visibility__last_activity_at'),
+            visible_comment_count=models.F('visibility__comment_count'),
+            visible_task_id=models.F('visibility__task_id'),
+        )
+    
+    def overdue(self):
+        """Open tasks past their due date, as flagged by the overdue sweeper"""
+        return self.filter(overdue_since__isnull=False)
 
 
 class Task(models.Model):
@@ -49,26 +86,105 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Due date of open tasks that are past it; kept up to date on save and
+    # by the overdue sweeper as due dates pass
+    overdue_since = models.DateTimeField(null=True, blank=True, editable=False)
+    # Maintained with F() updates as comments and attachments come and go,
+    # see tasks.services.record_task_activity
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    attachment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Filled on insert after created_at, so a new task never predates its creation
+    last_activity_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = TaskQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['-created_at', '-id'], name='task_created_keyset_idx'),
+            # Filtered listings, newest first
+            models.Index(fields=['status', '-created_at', '-id'], name='task_status_created_idx'),
+            models.Index(fields=['priority', '-created_at', '-id'], name='task_priority_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='task_category_created_idx'),
+            # Most active tasks first
+            models.Index(fields=['-last_activity_at', '-id'], name='task_activity_keyset_idx'),
+            models.Index(fields=['-comment_count', '-id'], name='task_comment_count_idx'),
+            # Overdue lookups only ever look at open tasks
+            models.Index(
+                fields=['due_date'], name='task_open_due_date_idx', condition=~models.Q(status='done'),
+            ),
+            models.Index(
+                fields=['-overdue_since'], name='task_overdue_since_idx',
+                condition=models.Q(overdue_since__isnull=False),
+            ),
+        ]
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the values loaded from the database so that signal
+        # handlers can tell what changed on save
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        deferred = set() if self._state.adding else self.get_deferred_fields()
+        if update_fields is None and deferred:
+            # What Model.save() writes anyway, named here so that the overdue
+            # flag does not load a deferred due date or status
+            kwargs['update_fields'] = update_fields = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        if update_fields is None or {'due_date', 'status'} & set(update_fields):
+            self.update_overdue()
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'overdue_since'}
+        super().save(*args, **kwargs)
+        loaded_values = getattr(self, '_loaded_values', {})
+        loaded_values.update({
+            field.attname: self.__dict__.get(field.attname, models.DEFERRED)
+            for field in self._meta.concrete_fields
+            if update_fields is None or field.name in update_fields or field.attname in update_fields
+        })
+        self._loaded_values = loaded_values
+    
+    def get_loaded_value(self, attname):
+        """Return the value of a field as it was loaded from the database"""
+        value = getattr(self, '_loaded_values', {}).get(attname)
+        return None if value is models.DEFERRED else value
+    
     def get_absolute_url(self):
-        return reverse('task_detail', kwargs={'pk': self.pk})
+        return reverse('tasks:task_detail', kwargs={'pk': self.pk})
     
     def is_overdue(self):
-        if self.due_date and self.status != 'done':
-            return timezone.now() > self.due_date
-        return False
+        return self.overdue_since is not None
+    
+    def update_overdue(self, now=None):
+        """Set ``overdue_since`` from the due date and status, without saving"""
+        overdue = (
+            self.due_date is not None
+            and self.status != 'done'
+            and self.due_date <= (now or timezone.now())
+        )
+        self.overdue_since = self.due_date if overdue else None
+    
+    def set_status(self, status):
+        """Move the task to another status, writing only the affected columns"""
+        if status == self.status:
+            return False
+        self.status = status
+        self.completed_at = timezone.now() if status == 'done' else None
+        self.save(update_fields=['status', 'completed_at', 'updated_at'])
+        return True
     
     def mark_completed(self):
-        if self.status != 'done':
-            self.status = 'done'
-            self.completed_at = timezone.now()
-            self.save()
+        return self.set_status('done')
     
     def get_priority_color(self):
         colors = {
@@ -80,6 +196,40 @@ class Task(models.Model):
         return colors.get(self.priority, 'secondary')
 
 
+class TaskVisibility(models.Model):
+    """Denormalized membership of users in the tasks they can see"""
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='visibility')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='visible_tasks')
+    status = models.CharField(max_length=15, choices=Task.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    # Copies of the task's activity, kept in step by record_task_activity
+    last_activity_at = models.DateTimeField()
+    comment_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = "Task visibility"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task'], name='unique_task_visibility'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'status', '-created_at', '-task'], name='task_visibility_status_idx'),
+            models.Index(fields=['user', '-created_at', '-task'], name='task_visibility_recent_idx'),
+            models.Index(fields=['user', '-last_activity_at', '-task'], name='task_visibility_activity_idx'),
+            models.Index(fields=['user', '-comment_count', '-task'], name='task_visibility_comments_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.user_id} can see {self.task_id}'
+
+
+class TaskCommentQuerySet(models.QuerySet):
+    """QuerySet for task comments"""
+    
+    def visible_to(self, user):
+        """Comments on tasks created by or assigned to the user"""
+        return self.filter(task__visibility__user=user)
+
+
 class TaskComment(models.Model):
     """Model for task comments"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments')
@@ -88,20 +238,117 @@ class TaskComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TaskCommentQuerySet.as_manager()
+    
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['created_at', 'id'], name='comment_created_keyset_idx'),
+            # Comment threads, read in either direction
+            models.Index(fields=['task', 'created_at', 'id'], name='comment_thread_idx'),
+        ]
     
     def __str__(self):
         return f'Comment by {self.author.username} on {self.task.title}'
 
 
+class AttachmentBlob(models.Model):
+    """Attachment content, stored once per SHA-256 and shared by attachments"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='attachment_blobs/')
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.sha256
+
+
+class DerivedAsset(models.Model):
+    """A file rendered from an attachment blob, such as a thumbnail"""
+    # Hash of the source content and the rendering parameters
+    key = models.CharField(max_length=64, unique=True)
+    source = models.ForeignKey(AttachmentBlob, on_delete=models.CASCADE, related_name='derived_assets')
+    file = models.FileField(upload_to='derived/')
+    size = models.BigIntegerField()
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Updated at most hourly; the least recently used assets are evicted first
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return self.key
+
+
 class TaskAttachment(models.Model):
     """Model for task attachments"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments')
+    # Uploaded attachments point at their blob's file
     file = models.FileField(upload_to='task_attachments/')
+    blob = models.ForeignKey(
+        AttachmentBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='attachments'
+    )
     filename = models.CharField(max_length=255)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return self.filename 
\ No newline at end of file
+        return self.filename
+
+
+class UploadSession(models.Model):
+    """A resumable attachment upload, received in chunks"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='upload_sessions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # Bytes received so far; the next chunk has to start here
+    offset = models.BigIntegerField(default=0)
+    # Digest announced by the client, checked once the upload is complete
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size} bytes)'
+
+
+class Job(models.Model):
+    """A background job, run by the run_workers command"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+    
+    # Registered name of the job function, see tasks.jobs
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            # Due jobs, in the order workers claim them
+            models.Index(fields=['status', 'run_at'], name='job_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class Watermark(models.Model):
+    """How far a periodic job has got, shared by every process running it"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField()
+    
+    def __str__(self):
+        return f'{self.name} at {self.value}'
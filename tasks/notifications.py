@@ -0,0 +1,72 @@
+"""Notification emails, rendered and sent by background jobs.
+
+Each fan-out job enqueues one :func:`send_email` job per recipient, so a
+failing address only retries its own message.
+"""
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+from django.urls import reverse
+from .jobs import enqueue, job
+from .models import Task, TaskComment
+
+
+@job()
+def send_email(subject, body, to, from_email=None, html=None, headers=None):
+    message = EmailMultiAlternatives(subject, body, from_email, to, headers=headers)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
+
+
+def render_email(template_prefix, user, context):
+    """Render the subject and body of an email to ``user``"""
+    context = {**context, 'user': user}
+    subject = render_to_string(f'{template_prefix}_subject.txt', context)
+    return ' '.join(subject.splitlines()).strip(), render_to_string(f'{template_prefix}_message.txt', context)
+
+
+def task_url(task_id):
+    protocol = getattr(settings, 'ACCOUNT_DEFAULT_HTTP_PROTOCOL', 'http')
+    return f'{protocol}://{Site.objects.get_current().domain}{reverse("tasks:task_detail", args=[task_id])}'
+
+
+@job()
+def notify_assignees(task_ids, actor_id):
+    """Email the assignees of the tasks, except the user who assigned them"""
+    tasks = Task.objects.filter(
+        pk__in=task_ids, assigned_to__isnull=False
+    ).exclude(assigned_to=actor_id).exclude(assigned_to__email='').select_related('created_by', 'assigned_to')
+    for task in tasks:
+        subject, body = render_email(
+            'tasks/email/task_assigned', task.assigned_to, {'task': task, 'task_url': task_url(task.pk)}
+        )
+        enqueue(send_email, subject, body, [task.assigned_to.email])
+
+
+@job()
+def notify_comment(comment_id):
+    """Email the creator and assignee of the task, except the comment's author"""
+    comment = TaskComment.objects.select_related(
+        'author', 'task__created_by', 'task__assigned_to'
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    task = comment.task
+    recipients = {
+        user.pk: user for user in (task.created_by, task.assigned_to)
+        if user is not None and user.pk != comment.author_id and user.email
+    }
+    for user in recipients.values():
+        subject, body = render_email(
+            'tasks/email/comment_added', user, {'task': task, 'comment': comment, 'task_url': task_url(task.pk)}
+        )
+        enqueue(send_email, subject, body, [user.email])
+
+
+def queue_assignment_emails(tasks, actor):
+    """Queue emails for the tasks assigned to someone other than ``actor``"""
+    task_ids = [task.pk for task in tasks if task.assigned_to_id not in (None, actor.pk)]
+    if task_ids:
+        enqueue(notify_assignees, task_ids, actor.pk)
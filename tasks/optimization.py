@@ -0,0 +1,142 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when an API endpoint runs more queries than its budget"""
+
+
+def optimize_queryset(queryset, serializer):
+    """Shape a queryset after the fields a serializer is going to read.
+
+    Nested serializers on forward relations become ``select_related``
+    joins, nested serializers on reverse and many-to-many relations become
+    ``Prefetch`` objects whose inner querysets are optimized the same way,
+    and the selected columns are pruned with ``only()``.
+
+    Fields whose source is not a model field (properties, methods) can
+    declare the columns they read in ``Meta.field_dependencies``. If a
+    serializer reads an attribute without declaring it, column pruning is
+    skipped so that no deferred field is ever loaded row by row. Fields
+    computed in SQL are declared in ``Meta.annotations`` and only
+    annotated when the serializer actually renders them.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    annotations = getattr(getattr(serializer, 'Meta', None), 'annotations', {})
+    queryset = queryset.annotate(**{
+        name: expression for name, expression in annotations.items()
+        if name in serializer.fields
+    })
+
+    select_related, prefetch_related, only = _collect(serializer, queryset.model)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if only is not None:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def _collect(serializer, model, prefix=''):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    select_related = []
+    prefetch_related = []
+    only = {prefix + model._meta.pk.name}
+    prune = True
+    dependencies = getattr(getattr(serializer, 'Meta', None), 'field_dependencies', {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in dependencies:
+            only.update(prefix + column for column in dependencies[name])
+            continue
+        if field.source == '*':
+            prune = False
+            continue
+
+        attr = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            prune = False
+            continue
+
+        path = prefix + model_field.name
+        if not model_field.is_relation:
+            only.add(path)
+        elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            only.add(path)
+            if '.' in field.source and not isinstance(field, serializers.BaseSerializer):
+                # A field reading through the relation, e.g. source='blob.size'
+                select_related.append(path)
+            if isinstance(field, serializers.BaseSerializer):
+                select_related.append(path)
+                nested_select, nested_prefetch, nested_only = _collect(
+                    field, model_field.related_model, path + '__'
+                )
+                select_related.extend(nested_select)
+                prefetch_related.extend(nested_prefetch)
+                if nested_only is None:
+                    prune = False
+                else:
+                    only.update(nested_only)
+        else:
+            # Reverse foreign keys and many-to-many relations
+            related_model = model_field.related_model
+            inner = related_model._default_manager.all()
+            if isinstance(field, serializers.BaseSerializer):
+                inner_select, inner_prefetch, inner_only = _collect(field, related_model)
+                inner = inner.select_related(*inner_select).prefetch_related(*inner_prefetch)
+                if inner_only is not None:
+                    if model_field.one_to_many:
+                        # The foreign key back to the parent is needed to match rows
+                        inner_only.add(model_field.field.name)
+                    inner = inner.only(*inner_only)
+            prefetch_related.append(Prefetch(path, queryset=inner))
+
+    return select_related, prefetch_related, (only if prune else None)
+
+
+class OptimizedQuerySetMixin:
+    """Viewset mixin building querysets from the serializer's nested fields.
+
+    ``query_budgets`` maps viewset actions to the maximum number of queries
+    a request may run. Budgets are checked when the
+    ``ENFORCE_QUERY_BUDGETS`` setting is on (in DEBUG and under the test
+    runner by default). Requests over budget raise when
+    ``QUERY_BUDGETS_RAISE`` is on (under the test runner by default), so
+    N+1 regressions fail tests, and are logged otherwise.
+    """
+    query_budgets = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return optimize_queryset(queryset, self.get_serializer())
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(settings, 'ENFORCE_QUERY_BUDGETS', False):
+            return super().dispatch(request, *args, **kwargs)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = super().dispatch(request, *args, **kwargs)
+        budget = self.query_budgets.get(getattr(self, 'action', None))
+        if budget is not None and len(queries) > budget:
+            message = f'{self.__class__.__name__}.{self.action} ran {len(queries)} queries, budget is {budget}'
+            if getattr(settings, 'QUERY_BUDGETS_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,252 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(Exception):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class KeysetPage:
+    """A page of results with cursors pointing to its neighbours"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginates a queryset by seeking on a unique ordering key.
+
+    Each page is fetched with a ``WHERE (created_at, id) < (...)`` style
+    condition followed by ``LIMIT``, so deep pages cost the same as the
+    first one and no ``COUNT(*)`` or ``OFFSET`` is issued. The ordering
+    fields must be non-nullable and the last one must make the ordering
+    unique (usually ``id``).
+    """
+
+    def __init__(self, ordering=('-created_at', '-id'), page_size=10):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+
+    def paginate(self, queryset, cursor=None):
+        queryset, position, reverse = self._page_queryset(queryset, cursor)
+        return self._make_page(list(queryset), position, reverse)
+
+    async def apaginate(self, queryset, cursor=None):
+        """Async variant of :meth:`paginate`"""
+        queryset, position, reverse = self._page_queryset(queryset, cursor)
+        return self._make_page([item async for item in queryset], position, reverse)
+
+    def _page_queryset(self, queryset, cursor):
+        """Return the query fetching a page plus one row, and the decoded cursor"""
+        position, reverse = self.decode_cursor(queryset, cursor) if cursor else (None, False)
+
+        ordering = self._flip(self.ordering) if reverse else self.ordering
+        queryset = self._load_ordering_fields(queryset).order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+        return queryset[:self.page_size + 1], position, reverse
+
+    def _make_page(self, items, position, reverse):
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if reverse:
+            items.reverse()
+
+        if not items:
+            return KeysetPage(items)
+        has_next = has_more if not reverse else True
+        has_previous = position is not None if not reverse else has_more
+        return KeysetPage(
+            items,
+            next_cursor=self.encode_cursor(items[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor(items[0], reverse=True) if has_previous else None,
+        )
+
+    def encode_cursor(self, obj, reverse=False):
+        values = [self._dump(getattr(obj, name.lstrip('-'))) for name in self.ordering]
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            values, reverse = payload['v'], bool(payload['r'])
+            if len(values) != len(self.ordering):
+                raise InvalidCursor(cursor)
+            return [self._load(queryset, name.lstrip('-'), value)
+                    for name, value in zip(self.ordering, values)], reverse
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise InvalidCursor(cursor)
+
+    def _load_ordering_fields(self, queryset):
+        """Make sure ``only()`` querysets load the fields cursors are built from"""
+        field_names, defer = queryset.query.deferred_loading
+        if defer or not field_names:
+            return queryset
+        names = set()
+        for name in self.ordering:
+            try:
+                names.add(queryset.model._meta.get_field(name.lstrip('-')).name)
+            except FieldDoesNotExist:
+                continue
+        return queryset.only(*field_names, *names)
+
+    @staticmethod
+    def _seek(ordering, position):
+        """Build the condition selecting rows after ``position``"""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    @staticmethod
+    def _flip(ordering):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _load(queryset, name, value):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            # Annotations of a model field (e.g. F()) convert like the field;
+            # computed ones such as search ranks are stored as plain JSON values
+            field = getattr(annotation, 'target', None)
+            return field.to_python(value) if field is not None else value
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate for a queryset, if available.
+
+    PostgreSQL exposes its estimate through ``EXPLAIN``, which is far
+    cheaper than ``COUNT(*)`` on large tables. Other databases return None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.explain(format='json'))
+    return plan[0]['Plan']['Plan Rows']
+
+
+class EstimatedCountPaginator(Paginator):
+    """Django paginator that counts at most ``count_limit`` rows.
+
+    Larger results are counted with the planner's estimate where the
+    database has one, and as ``count_limit + 1`` rows otherwise, so
+    numbered pages (e.g. the admin changelist) stay cheap on large tables.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        counted = self.object_list[:self.count_limit + 1].count()
+        if counted <= self.count_limit:
+            return counted
+        return max(estimate_count(self.object_list) or 0, counted)
+
+
+class KeysetCursorPagination(BasePagination):
+    """DRF pagination backed by :class:`KeysetPaginator`.
+
+    Views may set ``keyset_ordering`` to change the ordering key. The total
+    count is only included on request: ``?count=exact`` runs ``COUNT(*)``
+    and ``?count=estimate`` returns the planner's estimate where supported.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        paginator = KeysetPaginator(ordering, self.page_size)
+        try:
+            self.page = paginator.paginate(queryset, request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+        return self.page.object_list
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.page.next_cursor)
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,163 @@
+import contextlib
+import contextvars
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+# Project frames kept in a call site, innermost first
+CALL_SITE_DEPTH = 3
+
+_current = contextvars.ContextVar('query_check', default=None)
+
+_PACKAGE_DIRS = ('site-packages', 'dist-packages')
+# Project modules that only pass queries through
+_INSTRUMENTATION_MODULES = {__name__, 'tasks.metrics', 'tasks.middleware', '__main__'}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?|NULL)(?:, (?:%s|\?|NULL))*\)', re.IGNORECASE)
+
+CallSite = namedtuple('CallSite', ['frames', 'template'])
+
+
+class QueryProblem(Exception):
+    """Raised when a checked request repeats a query shape or runs a slow query"""
+
+
+def normalize_sql(sql):
+    """Reduce a query to its shape: literals and IN lists of any length compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def _is_project_frame(frame):
+    filename = frame.f_code.co_filename
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and not any(part in filename for part in _PACKAGE_DIRS)
+        and frame.f_globals.get('__name__') not in _INSTRUMENTATION_MODULES
+    )
+
+
+def call_site():
+    """The innermost project frames and template line running the current query"""
+    frames = []
+    template = None
+    frame = sys._getframe(1)
+    while frame is not None and (len(frames) < CALL_SITE_DEPTH or template is None):
+        code = frame.f_code
+        if template is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            if isinstance(node, Node) and node.origin is not None:
+                template = f'{node.origin.template_name or node.origin.name}, line {node.token.lineno}'
+        elif len(frames) < CALL_SITE_DEPTH and _is_project_frame(frame):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            frames.append(f'{path}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return CallSite(tuple(frames), template)
+
+
+class QueryCheck:
+    """Queries of one request grouped by shape and call site.
+
+    A group of ``threshold`` or more queries is reported as an N+1, and a
+    query taking at least ``slow_ms`` milliseconds as slow.
+    """
+
+    def __init__(self, threshold, slow_ms):
+        self.threshold = threshold
+        self.slow_ms = slow_ms
+        self.groups = Counter()
+        self.examples = {}
+        self.slow = []
+        self.durations = defaultdict(float)
+
+    def record(self, sql, duration, site):
+        key = (normalize_sql(sql), site)
+        self.groups[key] += 1
+        self.durations[key] += duration
+        self.examples.setdefault(key, sql)
+        if duration * 1000 >= self.slow_ms:
+            self.slow.append((sql, duration, site))
+
+    def problems(self):
+        """Human readable descriptions of the N+1 groups and slow queries"""
+        problems = []
+        for key, count in self.groups.most_common():
+            if count < self.threshold:
+                break
+            problems.append(
+                f'N+1: {count} queries ({self.durations[key] * 1000:.1f}ms) of\n'
+                f'    {self.examples[key]}\n{_format_site(key[1])}'
+            )
+        for sql, duration, site in self.slow:
+            problems.append(f'Slow query ({duration * 1000:.1f}ms):\n    {sql}\n{_format_site(site)}')
+        return problems
+
+
+def _format_site(site):
+    lines = [f'    at {frame}' for frame in site.frames] or ['    at <no project frame>']
+    if site.template:
+        lines.append(f'    in template {site.template}')
+    return '\n'.join(lines)
+
+
+def check_query(execute, sql, params, many, context):
+    """Database execute wrapper feeding the query check of the current request"""
+    check = _current.get()
+    if check is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        check.record(sql, time.perf_counter() - started, call_site())
+
+
+def install_query_check(sender, connection, **kwargs):
+    if check_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(check_query)
+
+
+def start_check():
+    """Start checking the queries of the current context; returns a reset token"""
+    check = QueryCheck(settings.TASKS_NPLUSONE_THRESHOLD, settings.TASKS_SLOW_QUERY_MS)
+    return check, _current.set(check)
+
+
+def finish_check(check, token, label, raise_errors=None):
+    """Stop checking, then raise or log the problems found under ``label``"""
+    _current.reset(token)
+    problems = check.problems()
+    if not problems:
+        return
+    if raise_errors is None:
+        raise_errors = settings.TASKS_QUERY_CHECK_RAISE
+    report = f'{label}:\n' + '\n'.join(problems)
+    if raise_errors:
+        raise QueryProblem(report)
+    logger.warning(report)
+
+
+@contextlib.contextmanager
+def checked_queries(label='Query check', raise_errors=True):
+    """Check the queries run inside the block, e.g. in a test"""
+    for connection in connections.all():
+        install_query_check(None, connection)
+    check, token = start_check()
+    try:
+        yield check
+    except BaseException:
+        _current.reset(token)
+        raise
+    finish_check(check, token, label, raise_errors)
@@ -0,0 +1,41 @@
+import logging
+import signal
+import threading
+
+import django
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask(threading.Thread):
+    """Daemon thread calling a function every ``interval`` seconds.
+
+    Failures are logged and retried on the next tick. Database connections
+    are closed after every run since the thread lives outside the
+    request cycle that normally recycles them.
+    """
+
+    def __init__(self, func, interval, name=None):
+        super().__init__(name=name or func.__name__, daemon=True)
+        self.func = func
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.func()
+            except Exception:
+                logger.exception('Periodic task %s failed', self.name)
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def init_worker_process():
+    """Set up Django in a spawned worker process; Ctrl-C is handled by the parent"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
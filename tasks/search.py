@@ -0,0 +1,209 @@
+import re
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from .models import Task, TaskComment
+
+
+class SearchBackend:
+    """Full-text search over task titles, descriptions and comments.
+
+    Backends keep one search document per task, updated incrementally
+    whenever a task or one of its comments changes, and annotate matching
+    tasks with a ``search_rank``. ``ordering`` is the keyset ordering of
+    ranked results, best match first.
+    """
+    ordering = ('-created_at', '-id')
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def install(self):
+        """Create the search tables if they do not exist"""
+
+    def index_tasks(self, task_ids):
+        """(Re)build the search documents of the given tasks"""
+
+    def remove_tasks(self, task_ids):
+        """Drop the search documents of the given tasks"""
+
+    def search(self, queryset, query):
+        """Filter a task queryset to the matches of ``query``, ranked"""
+        raise NotImplementedError
+
+    def get_documents(self, task_ids):
+        """Return (task_id, title, description, comments) for the given tasks"""
+        comments = defaultdict(list)
+        for task_id, content in (
+            TaskComment.objects.using(self.using)
+            .filter(task_id__in=task_ids)
+            .order_by('task_id', 'created_at')
+            .values_list('task_id', 'content')
+        ):
+            comments[task_id].append(content)
+        return [
+            (task_id, title, description, '\n'.join(comments[task_id]))
+            for task_id, title, description in (
+                Task.objects.using(self.using)
+                .filter(id__in=task_ids)
+                .values_list('id', 'title', 'description')
+            )
+        ]
+
+    @staticmethod
+    def tokenize(query):
+        return re.findall(r'\w+', query)
+
+    def no_matches(self, queryset):
+        """The empty result of a query without words, ordered like ranked results"""
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField())).order_by(*self.ordering)
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 virtual table keyed by task id, ranked with bm25.
+
+    SQLite refuses bm25() in aggregate queries, so count related rows of
+    searched tasks with correlated subqueries rather than GROUP BY.
+    """
+    table = 'tasks_task_fts'
+    # bm25 column weights for title, description and comments
+    weights = (10.0, 5.0, 1.0)
+    ordering = ('search_rank', '-id')
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f'USING fts5(title, description, comments)'
+            )
+
+    def index_tasks(self, task_ids):
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        documents = self.get_documents(task_ids)
+        with self.connection.cursor() as cursor:
+            self._delete(cursor, task_ids)
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, description, comments) '
+                f'VALUES (%s, %s, %s, %s)',
+                documents,
+            )
+
+    def remove_tasks(self, task_ids):
+        task_ids = list(task_ids)
+        if task_ids:
+            with self.connection.cursor() as cursor:
+                self._delete(cursor, task_ids)
+
+    def _delete(self, cursor, task_ids):
+        placeholders = ', '.join(['%s'] * len(task_ids))
+        cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', task_ids)
+
+    def search(self, queryset, query):
+        tokens = self.tokenize(query)
+        if not tokens:
+            return self.no_matches(queryset)
+        # Quote every token so user input cannot inject FTS5 syntax; match prefixes
+        match = ' '.join('"%s"*' % token for token in tokens)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        # Join the FTS table once: a correlated bm25() subquery recomputes the
+        # index statistics for every row, which is quadratic in the matches.
+        # The unary + keeps SQLite from probing the FTS index once per task.
+        return queryset.extra(
+            tables=[self.table], where=[f'{self.table} MATCH %s'], params=[match],
+        ).filter(id=RawSQL(f'+{self.table}.rowid', [])).annotate(
+            search_rank=RawSQL(f'bm25({self.table}, {weights})', [])
+        ).order_by(*self.ordering)
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """tsvector documents in a side table with a GIN index, ranked with ts_rank"""
+    table = 'tasks_task_search'
+    config = 'english'
+    ordering = ('-search_rank', '-id')
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                f'task_id bigint PRIMARY KEY REFERENCES {Task._meta.db_table} (id) '
+                f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_document_idx '
+                f'ON {self.table} USING GIN (document)'
+            )
+
+    def index_tasks(self, task_ids):
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (task_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+                f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+                f"setweight(to_tsvector('{self.config}', %s), 'C')) "
+                f"ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document",
+                self.get_documents(task_ids),
+            )
+
+    def remove_tasks(self, task_ids):
+        task_ids = list(task_ids)
+        if task_ids:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table} WHERE task_id = ANY(%s)', [task_ids])
+
+    def search(self, queryset, query):
+        if not self.tokenize(query):
+            return self.no_matches(queryset)
+        task_table = Task._meta.db_table
+        tsquery = f"websearch_to_tsquery('{self.config}', %s)"
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT task_id FROM {self.table} WHERE document @@ {tsquery}', [query])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT ts_rank(document, {tsquery}) FROM {self.table} '
+            f'WHERE task_id = "{task_table}"."id"',
+            [query],
+        )).order_by(*self.ordering)
+
+
+class FallbackSearchBackend(SearchBackend):
+    """Unindexed substring search for databases without a full-text engine"""
+
+    def search(self, queryset, query):
+        tokens = self.tokenize(query)
+        if not tokens:
+            return self.no_matches(queryset)
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(title__icontains=token)
+                | Q(description__icontains=token)
+                | Q(id__in=TaskComment.objects.filter(content__icontains=token).values('task_id'))
+            )
+        return queryset.order_by(*self.ordering)
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    """Return the search backend matching the database vendor"""
+    vendor = connections[using].vendor
+    return BACKENDS.get(vendor, FallbackSearchBackend)(using)
+
+
+def search_tasks(queryset, query):
+    """Filter a task queryset to the tasks matching ``query``, best first"""
+    return get_search_backend(queryset.db).search(queryset, query)
@@ -1,9 +1,49 @@
+import posixpath
+import re
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Task, Category, TaskComment
+from .categories import CachedCategoryField
+from .models import Task, Category, TaskAttachment, TaskComment, UploadSession
+from .thumbnails import is_image
+from django.urls import reverse
 from django.utils import timezone
 
 
+class DynamicFieldsMixin:
+    """Serializer mixin for sparse fieldsets and expandable relations.
+
+    ``?fields=id,title`` limits the output to the listed fields and
+    ``?expand=category,comments`` swaps the relations listed in
+    ``Meta.expandable_fields`` for their nested representation. The
+    queryset optimizer reads the resulting fields, so the ORM query
+    shrinks to match.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in self._query_param_list(request, 'expand'):
+            if name in expandable:
+                serializer_class, options = expandable[name]
+                self.fields[name] = serializer_class(read_only=True, **options)
+        
+        requested = self._query_param_list(request, 'fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+    
+    @staticmethod
+    def _query_param_list(request, param):
+        value = request.query_params.get(param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model"""
     class Meta:
@@ -28,14 +68,87 @@ class TaskCommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['author', 'created_at', 'updated_at']
 
 
-class TaskSerializer(serializers.ModelSerializer):
-    """Serializer for Task model"""
+class TaskAttachmentSerializer(serializers.ModelSerializer):
+    """Serializer for TaskAttachment model.
+    
+    ``thumbnails`` maps each thumbnail size to its URL for images, so
+    clients can show previews without downloading the file.
+    """
+    size = serializers.IntegerField(source='blob.size', read_only=True)
+    download_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = TaskAttachment
+        fields = ['id', 'task', 'filename', 'size', 'uploaded_by', 'uploaded_at', 'download_url', 'thumbnails']
+        read_only_fields = fields
+        field_dependencies = {
+            'download_url': [],
+            'thumbnails': ['filename', 'blob'],
+        }
+    
+    def _absolute_url(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_download_url(self, obj):
+        return self._absolute_url(reverse('tasks:attachment_download', args=[obj.pk]))
+    
+    def get_thumbnails(self, obj):
+        if not is_image(obj):
+            return None
+        return {
+            size: self._absolute_url(reverse('tasks:attachment_thumbnail', args=[obj.pk, size]))
+            for size in settings.TASKS_THUMBNAIL_SIZES
+        }
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable attachment uploads"""
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'task', 'filename', 'size', 'sha256', 'offset', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+    
+    def validate_task(self, value):
+        """Files can be attached to the tasks the user can see"""
+        if not Task.objects.visible_to(self.context['request'].user).filter(pk=value.pk).exists():
+            raise serializers.ValidationError("Task not found.")
+        return value
+    
+    def validate_filename(self, value):
+        value = posixpath.basename(value.replace('\\', '/')).strip()
+        if not value:
+            raise serializers.ValidationError("Filename cannot be empty.")
+        return value
+    
+    def validate_size(self, value):
+        if not 0 < value <= settings.TASKS_MAX_ATTACHMENT_SIZE:
+            raise serializers.ValidationError(
+                f"Size must be between 1 and {settings.TASKS_MAX_ATTACHMENT_SIZE} bytes."
+            )
+        return value
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
+
+
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer for Task model.
+    
+    Comments are paged through ``/api/tasks/<pk>/comments/``; the whole
+    thread is only embedded with ``?expand=comments``.
+    """
     created_by = UserSerializer(read_only=True)
     assigned_to = UserSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
-    comments = TaskCommentSerializer(many=True, read_only=True)
+    category = CachedCategoryField()
+    attachments = TaskAttachmentSerializer(many=True, read_only=True)
     is_overdue = serializers.ReadOnlyField()
-    priority_color = serializers.ReadOnlyField()
+    priority_color = serializers.ReadOnlyField(source='get_priority_color')
     
     class Meta:
         model = Task
@@ -43,9 +156,56 @@ class TaskSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'created_by', 'assigned_to', 
             'category', 'priority', 'status', 'due_date', 'created_at', 
             'updated_at', 'completed_at', 'is_overdue', 'priority_color',
-            'comments'
+            'comment_count', 'attachment_count', 'last_activity_at',
+            'attachments'
         ]
         read_only_fields = ['created_by', 'created_at', 'updated_at', 'completed_at']
+        # Columns read by fields that are not model fields
+        field_dependencies = {
+            'is_overdue': ['overdue_since'],
+            'priority_color': ['priority'],
+        }
+        expandable_fields = {
+            'comments': (TaskCommentSerializer, {'many': True}),
+        }
+    
+    def update(self, instance, validated_data):
+        # Only the submitted columns: the counters loaded with the task are
+        # stale once a comment lands meanwhile
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class TaskListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact serializer for task listings.
+
+    Relations are rendered as IDs and comments and attachments as the
+    task's counters; clients can ask for nested objects with ``?expand=``.
+    """
+    is_overdue = serializers.ReadOnlyField()
+    priority_color = serializers.ReadOnlyField(source='get_priority_color')
+    
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'created_by', 'assigned_to', 'category', 'priority',
+            'status', 'due_date', 'created_at', 'updated_at', 'completed_at',
+            'is_overdue', 'priority_color', 'comment_count', 'attachment_count',
+            'last_activity_at'
+        ]
+        read_only_fields = ['created_by', 'created_at', 'updated_at', 'completed_at']
+        field_dependencies = {
+            'is_overdue': ['overdue_since'],
+            'priority_color': ['priority'],
+        }
+        expandable_fields = {
+            'created_by': (UserSerializer, {}),
+            'assigned_to': (UserSerializer, {}),
+            'category': (CachedCategoryField, {}),
+            'comments': (TaskCommentSerializer, {'many': True}),
+        }
 
 
 class TaskCreateSerializer(serializers.ModelSerializer):
@@ -71,4 +231,55 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         """Validate that due date is not in the past"""
         if value and value < timezone.now():
             raise serializers.ValidationError("Due date cannot be in the past.")
-        return value 
\ No newline at end of file
+        return value 
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field resolving ids from objects loaded once per batch"""
+    
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.objects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+def bulk_task_serializer(serializer_class, items, **kwargs):
+    """Build a many=True task serializer that validates a batch up front.
+
+    The assignees and categories referenced by the batch are loaded with
+    one query each instead of one lookup per item.
+    """
+    serializer = serializer_class(data=items, many=True, **kwargs)
+    if not isinstance(items, list):
+        return serializer
+    
+    def referenced_ids(name):
+        ids = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            if value is not None and not isinstance(value, bool):
+                try:
+                    ids.add(int(value))
+                except (TypeError, ValueError):
+                    continue
+        return ids
+    
+    fields = serializer.child.fields
+    fields['assigned_to'] = BulkPrimaryKeyRelatedField(
+        User.objects.filter(is_active=True).in_bulk(referenced_ids('assigned_to')),
+        queryset=User.objects.all(), required=False, allow_null=True,
+    )
+    fields['category'] = BulkPrimaryKeyRelatedField(
+        Category.objects.in_bulk(referenced_ids('category')),
+        queryset=Category.objects.all(), required=False, allow_null=True,
+    )
+    return serializer
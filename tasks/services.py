@@ -0,0 +1,414 @@
+from datetime import datetime, time
+
+from django.db import connections, router, transaction
+from django.db.models import Case, Count, DateTimeField, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from .caching import amake_key, cache, get_timeout, invalidate_tasks, invalidate_users, make_key
+from .models import Task, TaskAttachment, TaskComment, TaskVisibility, Watermark
+from .search import get_search_backend, search_tasks
+
+
+DASHBOARD_RECENT_TASKS = 5
+
+
+def get_dashboard_stats(user):
+    """Return the dashboard counters and recent tasks of a user.
+
+    All counters come from a single conditional-aggregate query and the
+    result is cached per user until one of the user's tasks changes.
+    """
+    key = make_key('dashboard', user=user)
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+
+    visible = Task.objects.visible_to(user)
+    stats = visible.aggregate(**dashboard_counters())
+    stats['recent_tasks'] = list(recent_tasks(visible))
+
+    cache.set(key, stats, get_timeout())
+    return stats
+
+
+async def aget_dashboard_stats(user):
+    """Async variant of :func:`get_dashboard_stats`, sharing its cache entries"""
+    key = await amake_key('dashboard', user=user)
+    stats = await cache.aget(key)
+    if stats is not None:
+        return stats
+
+    visible = Task.objects.visible_to(user)
+    stats = await visible.aaggregate(**dashboard_counters())
+    stats['recent_tasks'] = [task async for task in recent_tasks(visible)]
+
+    await cache.aset(key, stats, get_timeout())
+    return stats
+
+
+def recent_tasks(visible):
+    return visible.with_visibility_keys().order_by(*TASK_ORDERINGS['newest'])[:DASHBOARD_RECENT_TASKS]
+
+
+def dashboard_counters():
+    return {
+        'total': Count('id'),
+        'todo': Count('id', filter=Q(status='todo')),
+        'in_progress': Count('id', filter=Q(status='in_progress')),
+        'review': Count('id', filter=Q(status='review')),
+        'done': Count('id', filter=Q(status='done')),
+        'overdue': Count('id', filter=Q(overdue_since__isnull=False)),
+    }
+
+
+def filter_tasks(user, filters):
+    """Apply the cleaned data of a ``TaskFilterForm`` to the tasks a user can see.
+
+    Without a user every task is considered. Searches come back ranked,
+    best match first; otherwise the ordering is left to the caller.
+    """
+    if user is None:
+        queryset = Task.objects.all()
+        if filters.get('status'):
+            queryset = queryset.filter(status=filters['status'])
+    else:
+        # Filtered on the visibility join so the (user, status) index is used
+        queryset = Task.objects.visible_to(user, status=filters.get('status'))
+
+    if filters.get('priority'):
+        queryset = queryset.filter(priority=filters['priority'])
+    if filters.get('category'):
+        queryset = queryset.filter(category=filters['category'])
+    if filters.get('assigned_to'):
+        queryset = queryset.filter(assigned_to=filters['assigned_to'])
+    if filters.get('due_date_from'):
+        queryset = queryset.filter(due_date__gte=start_of_day(filters['due_date_from']))
+    if filters.get('due_date_to'):
+        queryset = queryset.filter(due_date__lte=start_of_day(filters['due_date_to']))
+    if filters.get('search'):
+        # Ranked full-text search
+        queryset = search_tasks(queryset, filters['search'])
+    return queryset
+
+
+def start_of_day(day):
+    """Midnight of a date in the current time zone, for comparing with due dates"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+VISIBILITY_FIELDS = ('created_by_id', 'assigned_to_id', 'status')
+
+
+def fields_changed(task, attnames, update_fields=None):
+    """Return True if a save of the task wrote new values to any of the fields"""
+    return any(
+        task.get_loaded_value(attname) != getattr(task, attname)
+        for attname in attnames
+        if update_fields is None or attname in update_fields or attname.removesuffix('_id') in update_fields
+    )
+
+
+def visibility_changed(task, update_fields=None):
+    """Return True if a save of the task affects its visibility rows"""
+    return fields_changed(task, VISIBILITY_FIELDS, update_fields)
+
+
+def sync_task_visibility(tasks):
+    """Rebuild the visibility rows of the given tasks.
+
+    Every task is visible to its creator and to its assignee. The rows
+    carry a copy of the task status, creation time and activity so that
+    listings can be served from the (user, key, task) indexes. The
+    activity is read from the database, as saved instances may hold
+    stale counters.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+    task_ids = [task.pk for task in tasks]
+    with transaction.atomic():
+        activity = {
+            pk: (comment_count, last_activity_at)
+            for pk, comment_count, last_activity_at in Task.objects.filter(pk__in=task_ids).values_list(
+                'pk', 'comment_count', 'last_activity_at'
+            )
+        }
+        rows = []
+        for task in tasks:
+            if task.pk not in activity:
+                continue
+            comment_count, last_activity_at = activity[task.pk]
+            user_ids = {task.created_by_id, task.assigned_to_id} - {None}
+            rows.extend(
+                TaskVisibility(
+                    task_id=task.pk,
+                    user_id=user_id,
+                    status=task.status,
+                    created_at=task.created_at,
+                    last_activity_at=last_activity_at,
+                    comment_count=comment_count,
+                )
+                for user_id in user_ids
+            )
+        TaskVisibility.objects.filter(task__in=task_ids).delete()
+        TaskVisibility.objects.bulk_create(rows)
+
+
+# Keyset orderings of task listings, each one an index scan. Tasks filtered
+# by ``visible_to`` are keyed on their visibility row (``with_visibility_keys``)
+# so pages are range scans of a (user, key, task) index.
+TASK_ORDERINGS = {
+    'newest': ('-visible_created_at', '-visible_task_id'),
+    'activity': ('-visible_last_activity_at', '-visible_task_id'),
+    'comments': ('-visible_comment_count', '-visible_task_id'),
+}
+
+
+# Keyset orderings of a task's comment thread, read from the (task, created_at, id) index
+COMMENT_ORDERINGS = {
+    'oldest': ('created_at', 'id'),
+    'newest': ('-created_at', '-id'),
+}
+COMMENT_PAGE_SIZE = 20
+
+
+def comment_thread(task_id):
+    """The comments of a task with their authors, joined in the same query"""
+    return TaskComment.objects.filter(task_id=task_id).select_related('author')
+
+
+def record_task_activity(task_id, comments=0, attachments=0, at=None):
+    """Adjust the activity counters of a task in a single UPDATE.
+
+    The counts are moved with ``F()`` expressions, so concurrent comments
+    cannot lose each other's increments, and ``at`` becomes the task's
+    last activity. ``updated_at`` is left alone: the task itself did not
+    change. The visibility rows then copy the new values from the task.
+    """
+    values = {}
+    if comments:
+        values['comment_count'] = Greatest(F('comment_count') + comments, Value(0))
+    if attachments:
+        values['attachment_count'] = Greatest(F('attachment_count') + attachments, Value(0))
+    if at is not None:
+        values['last_activity_at'] = at
+    if values:
+        with transaction.atomic():
+            Task.objects.filter(pk=task_id).update(**values)
+            if comments or at is not None:
+                copy_task_activity(TaskVisibility.objects.filter(task_id=task_id))
+
+
+def copy_task_activity(visibility):
+    """Copy the activity of the tasks onto a queryset of their visibility rows"""
+    tasks = Task.objects.filter(pk=OuterRef('task_id'))
+    return visibility.update(
+        last_activity_at=Subquery(tasks.values('last_activity_at')),
+        comment_count=Subquery(tasks.values('comment_count')),
+    )
+
+
+def _per_task(model, aggregate, output_field):
+    rows = model.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(value=aggregate)
+    return Subquery(rows.values('value'), output_field=output_field)
+
+
+def reconcile_task_activity(queryset):
+    """Recount the comments and attachments of the tasks of a queryset.
+
+    Tasks whose counters drifted from their rows are repaired with one
+    UPDATE of correlated subqueries, and ``last_activity_at`` is moved up
+    to their latest comment or attachment; it is never moved back, as
+    deleting rows does not undo the activity. Visibility rows whose copy
+    of the activity differs from their task are refreshed as well.
+    Returns the number of tasks repaired.
+    """
+    actual = {
+        'actual_comments': Coalesce(_per_task(TaskComment, Count('id'), IntegerField()), 0),
+        'actual_attachments': Coalesce(_per_task(TaskAttachment, Count('id'), IntegerField()), 0),
+        'actual_activity': Greatest(
+            F('created_at'),
+            Coalesce(_per_task(TaskComment, Max('created_at'), DateTimeField()), F('created_at')),
+            Coalesce(_per_task(TaskAttachment, Max('uploaded_at'), DateTimeField()), F('created_at')),
+        ),
+    }
+    with transaction.atomic():
+        drifted = set(queryset.annotate(**actual).filter(
+            ~Q(comment_count=F('actual_comments'))
+            | ~Q(attachment_count=F('actual_attachments'))
+            | Q(last_activity_at__lt=F('actual_activity'))
+        ).values_list('pk', flat=True))
+        if drifted:
+            Task.objects.filter(pk__in=drifted).update(
+                comment_count=actual['actual_comments'],
+                attachment_count=actual['actual_attachments'],
+                last_activity_at=Greatest(F('last_activity_at'), actual['actual_activity']),
+            )
+        drifted.update(TaskVisibility.objects.filter(task__in=queryset.values('pk')).exclude(
+            last_activity_at=F('task__last_activity_at'), comment_count=F('task__comment_count'),
+        ).values_list('task_id', flat=True))
+        if not drifted:
+            return 0
+        copy_task_activity(TaskVisibility.objects.filter(task__in=drifted))
+        invalidate_tasks(*drifted)
+        invalidate_users(*TaskVisibility.objects.filter(task__in=drifted).values_list('user_id', flat=True))
+    return len(drifted)
+
+
+def refresh_after_bulk_write(task_ids, previous_user_ids=(), reindex=True):
+    """Update the data derived from tasks after a bulk write.
+
+    ``bulk_create``, ``bulk_update`` and ``QuerySet.update`` do not send
+    model signals, so callers use this to sync the visibility rows,
+    invalidate the cached data of the tasks and of every affected user
+    (including previous assignees) and refresh the search documents.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    tasks = list(
+        Task.objects.filter(pk__in=task_ids)
+        .only('id', 'created_by', 'assigned_to', 'status', 'created_at')
+    )
+    sync_task_visibility(tasks)
+    invalidate_tasks(*task_ids)
+    invalidate_users(
+        *previous_user_ids,
+        *(task.created_by_id for task in tasks),
+        *(task.assigned_to_id for task in tasks),
+    )
+    if reindex:
+        get_search_backend().index_tasks(task_ids)
+
+
+def refresh_after_bulk_create(tasks):
+    """Like :func:`refresh_after_bulk_write` for tasks just inserted by ``bulk_create``.
+
+    New tasks have no visibility rows, cached pages or search documents
+    yet, so nothing is deleted or reloaded and only the caches of their
+    users are invalidated.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+    task_ids = [task.pk for task in tasks]
+    insert_task_visibility(task_ids)
+    invalidate_users(*{user_id for task in tasks for user_id in (task.created_by_id, task.assigned_to_id)})
+    get_search_backend().index_tasks(task_ids)
+
+
+def insert_task_visibility(task_ids):
+    """Insert the visibility rows of tasks that have none.
+
+    Runs as one ``INSERT ... SELECT`` from the task rows: building a
+    TaskVisibility instance per row costs more than the import of the
+    task itself.
+    """
+    tasks = Task.objects.filter(pk__in=task_ids).order_by()
+    copied = ('pk', 'status', 'created_at', 'last_activity_at', 'comment_count')
+    assigned = tasks.filter(assigned_to__isnull=False).exclude(assigned_to=F('created_by'))
+    rows = tasks.values_list(*copied, 'created_by').union(assigned.values_list(*copied, 'assigned_to'), all=True)
+    using = router.db_for_write(TaskVisibility)
+    sql, params = rows.query.get_compiler(using).as_sql()
+    quote = connections[using].ops.quote_name
+    columns = ', '.join(
+        quote(TaskVisibility._meta.get_field(name).column)
+        for name in ('task', 'status', 'created_at', 'last_activity_at', 'comment_count', 'user')
+    )
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'INSERT INTO {quote(TaskVisibility._meta.db_table)} ({columns}) {sql}', params)
+
+
+def complete_task(task_id, user):
+    """Mark a task as done if the user may and it is not done yet.
+
+    Runs as one conditional ``UPDATE ... WHERE id = ? AND status <> 'done'
+    AND (created_by = ? OR assigned_to = ?)`` so concurrent requests
+    cannot both complete the task or overwrite other columns. Returns
+    True if the update took effect.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Task.objects.filter(
+            Q(created_by=user) | Q(assigned_to=user), pk=task_id
+        ).exclude(status='done').update(status='done', completed_at=now, updated_at=now, overdue_since=None)
+        if updated:
+            # QuerySet.update() sends no signals; narrow updates of the derived data
+            visibility = TaskVisibility.objects.filter(task_id=task_id)
+            visibility.update(status='done')
+            invalidate_tasks(task_id)
+            invalidate_users(*visibility.values_list('user_id', flat=True))
+    return bool(updated)
+
+
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def bulk_update_tasks(queryset, **values):
+    """Write ``values`` to the tasks of a queryset in batched UPDATEs.
+
+    Tasks already holding the values are skipped. A status change sets
+    ``completed_at`` and ``overdue_since`` as ``Task.set_status`` and
+    ``Task.save`` would. Returns the number of tasks changed.
+    """
+    now = timezone.now()
+    values['updated_at'] = now
+    if 'status' in values:
+        if values['status'] == 'done':
+            values.update(completed_at=now, overdue_since=None)
+        else:
+            values.update(
+                completed_at=None,
+                overdue_since=Case(When(due_date__lte=now, then=F('due_date')), default=None),
+            )
+    unchanged = Q(**{name: values[name] for name in ('status', 'priority') if name in values})
+    task_ids = list(queryset.exclude(unchanged).values_list('pk', flat=True))
+    for start in range(0, len(task_ids), BULK_UPDATE_BATCH_SIZE):
+        batch = task_ids[start:start + BULK_UPDATE_BATCH_SIZE]
+        with transaction.atomic():
+            Task.objects.filter(pk__in=batch).update(**values)
+            refresh_after_bulk_write(batch, reindex=False)
+    return len(task_ids)
+
+
+OVERDUE_SWEEP_WATERMARK = 'overdue-sweep'
+OVERDUE_SWEEP_BATCH_SIZE = 500
+
+
+def overdue_candidates(now, since=None):
+    """Open, unflagged tasks whose due date is in ``(since, now]``.
+
+    Unordered, so the lookup is a range scan over the partial index of
+    open tasks' due dates rather than a walk of ``Meta.ordering``.
+    """
+    crossing = Task.objects.filter(due_date__lte=now, overdue_since__isnull=True).exclude(status='done')
+    if since is not None:
+        crossing = crossing.filter(due_date__gt=since)
+    return crossing.order_by()
+
+
+def sweep_overdue_tasks(now=None):
+    """Flag open tasks whose due date passed since the previous sweep.
+
+    Saves keep ``overdue_since`` current for the tasks they touch, so the
+    sweep only has to catch tasks that became overdue as time went by.
+    The time of the last sweep is kept in a ``Watermark`` row, shared by
+    every worker and the ``sweep_overdue`` command; without it every open
+    task past its due date is checked. Returns the number of tasks
+    flagged.
+    """
+    now = now or timezone.now()
+    last_sweep = Watermark.objects.filter(name=OVERDUE_SWEEP_WATERMARK).values_list('value', flat=True).first()
+
+    rows = list(overdue_candidates(now, last_sweep).values_list('id', 'created_by_id', 'assigned_to_id'))
+    for start in range(0, len(rows), OVERDUE_SWEEP_BATCH_SIZE):
+        batch = rows[start:start + OVERDUE_SWEEP_BATCH_SIZE]
+        task_ids = [task_id for task_id, _, _ in batch]
+        # Re-check the conditions: tasks may have been completed meanwhile
+        Task.objects.filter(
+            pk__in=task_ids, due_date__lte=now, overdue_since__isnull=True
+        ).exclude(status='done').update(overdue_since=F('due_date'))
+        invalidate_tasks(*task_ids)
+        invalidate_users(*{user_id for _, *user_ids in batch for user_id in user_ids})
+    Watermark.objects.update_or_create(name=OVERDUE_SWEEP_WATERMARK, defaults={'value': now})
+    return len(rows)
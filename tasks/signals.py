@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.core.signals import request_started
+from django.dispatch import receiver
+from django.utils import timezone
+from .categories import registry as category_registry
+from .caching import invalidate_categories, invalidate_tasks, invalidate_users
+from .metrics import registry as metrics_registry
+from .models import Task, Category, TaskAttachment, TaskComment, TaskVisibility
+from .scheduler import PeriodicTask
+from .search import get_search_backend
+from .services import (
+    fields_changed, record_task_activity, sweep_overdue_tasks, sync_task_visibility, visibility_changed,
+)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the visibility rows of the task in sync"""
+    if created or visibility_changed(instance, update_fields):
+        sync_task_visibility([instance])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    """Invalidate the cached data of the task and of every user who can see it"""
+    invalidate_tasks(instance.pk)
+    invalidate_users(
+        instance.created_by_id,
+        instance.assigned_to_id,
+        instance.get_loaded_value('assigned_to_id'),
+    )
+
+
+def deleted_with_task(origin):
+    """Whether a row was deleted as part of deleting its task"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Task
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_save, sender=TaskAttachment)
+def activity_added(sender, instance, created, raw=False, **kwargs):
+    """Count new comments and attachments on their task"""
+    if created and not raw:
+        counter = 'comments' if sender is TaskComment else 'attachments'
+        record_task_activity(instance.task_id, **{counter: 1}, at=timezone.now())
+
+
+@receiver(post_delete, sender=TaskComment)
+@receiver(post_delete, sender=TaskAttachment)
+def activity_removed(sender, instance, origin=None, **kwargs):
+    if not deleted_with_task(origin):
+        counter = 'comments' if sender is TaskComment else 'attachments'
+        record_task_activity(instance.task_id, **{counter: -1})
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+@receiver(post_save, sender=TaskAttachment)
+@receiver(post_delete, sender=TaskAttachment)
+def activity_changed(sender, instance, origin=None, **kwargs):
+    """Comments and attachments are shown on task pages and counted in task listings"""
+    if deleted_with_task(origin):
+        # task_changed invalidates the task and its users once
+        return
+    invalidate_tasks(instance.task_id)
+    invalidate_users(*TaskVisibility.objects.filter(
+        task_id=instance.task_id
+    ).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_categories()
+    category_registry.clear()
+
+
+def warm_category_registry(sender, **kwargs):
+    """Load the category registry when the first request comes in"""
+    request_started.disconnect(warm_category_registry)
+    category_registry.warm()
+
+
+def start_overdue_sweeper(sender, **kwargs):
+    """Run the overdue sweeper in the background of web workers"""
+    request_started.disconnect(start_overdue_sweeper)
+    PeriodicTask(sweep_overdue_tasks, settings.TASKS_OVERDUE_SWEEP_INTERVAL).start()
+
+
+def start_metrics_summary(sender, **kwargs):
+    """Log a summary of the request metrics in the background of web workers"""
+    request_started.disconnect(start_metrics_summary)
+    PeriodicTask(metrics_registry.log_summary, settings.TASKS_METRICS_LOG_INTERVAL).start()
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, update_fields=None, **kwargs):
+    """Refresh the search document when the searchable text changes"""
+    if created or fields_changed(instance, ('title', 'description'), update_fields):
+        get_search_backend(kwargs.get('using', 'default')).index_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    get_search_backend(kwargs.get('using', 'default')).remove_tasks([instance.pk])
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def index_comment(sender, instance, origin=None, **kwargs):
+    """Comments are part of their task's search document"""
+    if deleted_with_task(origin):
+        # unindex_task drops the whole document
+        return
+    get_search_backend(kwargs.get('using', 'default')).index_tasks([instance.task_id])
+
+
+def install_search_index(sender, using='default', **kwargs):
+    """Create the full-text search tables after migrating the tasks app"""
+    get_search_backend(using).install()
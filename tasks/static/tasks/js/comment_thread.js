@@ -0,0 +1,44 @@
+// Appends the next page of a task's comments when the end of the thread scrolls into view
+$(function() {
+    var thread = $('#comment-thread');
+    var loading = false;
+    var observer = null;
+
+    function load(more) {
+        if (loading) {
+            return;
+        }
+        loading = true;
+        $.get(more.data('next-url'), function(html) {
+            more.replaceWith(html);
+            watch();
+        }).always(function() {
+            loading = false;
+        });
+    }
+
+    function watch() {
+        var more = thread.find('.comment-more');
+        if (more.length && observer) {
+            observer.observe(more[0]);
+        }
+    }
+
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    load($(entry.target));
+                }
+            });
+        }, {rootMargin: '200px'});
+    }
+
+    // Without an observer, or after a failed request, the link loads the page
+    thread.on('click', '.comment-more a', function(e) {
+        e.preventDefault();
+        load($(this).closest('.comment-more'));
+    });
+    watch();
+});
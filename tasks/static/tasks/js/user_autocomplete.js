@@ -0,0 +1,46 @@
+// Lazily loaded assignee picker for selects rendered by UserAutocompleteWidget
+$(function() {
+    $('select[data-autocomplete-url]').each(function() {
+        var select = $(this);
+        var url = select.data('autocomplete-url');
+        var search = $('<input type="search" class="form-control mb-1" placeholder="Type a username...">');
+        var more = $('<button type="button" class="btn btn-link btn-sm p-0 d-none">More results</button>');
+        var timer = null;
+        var lastQuery = null;
+        var after = null;
+
+        select.before(search);
+        select.after(more);
+
+        function load(query, append) {
+            $.getJSON(url, {q: query, after: append ? after : ''}, function(data) {
+                if (!append) {
+                    // Keep the empty choice and the current selection
+                    select.find('option').not(':selected').not('[value=""]').remove();
+                }
+                $.each(data.results, function(i, user) {
+                    if (!select.find('option[value="' + user.id + '"]').length) {
+                        select.append($('<option>').val(user.id).text(user.text));
+                    }
+                });
+                after = data.next;
+                more.toggleClass('d-none', !data.next);
+            });
+        }
+
+        search.on('input', function() {
+            var query = search.val().trim();
+            clearTimeout(timer);
+            timer = setTimeout(function() {
+                if (query && query !== lastQuery) {
+                    lastQuery = query;
+                    load(query, false);
+                }
+            }, 250);
+        });
+
+        more.on('click', function() {
+            load(lastQuery, true);
+        });
+    });
+});
@@ -0,0 +1,29 @@
+// Username suggestions for the admin's UsernameListFilter inputs
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.username-filter input[data-autocomplete-url]').forEach(function(input) {
+        var options = document.getElementById(input.getAttribute('list'));
+        var url = input.dataset.autocompleteUrl;
+        var timer = null;
+        var lastQuery = null;
+
+        input.addEventListener('input', function() {
+            var query = input.value.trim();
+            clearTimeout(timer);
+            timer = setTimeout(function() {
+                if (!query || query === lastQuery) {
+                    return;
+                }
+                lastQuery = query;
+                fetch(url + '?q=' + encodeURIComponent(query), {credentials: 'same-origin'})
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) {
+                        options.replaceChildren.apply(options, data.results.map(function(user) {
+                            var option = document.createElement('option');
+                            option.value = user.text;
+                            return option;
+                        }));
+                    });
+            }, 250);
+        });
+    });
+});
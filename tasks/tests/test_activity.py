@@ -0,0 +1,127 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from tasks.forms import TaskForm
+from tasks.models import Task, TaskComment, TaskVisibility
+from tasks.serializers import TaskSerializer
+from tasks.services import reconcile_task_activity
+
+
+class TaskActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+
+    def setUp(self):
+        self.task = Task.objects.create(title='Ship it', created_by=self.user)
+
+    def test_new_tasks_need_no_repair(self):
+        for index in range(5):
+            Task.objects.create(title=f'Task {index}', created_by=self.user)
+        self.assertGreaterEqual(self.task.last_activity_at, self.task.created_at)
+        self.assertEqual(reconcile_task_activity(Task.objects.all()), 0)
+
+    def test_comments_are_counted(self):
+        comment = TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        TaskComment.objects.create(task=self.task, author=self.user, content='Second')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 2)
+        self.assertGreaterEqual(self.task.last_activity_at, comment.created_at)
+
+        comment.delete()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
+        self.assertEqual(reconcile_task_activity(Task.objects.all()), 0)
+
+    def test_edits_keep_the_counters(self):
+        edits = {
+            'form': lambda stale: TaskForm(
+                {'title': 'Ship it today', 'priority': 'medium', 'status': 'todo'}, instance=stale
+            ),
+            'api': lambda stale: TaskSerializer(stale, data={'title': 'Ship it today'}, partial=True),
+        }
+        for path, edit in edits.items():
+            with self.subTest(path=path):
+                stale = Task.objects.get(pk=self.task.pk)
+                TaskComment.objects.create(task=self.task, author=self.user, content='First')
+                form = edit(stale)
+                self.assertTrue(form.is_valid(), form.errors)
+                form.save()
+                self.task.refresh_from_db()
+                self.assertEqual(self.task.title, 'Ship it today')
+                self.assertEqual(self.task.comment_count, TaskComment.objects.filter(task=self.task).count())
+
+    def test_saving_a_deferred_task_does_not_load_the_overdue_inputs(self):
+        task = Task.objects.only('title').get(pk=self.task.pk)
+        task.title = 'Ship it today'
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertFalse([
+            query for query in queries
+            if '"tasks_task"."due_date"' in query['sql'] or '"tasks_task"."status"' in query['sql']
+        ])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Ship it today')
+
+    def test_deleting_a_task_does_no_work_per_comment(self):
+        queries = []
+        for comments in (1, 5):
+            task = Task.objects.create(title=f'{comments} comments', created_by=self.user)
+            for index in range(comments):
+                TaskComment.objects.create(task=task, author=self.user, content=f'Comment {index}')
+            with CaptureQueriesContext(connection) as context:
+                task.delete()
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_reconcile_repairs_drift(self):
+        TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        Task.objects.filter(pk=self.task.pk).update(comment_count=7)
+        self.assertEqual(reconcile_task_activity(Task.objects.all()), 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
+
+    def test_reconcile_repairs_visibility_copies(self):
+        TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        TaskVisibility.objects.filter(task=self.task).update(comment_count=0)
+        self.assertEqual(reconcile_task_activity(Task.objects.all()), 1)
+        self.assertEqual(self.visibility(), (1, self.task_activity()))
+
+    def test_visibility_rows_follow_the_activity(self):
+        comment = TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        self.assertEqual(self.visibility(), (1, self.task_activity()))
+        comment.delete()
+        self.assertEqual(self.visibility(), (0, self.task_activity()))
+
+        self.task.status = 'done'
+        self.task.save()
+        self.assertEqual(self.visibility(), (0, self.task_activity()))
+
+    def test_activity_orderings(self):
+        quiet = Task.objects.create(title='Quiet', created_by=self.user)
+        TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        self.client.force_login(self.user)
+        for ordering in ('activity', 'comments'):
+            with self.subTest(ordering=ordering):
+                results = self.client.get('/api/tasks/', {'ordering': ordering}).json()['results']
+                self.assertEqual([task['id'] for task in results], [self.task.pk, quiet.pk])
+
+    def test_views_update_the_counters(self):
+        self.client.force_login(self.user)
+        self.client.post(f'/tasks/{self.task.pk}/comment/', {'content': 'Looks good'})
+        comment_id = self.client.post(
+            '/api/comments/', {'task': self.task.pk, 'content': 'Agreed'}, content_type='application/json'
+        ).json()['id']
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 2)
+
+        self.client.delete(f'/api/comments/{comment_id}/')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
+
+    def visibility(self):
+        return TaskVisibility.objects.filter(task=self.task).values_list('comment_count', 'last_activity_at').get()
+
+    def task_activity(self):
+        return Task.objects.values_list('last_activity_at', flat=True).get(pk=self.task.pk)
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from tasks.models import Task, TaskComment
+
+
+class TaskCommentAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='secret')
+        author = User.objects.create_user('alice')
+        release = Task.objects.create(title='Release', created_by=author)
+        other = Task.objects.create(title='Other', created_by=author)
+        cls.matching = TaskComment.objects.create(task=release, author=author, content='Notes for the release')
+        cls.unrelated = TaskComment.objects.create(task=other, author=cls.admin, content='Nothing to see')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def search(self, term):
+        response = self.client.get('/admin/tasks/taskcomment/', {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return set(response.context['cl'].result_list)
+
+    def test_words_match_anywhere_in_the_search_document(self):
+        self.assertEqual(self.search('release notes'), {self.matching})
+
+    def test_author_username(self):
+        self.assertEqual(self.search('admin'), {self.unrelated})
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from tasks import views
+from tasks.models import Task
+
+
+class MarkCompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        cls.task = Task.objects.create(title='Ship it', created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_completes_the_task(self):
+        response = self.client.post(f'/api/tasks/{self.task.pk}/mark_complete/')
+        self.assertEqual(response.json(), {'status': 'success', 'updated': True})
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'done')
+        self.assertIsNotNone(self.task.completed_at)
+
+    def test_invisible_task_is_not_found(self):
+        other = User.objects.create_user('bob')
+        task = Task.objects.create(title='Not yours', created_by=other)
+        self.assertEqual(self.client.post(f'/api/tasks/{task.pk}/mark_complete/').status_code, 404)
+
+    def test_non_numeric_id_is_not_found(self):
+        self.assertEqual(self.client.post('/api/tasks/abc/mark_complete/').status_code, 404)
+
+
+class BulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(title='Ship it', created_by=self.user)
+
+    def bulk_update(self, **attrs):
+        response = self.client.patch(
+            '/api/tasks/bulk/', [{'id': self.task.pk, **attrs}], content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.task.refresh_from_db()
+
+    def test_completing_sets_completed_at(self):
+        self.bulk_update(status='done')
+        self.assertEqual(self.task.status, 'done')
+        self.assertIsNotNone(self.task.completed_at)
+
+    def test_reopening_clears_completed_at(self):
+        self.bulk_update(status='done')
+        self.bulk_update(status='todo')
+        self.assertEqual(self.task.status, 'todo')
+        self.assertIsNone(self.task.completed_at)
+
+    def test_other_fields_keep_completed_at(self):
+        self.bulk_update(status='done')
+        completed_at = self.task.completed_at
+        self.bulk_update(status='done', title='Shipped')
+        self.assertEqual((self.task.title, self.task.completed_at), ('Shipped', completed_at))
+
+    def test_boolean_ids_are_not_found(self):
+        response = self.client.patch(
+            '/api/tasks/bulk/', [{'id': True, 'title': 'Renamed'}], content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['results'][0]['errors']['id'], ['Task not found.'])
+
+    def test_only_changed_fields_are_written(self):
+        other = Task.objects.create(title='Review it', created_by=self.user)
+        serializer = views.bulk_task_serializer
+
+        def edit_concurrently(*args, **kwargs):
+            # Lands after the batch loaded its tasks, like a concurrent request
+            Task.objects.filter(pk=other.pk).update(title='Edited elsewhere')
+            Task.objects.filter(pk=self.task.pk).update(priority='high')
+            return serializer(*args, **kwargs)
+
+        with mock.patch.object(views, 'bulk_task_serializer', edit_concurrently):
+            response = self.client.patch(
+                '/api/tasks/bulk/', [{'id': self.task.pk, 'title': 'Shipped'}, {'id': other.pk, 'status': 'done'}],
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.task.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.priority), ('Shipped', 'high'))
+        self.assertEqual((other.title, other.status), ('Edited elsewhere', 'done'))
@@ -0,0 +1,151 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from tasks.attachments import RangeNotSatisfiable, parse_range
+from tasks.models import AttachmentBlob, Task, TaskAttachment, UploadSession
+
+CONTENT = b'0123456789' * 10
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=3-', 10), (3, 10))
+        self.assertEqual(parse_range('bytes=2-4', 10), (2, 5))
+        self.assertEqual(parse_range('bytes=8-20', 10), (8, 10))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 10))
+        self.assertEqual(parse_range('bytes=-30', 10), (0, 10))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=-0', 10)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=-3', 0)
+
+    def test_start_past_the_end(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=10-', 10)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=12-15', 10)
+
+    def test_whole_file_answers(self):
+        for header in (None, '', 'bytes=-', 'bytes=5-2', 'bytes=0-1,3-4', 'items=0-1'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 10))
+
+
+class AttachmentTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        cls.task = Task.objects.create(title='Ship it', created_by=cls.user)
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(MEDIA_ROOT=f'{directory}/media', TASKS_UPLOAD_DIR=f'{directory}/uploads')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.user)
+
+    def start(self, content=CONTENT, **fields):
+        response = self.client.post('/api/uploads/', {
+            'task': self.task.pk, 'filename': 'notes.txt', 'size': len(content), **fields,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def put(self, session_id, content, first, last=None, size=len(CONTENT)):
+        last = first + len(content) - 1 if last is None else last
+        return self.client.put(
+            f'/api/uploads/{session_id}/', content, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {first}-{last}/{size}',
+        )
+
+    def upload(self, content=CONTENT, **fields):
+        session_id = self.start(content, **fields)
+        self.assertEqual(self.put(session_id, content[:40], 0).status_code, 200)
+        return self.put(session_id, content[40:], 40, size=len(content))
+
+
+class AttachmentUploadTests(AttachmentTestCase):
+    def test_chunks_complete_the_upload(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 201, response.content)
+        attachment = TaskAttachment.objects.get(pk=response.json()['id'])
+        self.assertEqual(attachment.blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+        with attachment.file.open('rb') as file:
+            self.assertEqual(file.read(), CONTENT)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_out_of_order_chunks_are_refused(self):
+        session_id = self.start()
+        response = self.put(session_id, CONTENT[40:], 40)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 0)
+
+    def test_duplicate_chunks_are_refused(self):
+        session_id = self.start()
+        self.assertEqual(self.put(session_id, CONTENT[:40], 0).status_code, 200)
+        response = self.put(session_id, CONTENT[:40], 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 40)
+
+    def test_ranges_outside_the_upload_are_refused(self):
+        session_id = self.start()
+        self.assertEqual(self.put(session_id, CONTENT[:40], 0, size=len(CONTENT) + 1).status_code, 416)
+        self.assertEqual(self.put(session_id, CONTENT[:40], 0, last=len(CONTENT)).status_code, 416)
+
+    def test_short_chunks_are_refused(self):
+        session_id = self.start()
+        response = self.put(session_id, CONTENT[:30], 0, last=39)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).offset, 0)
+
+    def test_sha256_mismatch_restarts_the_upload(self):
+        response = self.upload(sha256=hashlib.sha256(b'other').hexdigest())
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()['offset'], 0)
+        self.assertFalse(TaskAttachment.objects.exists())
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_identical_content_is_stored_once(self):
+        first = TaskAttachment.objects.get(pk=self.upload().json()['id'])
+        second = TaskAttachment.objects.get(pk=self.upload().json()['id'])
+        self.assertEqual(AttachmentBlob.objects.count(), 1)
+        self.assertEqual((first.blob_id, first.file.name), (second.blob_id, second.file.name))
+        _, files = default_storage.listdir(first.file.name.rsplit('/', 1)[0])
+        self.assertEqual(len(files), 1)
+
+
+class AttachmentDownloadTests(AttachmentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.attachment = TaskAttachment.objects.get(pk=self.upload().json()['id'])
+        self.url = f'/attachments/{self.attachment.pk}/'
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(self.content(response), CONTENT[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range(self):
+        response = self.client.get(self.url)
+        response.close()
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, self.content(response)), (206, CONTENT[-5:]))
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, self.content(response)), (200, CONTENT))
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+import warnings
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+from tasks.caching import cache
+from tasks.categories import registry as category_registry
+from tasks.models import Category, Task, TaskComment, TaskVisibility
+
+
+class BenchmarkCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.directory)
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media.disable()
+        shutil.rmtree(cls.directory)
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_load_data', '--users', '5', '--categories', '2', '--tasks', '60',
+            '--batch-size', '25', '--prefix', 'smoke', stdout=StringIO(),
+        )
+
+    def setUp(self):
+        # Other tests leave versions and categories of rolled back rows behind
+        cache.clear()
+        category_registry.clear()
+
+    def test_generated_data(self):
+        self.assertEqual(User.objects.filter(username__startswith='smoke-user-').count(), 5)
+        self.assertTrue(User.objects.get(username='smoke-admin').is_superuser)
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertEqual(Task.objects.count(), 60)
+        # Bulk-created tasks still get visibility rows and activity counters
+        self.assertEqual(TaskVisibility.objects.filter(user=F('task__created_by')).count(), 60)
+        counts = Task.objects.annotate(counted=Count('comments')).values_list('comment_count', 'counted')
+        self.assertTrue(all(stored == counted for stored, counted in counts))
+        self.assertTrue(TaskComment.objects.exists())
+
+    def test_benchmarks_run_and_compare_with_the_baseline(self):
+        baseline = os.path.join(self.directory, 'baseline.json')
+        options = ['--iterations', '1', '--warmup', '0', '--baseline', baseline]
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            call_command('run_benchmarks', *options, '--save', stdout=StringIO())
+
+        with open(baseline) as file:
+            saved = json.load(file)
+        self.assertEqual(saved['meta']['tasks'], 60)
+        results = saved['results']
+        self.assertIn('admin task changelist', results)
+        self.assertIn('task list due_date_from+due_date_to', results)
+        self.assertEqual(sum(name.startswith('task list ') for name in results), 30)
+        failed = {name: result['status'] for name, result in results.items() if max(result['status']) >= 400}
+        self.assertEqual(failed, {})
+
+        stdout = StringIO()
+        call_command('run_benchmarks', *options, '--only', 'dashboard', '--tolerance', '1000', stdout=stdout)
+        self.assertIn('Compared with the baseline', stdout.getvalue())
+        self.assertNotIn('REGRESSION', stdout.getvalue())
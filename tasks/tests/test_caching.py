@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from tasks.checks import check_shared_cache
+from tasks.models import Category, Task, TaskComment
+
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+DUMMY = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+class ConditionalTaskResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        cls.category = Category.objects.create(name='Release')
+        cls.task = Task.objects.create(title='Ship it', created_by=cls.user, category=cls.category)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.paths = [
+            f'/tasks/{self.task.pk}/',
+            f'/api/tasks/{self.task.pk}/',
+            f'/api/tasks/{self.task.pk}/comments/',
+            f'/api/async/tasks/{self.task.pk}/',
+        ]
+
+    def etags(self):
+        return {path: self.client.get(path)['ETag'] for path in self.paths}
+
+    def assertRefetched(self, etags):
+        for path, etag in etags.items():
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unchanged_pages_are_not_modified(self):
+        for path, etag in self.etags().items():
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_comments_change_the_etag(self):
+        etags = self.etags()
+        comment = TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        self.assertRefetched(etags)
+
+        etags = self.etags()
+        comment.delete()
+        self.assertRefetched(etags)
+
+    def test_category_changes_change_the_etag(self):
+        etags = self.etags()
+        self.category.name = 'Launch'
+        self.category.save()
+        self.assertRefetched(etags)
+
+    def test_if_modified_since_alone_is_not_answered_with_304(self):
+        response = self.client.get(self.paths[0])
+        self.assertNotIn('Last-Modified', response)
+        TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        for path in self.paths:
+            with self.subTest(path=path):
+                response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=http_date(timezone.now().timestamp()))
+                self.assertEqual(response.status_code, 200)
+
+    def test_cached_pages_are_not_served_to_other_users(self):
+        self.etags()
+        User.objects.create_user('bob')
+        self.client.force_login(User.objects.get(username='bob'))
+        for path in self.paths:
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+
+
+@override_settings(TASKS_CACHE_ENABLED=False, CACHES={'default': LOCMEM, 'tasks': DUMMY})
+class DisabledCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        cls.task = Task.objects.create(title='Ship it', created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_are_rendered_fresh_without_etags(self):
+        paths = [f'/api/tasks/{self.task.pk}/', '/api/tasks/', f'/api/async/tasks/{self.task.pk}/']
+        for number, path in enumerate(paths):
+            with self.subTest(path=path):
+                self.client.get(path)
+                # As another worker would, without invalidating anything here
+                Task.objects.filter(pk=self.task.pk).update(title=f'Renamed {number}')
+                response = self.client.get(path)
+                self.assertNotIn('ETag', response)
+                self.assertContains(response, f'Renamed {number}')
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_locmem_is_rejected_outside_debug_and_tests(self):
+        with override_settings(DEBUG=False, TESTING=False, CACHES={'default': LOCMEM, 'tasks': LOCMEM}):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['tasks.E001'])
+        with override_settings(DEBUG=False, TESTING=False, CACHES={'default': LOCMEM, 'tasks': DUMMY}):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(DEBUG=True, CACHES={'default': LOCMEM, 'tasks': LOCMEM}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,91 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from tasks.caching import invalidate_categories
+from tasks.categories import CategoryRegistry
+from tasks.models import Category
+
+
+class CategoryRegistryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Release')
+
+    def setUp(self):
+        self.registry = CategoryRegistry()
+        self.registry.check_interval = 0
+
+    def test_serves_categories_and_their_serialized_form(self):
+        self.assertEqual(self.registry.all(), [self.category])
+        self.assertEqual(self.registry.get(str(self.category.pk)), self.category)
+        self.assertIsNone(self.registry.get('abc'))
+        self.assertEqual(self.registry.serialized(self.category.pk)['name'], 'Release')
+
+    def test_reloads_when_the_version_changes(self):
+        self.registry.warm()
+        Category.objects.filter(pk=self.category.pk).update(name='Launch')
+        invalidate_categories()
+        self.assertEqual(self.registry.serialized(self.category.pk)['name'], 'Launch')
+
+    def test_serialized_survives_a_concurrent_clear(self):
+        snapshot = self.registry._snapshot
+
+        def snapshot_then_clear():
+            loaded = snapshot()
+            self.registry.clear()
+            return loaded
+
+        with mock.patch.object(self.registry, '_snapshot', snapshot_then_clear):
+            self.assertEqual(self.registry.serialized(self.category.pk)['name'], 'Release')
+
+
+BUMP_IN_ANOTHER_PROCESS = """
+import sys
+from django.conf import settings
+settings.configure(CACHES={'tasks': {'BACKEND': sys.argv[1], 'LOCATION': sys.argv[2]}})
+from tasks.caching import invalidate_categories
+invalidate_categories()
+"""
+
+
+class CrossProcessRegistryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Release')
+
+    def setUp(self):
+        self.registry = CategoryRegistry()
+        self.registry.check_interval = 0
+
+    def rename_elsewhere(self, name):
+        # Like another worker: the row changes and nothing here is told
+        Category.objects.filter(pk=self.category.pk).update(name=name)
+
+    def test_reloads_when_another_process_changes_the_version(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+        with override_settings(CACHES={'default': cache, 'tasks': cache}):
+            self.registry.warm()
+            self.rename_elsewhere('Launch')
+            self.assertEqual(self.registry.serialized(self.category.pk)['name'], 'Release')
+
+            subprocess.run(
+                [sys.executable, '-c', BUMP_IN_ANOTHER_PROCESS, cache['BACKEND'], location],
+                cwd=settings.BASE_DIR, check=True,
+            )
+            self.assertEqual(self.registry.serialized(self.category.pk)['name'], 'Launch')
+
+    @override_settings(
+        TASKS_CACHE_ENABLED=False,
+        CACHES={'default': settings.CACHES['default'], 'tasks': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    )
+    def test_reloads_every_check_without_a_shared_cache(self):
+        self.registry.warm()
+        self.rename_elsewhere('Launch')
+        self.assertEqual(self.registry.serialized(self.category.pk)['name'], 'Launch')
@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from tasks.management.commands.explain_queries import find_full_scans
+from tasks.models import Task
+
+
+class FindFullScansTests(SimpleTestCase):
+    def test_index_searches_pass(self):
+        plan = (
+            '6 0 0 SEARCH tasks_taskvisibility USING COVERING INDEX task_visibility_recent_idx (user_id=?)\n'
+            '12 0 0 SEARCH tasks_task USING INTEGER PRIMARY KEY (rowid=?)\n'
+            '2 0 0 SCAN CONSTANT ROW'
+        )
+        self.assertEqual(find_full_scans(plan, 'sqlite'), [])
+
+    def test_full_index_scans_are_flagged(self):
+        # The overdue sweep walked the whole keyset index in Meta.ordering order
+        plan = '4 0 0 SCAN tasks_task USING INDEX task_created_keyset_idx'
+        self.assertEqual(find_full_scans(plan, 'sqlite'), ['tasks_task'])
+
+    def test_table_scans_are_flagged(self):
+        self.assertEqual(find_full_scans('3 0 0 SCAN tasks_taskcomment', 'sqlite'), ['tasks_taskcomment'])
+        self.assertEqual(find_full_scans('Seq Scan on tasks_task  (cost=0.00..1.01)', 'postgresql'), ['tasks_task'])
+
+    def test_fts_matches_pass_but_fts_scans_do_not(self):
+        self.assertEqual(find_full_scans('7 0 0 SCAN tasks_task_fts VIRTUAL TABLE INDEX 0:M3', 'sqlite'), [])
+        self.assertEqual(find_full_scans('7 0 0 SCAN tasks_task_fts VIRTUAL TABLE INDEX 0:', 'sqlite'), ['tasks_task_fts'])
+
+    def test_unsupported_vendor(self):
+        self.assertIsNone(find_full_scans('anything', 'oracle'))
+
+
+class ExplainQueriesCommandTests(TestCase):
+    def test_reports_every_query(self):
+        user = User.objects.create_user('alice')
+        Task.objects.create(title='Ship it', created_by=user)
+        out = StringIO()
+        call_command('explain_queries', user='alice', stdout=out)
+        self.assertIn('api /api/tasks/', out.getvalue())
+        self.assertIn('overdue sweep', out.getvalue())
+        self.assertIn('admin tasks ?q=task', out.getvalue())
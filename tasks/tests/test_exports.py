@@ -0,0 +1,73 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from tasks.models import Category, Task
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='secret')
+        cls.bob = User.objects.create_user('bob')
+        category = Category.objects.create(name='Release')
+        cls.shipped = Task.objects.create(
+            title='Ship it', status='done', priority='high', created_by=cls.alice,
+            assigned_to=cls.bob, category=category,
+        )
+        cls.loose = Task.objects.create(title='Tidy up, "soon"', created_by=cls.alice)
+        Task.objects.create(title='Not yours', created_by=cls.bob)
+
+    def setUp(self):
+        self.client.force_login(self.alice)
+
+    def export(self, **params):
+        response = self.client.get('/tasks/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(StringIO(self.export())))
+        self.assertEqual([row['title'] for row in rows], ['Tidy up, "soon"', 'Ship it'])
+        loose, shipped = rows
+        self.assertEqual(
+            {name: shipped[name] for name in ('id', 'status', 'category', 'created_by', 'assigned_to', 'overdue')},
+            {
+                'id': str(self.shipped.pk), 'status': 'done', 'category': 'Release',
+                'created_by': 'alice', 'assigned_to': 'bob', 'overdue': 'False',
+            },
+        )
+        self.assertEqual(shipped['created_at'], self.shipped.created_at.isoformat())
+        self.assertEqual((loose['category'], loose['assigned_to'], loose['due_date']), ('', '', ''))
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export(format='ndjson').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.loose.pk, self.shipped.pk])
+        loose, shipped = rows
+        self.assertEqual((shipped['category'], shipped['assigned_to'], shipped['comment_count']), ('Release', 'bob', 0))
+        self.assertEqual((loose['category'], loose['assigned_to'], loose['completed_at']), (None, None, None))
+
+    def test_filtered_export(self):
+        rows = list(csv.DictReader(StringIO(self.export(status='done'))))
+        self.assertEqual([row['title'] for row in rows], ['Ship it'])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get('/tasks/export/', {'format': 'xml'}).status_code, 400)
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('export_tasks', '--user', 'alice', '--status', 'done', stdout=stdout)
+        self.assertEqual([row['title'] for row in csv.DictReader(StringIO(stdout.getvalue()))], ['Ship it'])
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'tasks.ndjson')
+        call_command('export_tasks', '--format', 'ndjson', '--output', path)
+        with open(path) as file:
+            self.assertEqual(len(file.readlines()), 3)
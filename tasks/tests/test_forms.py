@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from tasks.forms import TaskFilterForm
+
+
+class UserAutocompleteWidgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+
+    def test_renders_only_the_selected_user(self):
+        other = User.objects.create_user('bob')
+        html = str(TaskFilterForm({'assigned_to': self.user.pk})['assigned_to'])
+        self.assertIn('alice', html)
+        self.assertNotIn(other.username, html)
+
+    def test_invalid_value_is_a_filter_error(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/tasks/', {'assigned_to': 'abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['filter_form'].is_valid())
@@ -0,0 +1,114 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from tasks.management.commands import import_tasks
+from tasks.models import Category, Task
+from tasks.search import search_tasks
+
+
+class ImportTasksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+        cls.category = Category.objects.create(name='Release')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'tasks.csv')
+        self.checkpoint = f'{self.path}.checkpoint'
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, ['title', 'status', 'created_by', 'assigned_to', 'category'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def rows(self, count):
+        return [
+            {'title': f'Task {number}', 'status': 'todo', 'created_by': 'alice', 'assigned_to': 'bob'}
+            for number in range(1, count + 1)
+        ]
+
+    def run_import(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_tasks', self.path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def titles(self):
+        return sorted(Task.objects.values_list('title', flat=True))
+
+    def test_imports_tasks_visible_and_searchable(self):
+        self.write_csv([{
+            'title': 'Ship the release', 'status': 'in_progress',
+            'created_by': 'alice', 'assigned_to': 'bob', 'category': 'Release',
+        }])
+        self.run_import()
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.assigned_to, task.category), ('in_progress', self.bob, self.category))
+        for user in (self.alice, self.bob):
+            self.assertEqual(list(Task.objects.visible_to(user)), [task])
+        self.assertEqual(list(search_tasks(Task.objects.all(), 'release')), [task])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = self.rows(3)
+        rows[1]['status'] = 'someday'
+        rows[2]['assigned_to'] = 'carol'
+        self.write_csv(rows)
+        stdout, stderr = self.run_import()
+        self.assertEqual(self.titles(), ['Task 1'])
+        self.assertIn('Row 2: status:', stderr)
+        self.assertIn("Row 3: assigned_to: Unknown user 'carol'.", stderr)
+        self.assertIn('Imported 1 tasks, skipped 2 invalid rows', stdout)
+
+    def test_ndjson_rows(self):
+        self.path = self.path.replace('.csv', '.ndjson')
+        with open(self.path, 'w') as file:
+            file.write(json.dumps({'title': 'From JSON', 'created_by': 'alice'}) + '\n')
+            file.write('not json\n')
+        stdout, stderr = self.run_import()
+        self.assertEqual(self.titles(), ['From JSON'])
+        self.assertIn('Row 2: row: Expected an object.', stderr)
+
+    def test_resumes_after_the_last_committed_batch(self):
+        self.write_csv(self.rows(5))
+        refresh = import_tasks.refresh_after_bulk_create
+        calls = []
+
+        def fail_second_batch(tasks):
+            calls.append(tasks)
+            if len(calls) == 2:
+                raise RuntimeError('Interrupted')
+            refresh(tasks)
+
+        with mock.patch.object(import_tasks, 'refresh_after_bulk_create', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.run_import('--batch-size', '2')
+        # The failed batch was rolled back and is not in the checkpoint
+        self.assertEqual(self.titles(), ['Task 1', 'Task 2'])
+        with open(self.checkpoint) as file:
+            self.assertEqual(json.load(file), {'rows': 2})
+
+        stdout, _ = self.run_import('--batch-size', '2')
+        self.assertIn('Resuming after row 2', stdout)
+        self.assertEqual(self.titles(), [f'Task {number}' for number in range(1, 6)])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_restart_ignores_the_checkpoint(self):
+        self.write_csv(self.rows(3))
+        with open(self.checkpoint, 'w') as file:
+            json.dump({'rows': 2}, file)
+        stdout, _ = self.run_import('--restart')
+        self.assertNotIn('Resuming', stdout)
+        self.assertEqual(self.titles(), ['Task 1', 'Task 2', 'Task 3'])
+        self.assertFalse(os.path.exists(self.checkpoint))
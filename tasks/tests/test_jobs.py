@@ -0,0 +1,117 @@
+from concurrent.futures import Future
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from tasks import jobs
+from tasks.management.commands import run_workers
+from tasks.models import Job, Task, TaskComment
+from tasks.notifications import notify_comment, send_email
+
+calls = []
+
+
+@jobs.job(name='tests.flaky', max_attempts=2)
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise ValueError('Flaky')
+
+
+class InlinePool:
+    """Runs submitted jobs right away, in the test's own database transaction"""
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@override_settings(TASKS_JOBS_EAGER=False)
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        # Workers close their connections between jobs; tests share one
+        patcher = mock.patch.object(jobs, 'close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def claim_and_run(self):
+        claimed = jobs.claim_jobs(10)
+        for pk in claimed:
+            jobs.run_job(pk)
+        return claimed
+
+    def test_claimed_jobs_run_and_are_deleted(self):
+        queued = jobs.enqueue(send_email, 'Hello', 'Body', ['alice@example.com'])
+        claimed = jobs.claim_jobs(10)
+        self.assertEqual(claimed, [queued.pk])
+        self.assertEqual(Job.objects.values_list('status', 'attempts').get(), ('running', 1))
+        self.assertEqual(jobs.claim_jobs(10), [])
+
+        jobs.run_job(queued.pk)
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual([message.to for message in mail.outbox], [['alice@example.com']])
+
+    def test_delayed_jobs_wait(self):
+        jobs.enqueue(flaky, False, delay=60)
+        self.assertEqual(self.claim_and_run(), [])
+        self.assertEqual(calls, [])
+
+    def test_failures_are_retried_then_kept_as_failed(self):
+        queued = jobs.enqueue(flaky, True)
+        with self.assertLogs('tasks.jobs', 'WARNING'):
+            self.claim_and_run()
+        job = Job.objects.get(pk=queued.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_at), ('queued', 1, None))
+        self.assertIn('ValueError: Flaky', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        # Not due before its backoff delay
+        self.assertEqual(self.claim_and_run(), [])
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('tasks.jobs', 'ERROR'):
+            self.claim_and_run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(calls, [True, True])
+
+    def test_lost_jobs_are_queued_again(self):
+        queued = jobs.enqueue(flaky, False)
+        jobs.claim_jobs(10)
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.requeue_lost_jobs(), 1)
+        self.assertEqual(self.claim_and_run(), [queued.pk])
+        self.assertEqual(calls, [False])
+
+    def test_comment_notifications_fan_out_per_recipient(self):
+        alice = User.objects.create_user('alice', 'alice@example.com')
+        bob = User.objects.create_user('bob', 'bob@example.com')
+        task = Task.objects.create(title='Ship it', created_by=alice, assigned_to=bob)
+        comment = TaskComment.objects.create(task=task, author=bob, content='Done')
+        Job.objects.all().delete()
+
+        notify_comment(comment.pk)
+        self.assertEqual(Job.objects.get().name, send_email.job_name)
+        self.claim_and_run()
+        self.assertEqual([message.to for message in mail.outbox], [['alice@example.com']])
+
+    def test_run_workers_burst(self):
+        jobs.enqueue(send_email, 'Hello', 'Body', ['alice@example.com'])
+        failing = jobs.enqueue(flaky, True)
+        stdout = StringIO()
+        with mock.patch.object(run_workers.Command, 'create_pool', return_value=InlinePool()), \
+                mock.patch.object(run_workers, 'close_old_connections'), \
+                mock.patch.object(run_workers.signal, 'signal'), \
+                self.assertLogs('tasks.jobs', 'WARNING'):
+            call_command('run_workers', '--burst', '--processes', '2', '--poll-interval', '0', stdout=stdout)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(Job.objects.values_list('pk', 'status', 'attempts').get(), (failing.pk, 'queued', 1))
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from tasks.caching import cache
+from tasks.models import Task, Watermark
+from tasks.services import OVERDUE_SWEEP_WATERMARK, sweep_overdue_tasks
+
+
+class OverdueSweepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice')
+
+    def test_flags_tasks_past_their_due_date(self):
+        now = timezone.now()
+        task = Task.objects.create(title='Ship it', created_by=self.user, due_date=now + timedelta(hours=1))
+        Task.objects.create(title='Shipped', created_by=self.user, due_date=now + timedelta(hours=1), status='done')
+        self.assertEqual(sweep_overdue_tasks(now), 0)
+
+        self.assertEqual(sweep_overdue_tasks(now + timedelta(hours=2)), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.overdue_since, task.due_date)
+
+    def test_watermark_is_kept_in_the_database(self):
+        now = timezone.now()
+        sweep_overdue_tasks(now)
+        self.assertEqual(Watermark.objects.get(name=OVERDUE_SWEEP_WATERMARK).value, now)
+
+        # Another process, with its own cache, only looks past the watermark
+        cache.clear()
+        Task.objects.filter(pk=Task.objects.create(
+            title='Missed', created_by=self.user, due_date=now - timedelta(hours=1)
+        ).pk).update(overdue_since=None)
+        self.assertEqual(sweep_overdue_tasks(now + timedelta(minutes=1)), 0)
+        self.assertEqual(Watermark.objects.get(name=OVERDUE_SWEEP_WATERMARK).value, now + timedelta(minutes=1))
@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from tasks.models import Task, TaskComment
+
+
+class TaskPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        other = User.objects.create_user('bob')
+        cls.tasks = [Task.objects.create(title=f'Task {n}', created_by=cls.user) for n in range(25)]
+        Task.objects.create(title='Not yours', created_by=other)
+        cls.newest_first = [task.pk for task in reversed(cls.tasks)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_api_pages_follow_the_visibility_keys(self):
+        for path in ('/api/tasks/', '/api/async/tasks/'):
+            with self.subTest(path=path):
+                seen, url, pages = [], path, []
+                while url:
+                    payload = self.client.get(url).json()
+                    pages.append(payload)
+                    seen += [task['id'] for task in payload['results']]
+                    url = payload['next']
+                self.assertEqual(seen, self.newest_first)
+                self.assertEqual(len(pages), 3)
+
+                previous = self.client.get(pages[1]['previous']).json()
+                self.assertEqual([task['id'] for task in previous['results']], self.newest_first[:10])
+
+    def test_api_orderings(self):
+        TaskComment.objects.create(task=self.tasks[3], author=self.user, content='First')
+        for path in ('/api/tasks/', '/api/async/tasks/'):
+            with self.subTest(path=path):
+                payload = self.client.get(path, {'ordering': 'comments'}).json()
+                self.assertEqual(payload['results'][0]['id'], self.tasks[3].pk)
+                response = self.client.get(path, {'ordering': 'title'})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ordering', response.json())
+
+    def test_task_list_pages(self):
+        seen, query = [], ''
+        while query is not None:
+            response = self.client.get(f'/tasks/?{query}')
+            seen += [task.pk for task in response.context['tasks']]
+            query = response.context['next_query']
+        self.assertEqual(seen, self.newest_first)
+
+    def test_dashboard_recent_tasks(self):
+        response = self.client.get('/api/async/dashboard/')
+        self.assertEqual([task['id'] for task in response.json()['recent_tasks']], self.newest_first[:5])
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from tasks.caching import cache
+from tasks.models import Category, Task, TaskComment
+from tasks.optimization import QueryBudgetExceeded
+from tasks.views import TaskViewSet
+
+
+class QueryCountTests(TestCase):
+    """Query counts of the main pages, on a cold cache and with enough rows to expose N+1 queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        assignee = User.objects.create_user('bob')
+        category = Category.objects.create(name='Release')
+        cls.tasks = [
+            Task.objects.create(title=f'Task {n}', created_by=cls.user, assigned_to=assignee, category=category)
+            for n in range(12)
+        ]
+        for task in cls.tasks:
+            for n in range(3):
+                TaskComment.objects.create(task=task, author=assignee, content=f'Comment {n}')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        cache.clear()
+        self.task = self.tasks[0]
+
+    def assertQueries(self, count, path):
+        with self.assertNumQueries(count):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_list(self):
+        self.assertQueries(3, '/tasks/')
+
+    def test_task_detail(self):
+        self.assertQueries(5, f'/tasks/{self.task.pk}/')
+
+    def test_dashboard(self):
+        self.assertQueries(4, '/')
+
+    def test_api_task_list(self):
+        self.assertQueries(3, '/api/tasks/')
+
+    def test_api_task_detail(self):
+        self.assertQueries(5, f'/api/tasks/{self.task.pk}/')
+
+    def test_api_task_comments(self):
+        self.assertQueries(4, f'/api/tasks/{self.task.pk}/comments/')
+
+    def test_api_comment_list(self):
+        self.assertQueries(3, '/api/comments/')
+
+    def test_api_category_list(self):
+        self.assertQueries(3, '/api/categories/')
+
+    def test_async_task_list(self):
+        self.assertQueries(3, '/api/async/tasks/')
+
+    def test_async_dashboard(self):
+        self.assertQueries(4, '/api/async/dashboard/')
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        cache.clear()
+
+    @mock.patch.object(TaskViewSet, 'query_budgets', {'list': 0})
+    def test_over_budget_raises_under_the_test_runner(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/api/tasks/')
+
+    @mock.patch.object(TaskViewSet, 'query_budgets', {'list': 0})
+    @override_settings(QUERY_BUDGETS_RAISE=False)
+    def test_over_budget_is_logged_elsewhere(self):
+        with self.assertLogs('tasks.optimization', 'WARNING') as logs:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('TaskViewSet.list ran', logs.output[0])
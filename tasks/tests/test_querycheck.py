@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from tasks.models import Task
+from tasks.querycheck import QueryProblem, checked_queries, normalize_sql
+
+
+class NormalizeSQLTests(SimpleTestCase):
+    def test_literals_and_in_lists_compare_equal(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id = 1 AND name = 'a''b' AND pk IN (%s, %s)"),
+            normalize_sql("SELECT * FROM t WHERE id = 22 AND name = 'c' AND pk IN (%s)"),
+        )
+
+
+@override_settings(TASKS_NPLUSONE_THRESHOLD=5, TASKS_SLOW_QUERY_MS=10000)
+class QueryCheckTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(6):
+            user = User.objects.create_user(f'user{n}')
+            Task.objects.create(title=f'Task {n}', created_by=user)
+
+    def test_repeated_lookups_are_an_n_plus_one(self):
+        with self.assertRaises(QueryProblem) as raised:
+            with checked_queries():
+                [task.created_by.username for task in Task.objects.all()]
+        self.assertIn('N+1: 6 queries', str(raised.exception))
+        self.assertIn('test_querycheck.py', str(raised.exception))
+
+    def test_joined_lookups_pass(self):
+        with checked_queries():
+            [task.created_by.username for task in Task.objects.select_related('created_by')]
+
+    def test_queries_below_the_threshold_pass(self):
+        with checked_queries():
+            [task.created_by.username for task in Task.objects.all()[:4]]
+
+    def test_same_shape_from_different_call_sites_pass(self):
+        tasks = list(Task.objects.all())
+        with checked_queries():
+            for task in tasks[:3]:
+                task.created_by.username
+            for task in tasks[3:]:
+                task.created_by.username
+
+    def test_problems_are_logged_when_not_raising(self):
+        with self.assertLogs('tasks.querycheck', 'WARNING') as logs:
+            with checked_queries(raise_errors=False):
+                [task.created_by.username for task in Task.objects.all()]
+        self.assertIn('N+1', logs.output[0])
+
+    @override_settings(TASKS_SLOW_QUERY_MS=0)
+    def test_slow_queries(self):
+        with self.assertRaisesMessage(QueryProblem, 'Slow query'):
+            with checked_queries():
+                Task.objects.count()
+
+    def test_checked_requests_pass(self):
+        self.client.force_login(User.objects.get(username='user0'))
+        with checked_queries():
+            self.assertEqual(self.client.get('/tasks/').status_code, 200)
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from tasks.models import Task
+from tasks.search import search_tasks
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='secret')
+        Task.objects.create(title='Write the release notes', created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_ranked_matches(self):
+        tasks = search_tasks(Task.objects.all(), 'release')
+        self.assertEqual([task.title for task in tasks], ['Write the release notes'])
+
+    def test_punctuation_only_query_matches_nothing(self):
+        self.assertEqual(list(search_tasks(Task.objects.all(), '"')), [])
+
+    def test_punctuation_only_query_in_listings(self):
+        for path in ('/tasks/', '/api/tasks/', '/api/async/tasks/'):
+            with self.subTest(path=path):
+                response = self.client.get(path, {'search': '"'})
+                self.assertEqual(response.status_code, 200)
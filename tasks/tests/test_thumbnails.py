@@ -0,0 +1,81 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from tasks import thumbnails
+from tasks.models import AttachmentBlob, DerivedAsset, Task, TaskAttachment
+
+
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice')
+        cls.task = Task.objects.create(title='Ship it', created_by=cls.user)
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(MEDIA_ROOT=directory, TASKS_DERIVED_CACHE_MAX_BYTES=1000)
+        override.enable()
+        self.addCleanup(override.disable)
+        thumbnails._unchecked_bytes = 0
+        self.addCleanup(setattr, thumbnails, '_unchecked_bytes', 0)
+
+    def attach_image(self, color):
+        output = io.BytesIO()
+        Image.new('RGB', (300, 200), f'#{color}').save(output, 'PNG')
+        blob = AttachmentBlob.objects.create(
+            sha256=color * 8, size=output.tell(),
+            file=default_storage.save(f'attachment_blobs/{color}.png', ContentFile(output.getvalue())),
+        )
+        return TaskAttachment.objects.create(
+            task=self.task, uploaded_by=self.user, blob=blob, filename=f'{color}.png', file=blob.file.name,
+        )
+
+    def add_asset(self, blob, name, accessed_minutes_ago, size=100):
+        return DerivedAsset.objects.create(
+            key=name, source=blob, size=size, width=1, height=1,
+            file=default_storage.save(f'derived/{name}.webp', ContentFile(b'x' * size)),
+            last_accessed_at=timezone.now() - timedelta(minutes=accessed_minutes_ago),
+        )
+
+    def test_renders_once_per_size(self):
+        attachment = self.attach_image('ff0000')
+        asset = thumbnails.get_thumbnail(attachment, 'small')
+        self.assertEqual((asset.width, asset.height), (64, 43))
+        self.assertTrue(default_storage.exists(asset.file.name))
+        self.assertEqual(thumbnails.get_thumbnail(attachment, 'small').pk, asset.pk)
+        with self.assertRaises(thumbnails.ThumbnailError):
+            thumbnails.get_thumbnail(attachment, 'huge')
+
+    def test_least_recently_used_are_evicted_first(self):
+        blob = self.attach_image('00ff00').blob
+        # Created in a different order from their last use
+        assets = {
+            name: self.add_asset(blob, name, minutes)
+            for name, minutes in (('recent', 1), ('oldest', 30), ('newest', 0), ('older', 20), ('old', 10))
+        }
+        # 500 bytes against a limit of 300: evicts down to 270
+        with override_settings(TASKS_DERIVED_CACHE_MAX_BYTES=300):
+            self.assertEqual(thumbnails.evict_derived_assets(), 3)
+        self.assertEqual(sorted(DerivedAsset.objects.values_list('key', flat=True)), ['newest', 'recent'])
+        for name, asset in assets.items():
+            self.assertEqual(default_storage.exists(asset.file.name), name in ('newest', 'recent'), name)
+
+    def test_cache_size_is_checked_occasionally(self):
+        blob = self.attach_image('0000ff').blob
+        for minutes in range(12):
+            self.add_asset(blob, f'asset-{minutes}', minutes)
+        # Below 1% of the limit since the last check: nothing is summed
+        with self.assertNumQueries(0):
+            self.assertEqual(thumbnails.maybe_evict_derived_assets(6), 0)
+        self.assertEqual(thumbnails.maybe_evict_derived_assets(6), 3)
+        self.assertEqual(DerivedAsset.objects.count(), 9)
+        self.assertFalse(DerivedAsset.objects.filter(key__in=['asset-9', 'asset-10', 'asset-11']).exists())
@@ -0,0 +1,154 @@
+"""Thumbnails of image attachments, kept in a size-bounded derived-asset cache.
+
+Thumbnails are rendered from an attachment's blob, so attachments with
+the same content share them. Each one is stored under a key hashing the
+blob's SHA-256 with the rendering parameters and recorded as a
+:class:`~tasks.models.DerivedAsset`. When the cache grows past
+``TASKS_DERIVED_CACHE_MAX_BYTES`` the least recently used are evicted.
+"""
+import hashlib
+import io
+import mimetypes
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Sum
+from django.http import FileResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from PIL import Image, ImageOps
+from .jobs import job
+from .models import DerivedAsset, TaskAttachment
+
+# Bump to render every thumbnail again after changing how they are made
+THUMBNAIL_VERSION = 1
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_MAX_AGE = 24 * 3600
+# Last-access times are written at most this often per asset
+TOUCH_INTERVAL = timedelta(hours=1)
+# Eviction frees space down to this share of the limit, so that it does
+# not run again on every new thumbnail
+EVICT_TO = 0.9
+# The cache size is summed once this process has rendered this share of
+# the limit since it last checked, so each process may overshoot by as much
+EVICT_CHECK_SHARE = 0.01
+
+_unchecked_lock = threading.Lock()
+_unchecked_bytes = 0
+
+
+class ThumbnailError(Exception):
+    """The attachment has no thumbnail of the requested size"""
+
+
+def is_image(attachment):
+    """Whether the attachment is a stored image Pillow may be able to read"""
+    content_type = mimetypes.guess_type(attachment.filename)[0] or ''
+    return attachment.blob_id is not None and content_type.startswith('image/') and content_type != 'image/svg+xml'
+
+
+def thumbnail_key(blob, size):
+    spec = f'{blob.sha256}:{settings.TASKS_THUMBNAIL_SIZES[size]}:{THUMBNAIL_FORMAT}:{THUMBNAIL_QUALITY}:{THUMBNAIL_VERSION}'
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def get_thumbnail(attachment, size):
+    """The thumbnail of an image attachment, rendered on first use"""
+    if size not in settings.TASKS_THUMBNAIL_SIZES or not is_image(attachment):
+        raise ThumbnailError(f'No {size} thumbnail for {attachment.filename}')
+    key = thumbnail_key(attachment.blob, size)
+    asset = DerivedAsset.objects.filter(key=key).first()
+    now = timezone.now()
+    if asset is None:
+        asset = render_thumbnail(attachment.blob, key, settings.TASKS_THUMBNAIL_SIZES[size])
+        maybe_evict_derived_assets(asset.size)
+    elif asset.last_accessed_at < now - TOUCH_INTERVAL:
+        DerivedAsset.objects.filter(pk=asset.pk).update(last_accessed_at=now)
+    return asset
+
+
+def render_thumbnail(blob, key, edge):
+    try:
+        with blob.file.storage.open(blob.file.name, 'rb') as source, Image.open(source) as image:
+            # JPEGs are decoded at the smallest scale still larger than the thumbnail
+            image.draft('RGB', (edge, edge))
+            thumbnail = ImageOps.exif_transpose(image)
+            thumbnail.thumbnail((edge, edge))
+            if thumbnail.mode not in ('RGB', 'RGBA'):
+                transparent = 'A' in thumbnail.getbands() or 'transparency' in thumbnail.info
+                thumbnail = thumbnail.convert('RGBA' if transparent else 'RGB')
+            output = io.BytesIO()
+            thumbnail.save(output, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        raise ThumbnailError(f'Cannot render {blob.sha256}: {error}') from error
+
+    name = default_storage.save(f'derived/{key[:2]}/{key}.webp', ContentFile(output.getvalue()))
+    asset, created = DerivedAsset.objects.get_or_create(key=key, defaults={
+        'source': blob,
+        'file': name,
+        'size': len(output.getvalue()),
+        'width': thumbnail.width,
+        'height': thumbnail.height,
+    })
+    if not created:
+        # Rendered concurrently by another request
+        default_storage.delete(name)
+    return asset
+
+
+def maybe_evict_derived_assets(added):
+    """Count newly rendered bytes, and evict once enough were added since the last check"""
+    global _unchecked_bytes
+    with _unchecked_lock:
+        _unchecked_bytes += added
+        if _unchecked_bytes < settings.TASKS_DERIVED_CACHE_MAX_BYTES * EVICT_CHECK_SHARE:
+            return 0
+        _unchecked_bytes = 0
+    return evict_derived_assets()
+
+
+def evict_derived_assets():
+    """Delete the least recently used assets while the cache is over its size limit"""
+    limit = settings.TASKS_DERIVED_CACHE_MAX_BYTES
+    total = DerivedAsset.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= limit:
+        return 0
+    evicted = 0
+    for asset in DerivedAsset.objects.order_by('last_accessed_at').only('file', 'size').iterator():
+        if total <= limit * EVICT_TO:
+            break
+        DerivedAsset.objects.filter(pk=asset.pk).delete()
+        asset.file.storage.delete(asset.file.name)
+        total -= asset.size
+        evicted += 1
+    return evicted
+
+
+def thumbnail_response(request, asset):
+    etag = quote_etag(asset.key)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(asset.file.storage.open(asset.file.name, 'rb'), content_type='image/webp')
+        response['ETag'] = etag
+    # The thumbnail of an attachment never changes
+    patch_cache_control(response, private=True, max_age=THUMBNAIL_MAX_AGE)
+    return response
+
+
+@job()
+def generate_thumbnails(attachment_id):
+    """Render every thumbnail size of an uploaded image ahead of its first view"""
+    attachment = TaskAttachment.objects.select_related('blob').filter(pk=attachment_id).first()
+    if attachment is None or not is_image(attachment):
+        return
+    for size in settings.TASKS_THUMBNAIL_SIZES:
+        try:
+            get_thumbnail(attachment, size)
+        except ThumbnailError:
+            # Not decodable: every size would fail the same way
+            return
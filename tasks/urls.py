@@ -10,6 +10,7 @@ urlpatterns = [
     # Task URLs
     path('tasks/', views.TaskListView.as_view(), name='task_list'),
     path('tasks/create/', views.TaskCreateView.as_view(), name='task_create'),
+    path('tasks/export/', views.export_tasks, name='task_export'),
     path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('tasks/<int:pk>/edit/', views.TaskUpdateView.as_view(), name='task_update'),
     path('tasks/<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
@@ -22,7 +23,18 @@ urlpatterns = [
     path('categories/<int:pk>/edit/', views.CategoryUpdateView.as_view(), name='category_update'),
     path('categories/<int:pk>/delete/', views.CategoryDeleteView.as_view(), name='category_delete'),
     
+    # Attachment URLs
+    path('attachments/<int:pk>/', views.download_attachment, name='attachment_download'),
+    path('attachments/<int:pk>/thumbnails/<str:size>/', views.attachment_thumbnail, name='attachment_thumbnail'),
+    
+    # User lookup
+    path('users/autocomplete/', views.user_autocomplete, name='user_autocomplete'),
+    
+    # Monitoring
+    path('metrics/', views.metrics, name='metrics'),
+    
     # Comment URLs
+    path('tasks/<int:pk>/comments/', views.task_comments, name='task_comments'),
     path('tasks/<int:task_id>/comment/', views.add_comment, name='add_comment'),
     path('comments/<int:comment_id>/delete/', views.delete_comment, name='delete_comment'),
 ] 
\ No newline at end of file
@@ -1,51 +1,57 @@
+from collections import defaultdict
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
-from django.db.models import Q, Count
+from django.urls import reverse, reverse_lazy
+from django.db import transaction
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from .models import Task, Category, TaskComment
+from .attachments import UploadError, attachment_response, cancel_upload, complete_upload, start_upload, write_chunk
+from .caching import (
+    cache, conditional_task_response, get_or_set, get_task_updated_at, get_timeout, make_key, set_validators,
+)
+from .categories import registry as category_registry
+from .exports import EXPORT_FORMATS, export_rows
+from .jobs import enqueue
+from .metrics import registry as metrics_registry
+from .models import Task, Category, TaskAttachment, TaskComment, UploadSession
 from .forms import TaskForm, CategoryForm, TaskCommentForm, TaskFilterForm
-from .serializers import TaskSerializer, CategorySerializer, TaskCommentSerializer
+from .notifications import notify_comment, queue_assignment_emails
+from .serializers import (
+    TaskSerializer, TaskListSerializer, CategorySerializer, TaskCommentSerializer,
+    TaskCreateSerializer, TaskUpdateSerializer, TaskAttachmentSerializer, UploadSessionSerializer,
+    bulk_task_serializer,
+)
+from .optimization import OptimizedQuerySetMixin, optimize_queryset
+from .pagination import InvalidCursor, KeysetCursorPagination, KeysetPaginator
+from .search import get_search_backend, search_tasks
+from .services import (
+    COMMENT_ORDERINGS, COMMENT_PAGE_SIZE, TASK_ORDERINGS, comment_thread, complete_task, filter_tasks,
+    get_dashboard_stats, refresh_after_bulk_create, refresh_after_bulk_write,
+)
+from .thumbnails import ThumbnailError, generate_thumbnails, get_thumbnail, is_image, thumbnail_response
 
 
 # Dashboard View
 @login_required
 def dashboard(request):
     """Dashboard view showing task overview and statistics"""
-    user = request.user
-    
-    # Get task statistics
-    total_tasks = Task.objects.filter(
-        Q(created_by=user) | Q(assigned_to=user)
-    ).count()
-    
-    tasks_by_status = Task.objects.filter(
-        Q(created_by=user) | Q(assigned_to=user)
-    ).values('status').annotate(count=Count('status'))
-    
-    overdue_tasks = Task.objects.filter(
-        Q(created_by=user) | Q(assigned_to=user),
-        due_date__lt=timezone.now(),
-        status__in=['todo', 'in_progress', 'review']
-    ).count()
-    
-    recent_tasks = Task.objects.filter(
-        Q(created_by=user) | Q(assigned_to=user)
-    ).order_by('-created_at')[:5]
+    stats = get_dashboard_stats(request.user)
     
     context = {
-        'total_tasks': total_tasks,
-        'tasks_by_status': tasks_by_status,
-        'overdue_tasks': overdue_tasks,
-        'recent_tasks': recent_tasks,
+        'stats': stats,
+        'recent_tasks': stats['recent_tasks'],
     }
     return render(request, 'tasks/dashboard.html', context)
 
@@ -57,45 +63,48 @@ class TaskListView(LoginRequiredMixin, ListView):
     template_name = 'tasks/task_list.html'
     context_object_name = 'tasks'
     paginate_by = 10
+    keyset_ordering = TASK_ORDERINGS['newest']
+    
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate with a (created_at, id) keyset cursor instead of OFFSET"""
+        paginator = KeysetPaginator(self.keyset_ordering, page_size)
+        try:
+            page = paginator.paginate(queryset, self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return paginator, page, page.object_list, page.has_other_pages()
     
     def get_queryset(self):
-        queryset = Task.objects.filter(
-            Q(created_by=self.request.user) | Q(assigned_to=self.request.user)
-        )
-        
-        # Apply filters
         form = TaskFilterForm(self.request.GET)
-        if form.is_valid():
-            if form.cleaned_data.get('search'):
-                search = form.cleaned_data['search']
-                queryset = queryset.filter(
-                    Q(title__icontains=search) | Q(description__icontains=search)
-                )
-            
-            if form.cleaned_data.get('status'):
-                queryset = queryset.filter(status=form.cleaned_data['status'])
-            
-            if form.cleaned_data.get('priority'):
-                queryset = queryset.filter(priority=form.cleaned_data['priority'])
-            
-            if form.cleaned_data.get('category'):
-                queryset = queryset.filter(category=form.cleaned_data['category'])
-            
-            if form.cleaned_data.get('assigned_to'):
-                queryset = queryset.filter(assigned_to=form.cleaned_data['assigned_to'])
-            
-            if form.cleaned_data.get('due_date_from'):
-                queryset = queryset.filter(due_date__gte=form.cleaned_data['due_date_from'])
-            
-            if form.cleaned_data.get('due_date_to'):
-                queryset = queryset.filter(due_date__lte=form.cleaned_data['due_date_to'])
+        # The list shows the assignee of every task
+        if not form.is_valid():
+            return Task.objects.visible_to(self.request.user).select_related('assigned_to').with_visibility_keys()
         
-        return queryset.order_by('-created_at')
+        queryset = filter_tasks(self.request.user, form.cleaned_data).select_related('assigned_to')
+        if form.cleaned_data.get('search'):
+            # Ranked search results; pages are keyed on the rank
+            self.keyset_ordering = get_search_backend().ordering
+            return queryset
+        
+        self.keyset_ordering = TASK_ORDERINGS[form.cleaned_data.get('ordering') or 'newest']
+        return queryset.with_visibility_keys().order_by(*self.keyset_ordering)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['filter_form'] = TaskFilterForm(self.request.GET)
+        page = context['page_obj']
+        if page is not None:
+            context['next_query'] = self._cursor_query(page.next_cursor)
+            context['previous_query'] = self._cursor_query(page.previous_cursor)
         return context
+    
+    def _cursor_query(self, cursor):
+        """Return the current query string pointing at another page"""
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query['cursor'] = cursor
+        return query.urlencode()
 
 
 class TaskDetailView(LoginRequiredMixin, DetailView):
@@ -104,14 +113,33 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     template_name = 'tasks/task_detail.html'
     context_object_name = 'task'
     
+    def get(self, request, *args, **kwargs):
+        # Pending flash messages have to be rendered, so skip the 304 shortcut
+        if not messages.get_messages(request):
+            not_modified = conditional_task_response(request, request.user, kwargs['pk'])
+            if not_modified is not None:
+                return not_modified
+        response = super().get(request, *args, **kwargs)
+        return set_validators(response, request.user, kwargs['pk'])
+    
     def get_queryset(self):
-        return Task.objects.filter(
-            Q(created_by=self.request.user) | Q(assigned_to=self.request.user)
-        )
+        return Task.objects.visible_to(self.request.user)
+    
+    def get_object(self, queryset=None):
+        """Serve the task from the per-object cache"""
+        pk = self.kwargs['pk']
+        if get_task_updated_at(self.request.user, pk) is None:
+            raise Http404('No task found matching the query')
+        key = make_key('task-detail', task=pk, categories=True)
+        return get_or_set(key, lambda: get_object_or_404(
+            Task.objects.select_related('created_by', 'assigned_to', 'category'), pk=pk,
+        ))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = TaskCommentForm()
+        # The first page of comments; the page fetches the rest as the reader scrolls
+        context.update(comment_page_context(self.request, self.object.pk))
         return context
 
 
@@ -120,12 +148,14 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
     form_class = TaskForm
     template_name = 'tasks/task_form.html'
-    success_url = reverse_lazy('task_list')
+    success_url = reverse_lazy('tasks:task_list')
     
     def form_valid(self, form):
         form.instance.created_by = self.request.user
         messages.success(self.request, 'Task created successfully!')
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        queue_assignment_emails([self.object], self.request.user)
+        return response
 
 
 class TaskUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
@@ -140,14 +170,17 @@ class TaskUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     
     def form_valid(self, form):
         messages.success(self.request, 'Task updated successfully!')
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if 'assigned_to' in form.changed_data:
+            queue_assignment_emails([self.object], self.request.user)
+        return response
 
 
 class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     """Delete view for removing tasks"""
     model = Task
     template_name = 'tasks/task_confirm_delete.html'
-    success_url = reverse_lazy('task_list')
+    success_url = reverse_lazy('tasks:task_list')
     
     def test_func(self):
         task = self.get_object()
@@ -158,6 +191,26 @@ class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+@login_required
+def export_tasks(request):
+    """Stream the tasks matching the list filters as CSV or JSON lines"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'format': [f'Expected one of: {", ".join(EXPORT_FORMATS)}.']}, status=400)
+    form = TaskFilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse(form.errors, status=400)
+    
+    queryset = filter_tasks(request.user, form.cleaned_data)
+    if not form.cleaned_data.get('search'):
+        queryset = queryset.order_by('-created_at', '-id')
+    stream, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(stream(export_rows(queryset)), content_type=content_type)
+    filename = f'tasks-{timezone.localdate():%Y%m%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # Category Views
 class CategoryListView(LoginRequiredMixin, ListView):
     """List view for categories"""
@@ -165,6 +218,9 @@ class CategoryListView(LoginRequiredMixin, ListView):
     template_name = 'tasks/category_list.html'
     context_object_name = 'categories'
     paginate_by = 20
+    
+    def get_queryset(self):
+        return category_registry.all()
 
 
 class CategoryDetailView(LoginRequiredMixin, DetailView):
@@ -175,10 +231,8 @@ class CategoryDetailView(LoginRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['tasks'] = Task.objects.filter(
+        context['tasks'] = Task.objects.visible_to(self.request.user).filter(
             category=self.object
-        ).filter(
-            Q(created_by=self.request.user) | Q(assigned_to=self.request.user)
         ).order_by('-created_at')
         return context
 
@@ -188,7 +242,7 @@ class CategoryCreateView(LoginRequiredMixin, CreateView):
     model = Category
     form_class = CategoryForm
     template_name = 'tasks/category_form.html'
-    success_url = reverse_lazy('category_list')
+    success_url = reverse_lazy('tasks:category_list')
     
     def form_valid(self, form):
         messages.success(self.request, 'Category created successfully!')
@@ -200,7 +254,7 @@ class CategoryUpdateView(LoginRequiredMixin, UpdateView):
     model = Category
     form_class = CategoryForm
     template_name = 'tasks/category_form.html'
-    success_url = reverse_lazy('category_list')
+    success_url = reverse_lazy('tasks:category_list')
     
     def form_valid(self, form):
         messages.success(self.request, 'Category updated successfully!')
@@ -211,7 +265,7 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
     """Delete view for removing categories"""
     model = Category
     template_name = 'tasks/category_confirm_delete.html'
-    success_url = reverse_lazy('category_list')
+    success_url = reverse_lazy('tasks:category_list')
     
     def delete(self, request, *args, **kwargs):
         messages.success(request, 'Category deleted successfully!')
@@ -219,10 +273,39 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # Comment Views
+def comment_page_context(request, task_id):
+    """A page of a task's comments, from the ``ordering`` and ``cursor`` query parameters"""
+    ordering = request.GET.get('ordering', 'oldest')
+    if ordering not in COMMENT_ORDERINGS:
+        raise Http404('Invalid ordering')
+    paginator = KeysetPaginator(COMMENT_ORDERINGS[ordering], COMMENT_PAGE_SIZE)
+    try:
+        page = paginator.paginate(comment_thread(task_id), request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+    next_url = None
+    if page.has_next():
+        query = urlencode({'ordering': ordering, 'cursor': page.next_cursor})
+        next_url = f"{reverse('tasks:task_comments', args=[task_id])}?{query}"
+    return {'comments': page, 'comment_ordering': ordering, 'next_comments_url': next_url}
+
+
+@login_required
+def task_comments(request, pk):
+    """The next page of a task's comments, appended by the detail page on scroll"""
+    not_modified = conditional_task_response(request, request.user, pk)
+    if not_modified is not None:
+        return not_modified
+    if get_task_updated_at(request.user, pk) is None:
+        raise Http404('No task found matching the query')
+    response = render(request, 'tasks/comment_page.html', comment_page_context(request, pk))
+    return set_validators(response, request.user, pk)
+
+
 @login_required
 def add_comment(request, task_id):
     """Add a comment to a task"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.visible_to(request.user), id=task_id)
     
     if request.method == 'POST':
         form = TaskCommentForm(request.POST)
@@ -230,12 +313,15 @@ def add_comment(request, task_id):
             comment = form.save(commit=False)
             comment.task = task
             comment.author = request.user
-            comment.save()
+            # The task's comment counter is updated with the insert
+            with transaction.atomic():
+                comment.save()
+                enqueue(notify_comment, comment.pk)
             messages.success(request, 'Comment added successfully!')
         else:
             messages.error(request, 'Error adding comment.')
     
-    return redirect('task_detail', pk=task_id)
+    return redirect('tasks:task_detail', pk=task_id)
 
 
 @login_required
@@ -244,65 +330,425 @@ def delete_comment(request, comment_id):
     comment = get_object_or_404(TaskComment, id=comment_id)
     
     if comment.author == request.user:
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
         messages.success(request, 'Comment deleted successfully!')
     else:
         messages.error(request, 'You cannot delete this comment.')
     
-    return redirect('task_detail', pk=comment.task.id)
+    return redirect('tasks:task_detail', pk=comment.task_id)
+
+
+# Attachment Views
+@login_required
+def download_attachment(request, pk):
+    """Serve an attachment of a visible task, honouring Range requests"""
+    attachment = get_object_or_404(
+        TaskAttachment.objects.select_related('blob'), pk=pk, task__visibility__user=request.user
+    )
+    return attachment_response(request, attachment)
+
+
+@login_required
+def attachment_thumbnail(request, pk, size):
+    """Serve a thumbnail of an image attachment, rendering it on first request"""
+    attachment = get_object_or_404(
+        TaskAttachment.objects.select_related('blob'), pk=pk, task__visibility__user=request.user
+    )
+    try:
+        asset = get_thumbnail(attachment, size)
+    except ThumbnailError:
+        raise Http404('No thumbnail for this attachment')
+    return thumbnail_response(request, asset)
 
 
 # AJAX Views
+USER_AUTOCOMPLETE_PAGE_SIZE = 20
+USER_AUTOCOMPLETE_CACHE_TIMEOUT = 60
+
+
+@login_required
+def user_autocomplete(request):
+    """Prefix search over active usernames for the assignee pickers.
+
+    Matches are a range scan on the unique username index, paginated with
+    an ``after`` username cursor and cached briefly per query.
+    """
+    query = request.GET.get('q', '').strip()
+    after = request.GET.get('after', '')
+    if not query:
+        return JsonResponse({'results': [], 'next': None})
+    
+    def lookup():
+        users = User.objects.filter(is_active=True, username__lt=query + '\U0010ffff')
+        if after:
+            users = users.filter(username__gt=after)
+        else:
+            users = users.filter(username__gte=query)
+        rows = list(users.order_by('username').values_list('id', 'username')[:USER_AUTOCOMPLETE_PAGE_SIZE + 1])
+        page = rows[:USER_AUTOCOMPLETE_PAGE_SIZE]
+        return {
+            'results': [{'id': pk, 'text': username} for pk, username in page],
+            'next': page[-1][1] if len(rows) > USER_AUTOCOMPLETE_PAGE_SIZE else None,
+        }
+    
+    key = make_key('user-autocomplete', extra=f'{query}\0{after}')
+    return JsonResponse(get_or_set(key, lookup, USER_AUTOCOMPLETE_CACHE_TIMEOUT))
+
+
 @login_required
 def mark_task_complete(request, task_id):
     """Mark a task as complete via AJAX"""
     if request.method == 'POST':
-        task = get_object_or_404(Task, id=task_id)
-        if task.created_by == request.user or task.assigned_to == request.user:
-            task.mark_completed()
-            return JsonResponse({'status': 'success'})
+        if complete_task(task_id, request.user):
+            return JsonResponse({'status': 'success', 'updated': True})
+        # Nothing was updated: the task is either done already or not visible
+        get_object_or_404(Task.objects.visible_to(request.user), id=task_id)
+        return JsonResponse({'status': 'success', 'updated': False})
     return JsonResponse({'status': 'error'}, status=400)
 
 
+# Monitoring Views
+def metrics(request):
+    """Request metrics in the Prometheus text format, for staff or a bearer token"""
+    token = settings.TASKS_METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if not (request.user.is_staff or token and constant_time_compare(authorization, f'Bearer {token}')):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render_prometheus(settings.TASKS_METRICS_SAMPLE_RATE),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
 # API Viewsets
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """API viewset for tasks"""
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    query_budgets = {'list': 4, 'retrieve': 5, 'comments': 4}
     
     def get_queryset(self):
-        return Task.objects.filter(
-            Q(created_by=self.request.user) | Q(assigned_to=self.request.user)
-        )
+        # Explicit ordering: Meta.ordering is dropped by annotated GROUP BY queries
+        queryset = Task.objects.visible_to(self.request.user)
+        search = self.request.query_params.get('search')
+        if search:
+            return search_tasks(queryset, search)
+        return queryset.with_visibility_keys().order_by(*TASK_ORDERINGS['newest'])
+    
+    @property
+    def keyset_ordering(self):
+        """Search rank or ``?ordering=newest|activity|comments``; ``oldest|newest`` for comments"""
+        if self.action == 'comments':
+            return self._ordering_param(COMMENT_ORDERINGS, 'oldest')
+        if self.request.query_params.get('search'):
+            return get_search_backend().ordering
+        return self._ordering_param(TASK_ORDERINGS, 'newest')
+    
+    def _ordering_param(self, orderings, default):
+        ordering = self.request.query_params.get('ordering', default)
+        if ordering not in orderings:
+            raise ValidationError({'ordering': [f'Expected one of: {", ".join(orderings)}.']})
+        return orderings[ordering]
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return TaskListSerializer
+        return TaskSerializer
+    
+    def list(self, request, *args, **kwargs):
+        # Cached per user version, so any change to a visible task invalidates it
+        key = make_key('api-task-list', user=request.user, categories=True, extra=request.build_absolute_uri())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, get_timeout())
+        return response
+    
+    @staticmethod
+    def _task_id(pk):
+        """The task id of a URL, which the router matches as any string"""
+        try:
+            return int(pk)
+        except ValueError:
+            raise NotFound()
+    
+    def retrieve(self, request, *args, **kwargs):
+        task_id = self._task_id(kwargs['pk'])
+        not_modified = conditional_task_response(request, request.user, task_id)
+        if not_modified is not None:
+            return not_modified
+        if get_task_updated_at(request.user, task_id) is None:
+            raise NotFound()
+        key = make_key('api-task', task=task_id, categories=True, extra=request.get_full_path())
+        data = get_or_set(key, lambda: super(TaskViewSet, self).retrieve(request, *args, **kwargs).data)
+        return set_validators(Response(data), request.user, task_id)
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        task = serializer.save(created_by=self.request.user)
+        queue_assignment_emails([task], self.request.user)
+    
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """The task's comment thread, a keyset page at a time"""
+        task_id = self._task_id(pk)
+        not_modified = conditional_task_response(request, request.user, task_id)
+        if not_modified is not None:
+            return not_modified
+        if get_task_updated_at(request.user, task_id) is None:
+            raise NotFound()
+        context = self.get_serializer_context()
+        queryset = optimize_queryset(comment_thread(task_id), TaskCommentSerializer(context=context))
+        serializer = TaskCommentSerializer(self.paginate_queryset(queryset), many=True, context=context)
+        return set_validators(self.get_paginated_response(serializer.data), request.user, task_id)
     
     @action(detail=True, methods=['post'])
     def mark_complete(self, request, pk=None):
-        task = self.get_object()
-        task.mark_completed()
-        return Response({'status': 'success'})
-
-
-class CategoryViewSet(viewsets.ModelViewSet):
+        task_id = self._task_id(pk)
+        if complete_task(task_id, request.user):
+            return Response({'status': 'success', 'updated': True})
+        # Nothing was updated: the task is either done already or not visible
+        get_object_or_404(Task.objects.visible_to(request.user), pk=task_id)
+        return Response({'status': 'success', 'updated': False})
+    
+    # Bulk endpoints: every item is validated before anything is written, the
+    # batch is written in one transaction and the response lists one result
+    # per item, in request order.
+    MAX_BULK_ITEMS = 5000
+    
+    def _bulk_items(self, request):
+        items = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return None, Response({'detail': 'Expected a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_BULK_ITEMS:
+            return None, Response(
+                {'detail': f'At most {self.MAX_BULK_ITEMS} items per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return items, None
+    
+    @staticmethod
+    def _task_id_of(item):
+        """The task id of a bulk item, or None; JSON true is not task 1"""
+        task_id = item.get('id') if isinstance(item, dict) else None
+        return task_id if isinstance(task_id, int) and not isinstance(task_id, bool) else None
+    
+    @staticmethod
+    def _invalid_batch(errors):
+        results = [
+            {'index': index, 'status': 'invalid', 'errors': item_errors} if item_errors
+            else {'index': index, 'status': 'valid'}
+            for index, item_errors in enumerate(errors)
+        ]
+        return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Create a batch of tasks with bulk_create"""
+        items, error = self._bulk_items(request)
+        if error:
+            return error
+        serializer = bulk_task_serializer(TaskCreateSerializer, items, context=self.get_serializer_context())
+        if not serializer.is_valid():
+            return self._invalid_batch(serializer.errors)
+        
+        tasks = [Task(created_by=request.user, **attrs) for attrs in serializer.validated_data]
+        for task in tasks:
+            task.update_overdue()
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=500)
+            refresh_after_bulk_create(tasks)
+            queue_assignment_emails(tasks, request.user)
+        results = [
+            {'index': index, 'status': 'created', 'id': task.pk}
+            for index, task in enumerate(tasks)
+        ]
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+    
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """Partially update a batch of tasks with bulk_update"""
+        items, error = self._bulk_items(request)
+        if error:
+            return error
+        ids = [self._task_id_of(item) for item in items]
+        tasks = Task.objects.visible_to(request.user).in_bulk(
+            [task_id for task_id in ids if task_id is not None]
+        )
+        serializer = bulk_task_serializer(
+            TaskUpdateSerializer, items, partial=True, context=self.get_serializer_context()
+        )
+        serializer.is_valid()
+        errors = list(serializer.errors) if serializer.errors else [{} for _ in items]
+        for index, task_id in enumerate(ids):
+            if task_id not in tasks:
+                errors[index] = {**errors[index], 'id': ['Task not found.']}
+        if any(errors):
+            return self._invalid_batch(errors)
+        
+        now = timezone.now()
+        changed_fields = {task_id: {'updated_at'} for task_id in tasks}
+        previous_user_ids = set()
+        reassigned = []
+        for task_id, attrs in zip(ids, serializer.validated_data):
+            task = tasks[task_id]
+            previous_user_ids.add(task.assigned_to_id)
+            if 'assigned_to' in attrs and getattr(attrs['assigned_to'], 'pk', None) != task.assigned_to_id:
+                reassigned.append(task)
+            if 'status' in attrs and attrs['status'] != task.status:
+                # Like Task.set_status: reopening a done task clears its completion
+                task.completed_at = now if attrs['status'] == 'done' else None
+                changed_fields[task_id].add('completed_at')
+            for name, value in attrs.items():
+                setattr(task, name, value)
+            if {'status', 'due_date'} & set(attrs):
+                task.update_overdue(now)
+                changed_fields[task_id].add('overdue_since')
+            task.updated_at = now
+            changed_fields[task_id].update(attrs)
+        
+        # Only write the fields each task changed, so concurrent edits of the
+        # others survive: one bulk_update per set of changed fields
+        groups = defaultdict(list)
+        for task_id, fields in changed_fields.items():
+            groups[frozenset(fields)].append(tasks[task_id])
+        with transaction.atomic():
+            for fields, group in groups.items():
+                Task.objects.bulk_update(group, sorted(fields), batch_size=500)
+            refresh_after_bulk_write(
+                list(tasks), previous_user_ids,
+                reindex=any(fields & {'title', 'description'} for fields in groups),
+            )
+            queue_assignment_emails(reassigned, request.user)
+        results = [
+            {'index': index, 'status': 'updated', 'id': task_id}
+            for index, task_id in enumerate(ids)
+        ]
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_complete(self, request):
+        """Mark a batch of tasks as done with a single UPDATE"""
+        ids, error = self._bulk_items(request)
+        if error:
+            return error
+        if not all(isinstance(task_id, int) and not isinstance(task_id, bool) for task_id in ids):
+            return Response({'detail': 'Expected a list of task ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        now = timezone.now()
+        with transaction.atomic():
+            current = dict(
+                Task.objects.visible_to(request.user)
+                .filter(pk__in=ids)
+                .values_list('pk', 'status')
+            )
+            pending = [task_id for task_id, task_status in current.items() if task_status != 'done']
+            Task.objects.filter(pk__in=pending).exclude(status='done').update(
+                status='done', completed_at=now, updated_at=now, overdue_since=None
+            )
+            refresh_after_bulk_write(pending, reindex=False)
+        
+        results = []
+        for index, task_id in enumerate(ids):
+            if task_id not in current:
+                result = 'not_found'
+            elif current[task_id] == 'done':
+                result = 'already_done'
+            else:
+                result = 'completed'
+            results.append({'index': index, 'status': result, 'id': task_id})
+        return Response({'results': results})
+
+
+class CategoryViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """API viewset for categories"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = {'list': 3, 'retrieve': 3}
+    
+    def list(self, request, *args, **kwargs):
+        """Serve the category list from the in-process registry"""
+        categories = category_registry.all()
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return self.get_paginated_response([category_registry.serialized(c.pk) for c in page])
+        return Response([category_registry.serialized(c.pk) for c in categories])
+    
+    def retrieve(self, request, *args, **kwargs):
+        category = category_registry.get(kwargs['pk'])
+        if category is None:
+            raise NotFound()
+        return Response(category_registry.serialized(category.pk))
 
 
-class TaskCommentViewSet(viewsets.ModelViewSet):
+class TaskCommentViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """API viewset for task comments"""
     serializer_class = TaskCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    keyset_ordering = ('created_at', 'id')
+    query_budgets = {'list': 3, 'retrieve': 3}
     
     def get_queryset(self):
-        return (TaskComment.objects.filter(
-            task__created_by=self.request.user
-        ) | TaskComment.objects.filter(
-            task__assigned_to=self.request.user
-        ))
+        return TaskComment.objects.visible_to(self.request.user)
     
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user) 
\ No newline at end of file
+        comment = serializer.save(author=self.request.user)
+        enqueue(notify_comment, comment.pk)
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+
+class AttachmentUploadViewSet(viewsets.ViewSet):
+    """Resumable attachment uploads.
+    
+    ``POST`` opens an upload for a task. Each ``PUT`` sends the next chunk
+    of the file as the raw body, placed by a ``Content-Range: bytes
+    first-last/size`` header; the chunk completing the file returns the
+    new attachment. ``GET`` returns the offset to resume from and
+    ``DELETE`` abandons the upload.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_value_regex = '[0-9a-f-]{36}'
+    
+    def get_session(self, pk):
+        session = UploadSession.objects.select_related('task', 'user').filter(pk=pk, user=self.request.user).first()
+        if session is None:
+            raise NotFound()
+        return session
+    
+    def create(self, request):
+        serializer = UploadSessionSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        session = start_upload(user=request.user, **serializer.validated_data)
+        location = reverse('tasks-api:api-upload-detail', args=[session.pk])
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED,
+                        headers={'Location': request.build_absolute_uri(location)})
+    
+    def retrieve(self, request, pk=None):
+        return Response(UploadSessionSerializer(self.get_session(pk)).data)
+    
+    def update(self, request, pk=None):
+        session = self.get_session(pk)
+        try:
+            # The body is streamed to disk, never parsed
+            offset = write_chunk(session, request.headers.get('Content-Range'), request.stream)
+            if offset < session.size:
+                return Response(UploadSessionSerializer(session).data)
+            attachment = complete_upload(session)
+        except UploadError as error:
+            return Response({'detail': str(error), 'offset': session.offset}, status=error.status)
+        if is_image(attachment):
+            enqueue(generate_thumbnails, attachment.pk)
+        serializer = TaskAttachmentSerializer(attachment, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, pk=None):
+        cancel_upload(self.get_session(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,39 @@
+from django import forms
+from django.urls import reverse_lazy
+
+
+class UserAutocompleteWidget(forms.Select):
+    """Select widget that only renders the selected user.
+
+    Other options are fetched on demand from the user autocomplete
+    endpoint, so rendering a form never loads the whole users table.
+    """
+    
+    class Media:
+        js = ['tasks/js/user_autocomplete.js']
+    
+    def __init__(self, attrs=None, url=reverse_lazy('tasks:user_autocomplete')):
+        super().__init__(attrs)
+        self.url = url
+    
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = str(self.url)
+        return attrs
+    
+    def optgroups(self, name, value, attrs=None):
+        groups = []
+        # Values may come straight from a query string; only integer ids are looked up
+        selected = [pk for pk in value if str(pk).isdigit()]
+        field = getattr(self.choices, 'field', None)
+        if field is not None and field.empty_label is not None:
+            groups.append(self._option_group(name, '', field.empty_label, not selected, 0))
+        if field is not None and selected:
+            for user in field.queryset.filter(pk__in=selected):
+                groups.append(self._option_group(
+                    name, user.pk, field.label_from_instance(user), True, len(groups)
+                ))
+        return groups
+    
+    def _option_group(self, name, value, label, selected, index):
+        return (None, [self.create_option(name, value, label, selected, index)], index)